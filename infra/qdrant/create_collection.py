@@ -38,9 +38,15 @@ def _(mo, run_button):
     # from sentence_transformers import SentenceTransformer
 
     openai = OpenAI(base_url="http://localhost:4000", api_key="none_but_required")
-    qdrant = QdrantClient(url="http://localhost:6333")
+    import os
+
+    # Set QDRANT_PATH to ingest into an embedded on-disk database instead of the Qdrant server
+    if qdrant_path := os.environ.get("QDRANT_PATH"):
+        qdrant = QdrantClient(path=qdrant_path)
+    else:
+        qdrant = QdrantClient(url="http://localhost:6333")
     # minilm = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
-    return OpenAI, QdrantClient, load_dataset, models, openai, qdrant
+    return OpenAI, QdrantClient, load_dataset, models, openai, os, qdrant, qdrant_path
 
 
 @app.cell
@@ -108,14 +114,47 @@ def _(df_exploded):
 
 
 @app.cell
-def _(openai):
+def _(openai, os):
+    # OPENAI_EMBEDDING_MODEL and OPENAI_EMBEDDING_DIMENSIONS must match the application's settings
+    embedding_model = os.environ.get("OPENAI_EMBEDDING_MODEL", "text-embedding-3-large")
+    embedding_dimensions = int(_dimensions) if (_dimensions := os.environ.get("OPENAI_EMBEDDING_DIMENSIONS")) else None
+
     def openai_embed(chunk):
-        response = openai.embeddings.create(input=chunk, model="text-embedding-3-large")
+        if embedding_dimensions is None:
+            response = openai.embeddings.create(input=chunk, model=embedding_model)
+        else:
+            response = openai.embeddings.create(input=chunk, model=embedding_model, dimensions=embedding_dimensions)
 
         embedding = response.data[0].embedding
 
         return embedding
-    return (openai_embed,)
+    return embedding_dimensions, embedding_model, openai_embed
+
+
+@app.cell
+def _(os):
+    # Set EMBED_BACKEND=local to embed with a FastEmbed model on the CPU, as the application does at query time.
+    # LOCAL_EMBEDDING_MODEL and LOCAL_EMBEDDING_PATH must match the application's settings
+    embed_backend = os.environ.get("EMBED_BACKEND", "openai")
+
+    if embed_backend == "local":
+        from fastembed import TextEmbedding
+
+        local_model_path = os.environ.get("LOCAL_EMBEDDING_PATH")
+        local_model = TextEmbedding(
+            os.environ.get("LOCAL_EMBEDDING_MODEL", "BAAI/bge-small-en-v1.5"),
+            **({"specific_model_path": local_model_path} if local_model_path else {}),
+        )
+    else:
+        local_model = None
+    return embed_backend, local_model
+
+
+@app.cell
+def _(local_model):
+    def local_embed(chunks):
+        return [vector.tolist() for vector in local_model.passage_embed(chunks, batch_size=32)]
+    return (local_embed,)
 
 
 @app.cell
@@ -139,8 +178,11 @@ def _(openai_embed):
 
 
 @app.cell
-def _(create_embeddings, df_exploded):
-    df_exploded["vectors"] = df_exploded.apply(create_embeddings, axis=1)
+def _(create_embeddings, df_exploded, embed_backend, local_embed):
+    if embed_backend == "local":
+        df_exploded["vectors"] = local_embed(df_exploded["chunks"].tolist())
+    else:
+        df_exploded["vectors"] = df_exploded.apply(create_embeddings, axis=1)
     return
 
 
@@ -175,13 +217,64 @@ def _(create_sparse_embeddings, df_exploded):
 
 
 @app.cell
-def _(models, qdrant):
+def _(models, os):
+    # Set QDRANT_QUANTIZATION to "scalar" or "binary" to keep quantized vectors in RAM for searching;
+    # The originals are then stored on disk and only read for rescoring. Full-precision vectors stay in RAM otherwise
+    quantization = os.environ.get("QDRANT_QUANTIZATION")
+    if quantization == "scalar":
+        quantization_config = models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    elif quantization == "binary":
+        quantization_config = models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+    elif quantization is None:
+        quantization_config = None
+    else:
+        raise ValueError(f'QDRANT_QUANTIZATION must be "scalar" or "binary", not {quantization!r}')
+    return quantization, quantization_config
+
+
+@app.cell
+def _(os):
+    import math
+
+    # Set QDRANT_SMALL_DIMENSIONS to also store truncated (Matryoshka) copies of the dense vectors,
+    # which the application prefetches on when run with the same setting
+    small_dimensions = int(_dimensions) if (_dimensions := os.environ.get("QDRANT_SMALL_DIMENSIONS")) else None
+
+    def truncate_embedding(embedding, dimensions):
+        # Same as `rag.components.search.truncate_embedding`
+        truncated = embedding[:dimensions]
+        norm = math.sqrt(sum(value * value for value in truncated)) or 1.0
+        return [value / norm for value in truncated]
+    return math, small_dimensions, truncate_embedding
+
+
+@app.cell
+def _(df_exploded, models, qdrant, quantization_config, small_dimensions):
+    vectors_config = {
+        "dense": models.VectorParams(
+            size=len(df_exploded["vectors"].iloc[0]), # The dimensions of the embedding model
+            distance=models.Distance.COSINE,
+            on_disk=quantization_config is not None,
+            quantization_config=quantization_config,
+        )
+    }
+
+    if small_dimensions is not None:
+        # Small enough to keep in RAM, like the quantized originals
+        vectors_config["dense_small"] = models.VectorParams(
+            size=small_dimensions,
+            distance=models.Distance.COSINE,
+            quantization_config=quantization_config,
+        )
+
     qdrant.recreate_collection(
         collection_name="Wikipedia",
-        vectors_config={"dense": models.VectorParams(size=3072, distance=models.Distance.COSINE)}, # You must change the size param to match the dimensions of your embedding model
+        vectors_config=vectors_config,
         sparse_vectors_config={"sparse": models.SparseVectorParams()},
     )
-    return
+    return (vectors_config,)
 
 
 @app.cell
@@ -197,7 +290,7 @@ def _(records):
 
 
 @app.cell
-def _(models, records):
+def _(models, records, small_dimensions, truncate_embedding):
     points = [
         models.PointStruct(
             id=id,
@@ -207,6 +300,11 @@ def _(models, records):
                     "indices": row["sparse_vectors"][0],
                     "values": row["sparse_vectors"][1],
                 },
+                **(
+                    {"dense_small": truncate_embedding(row["vectors"], small_dimensions)}
+                    if small_dimensions is not None
+                    else {}
+                ),
             },
             payload={
                 "content": row["chunks"],
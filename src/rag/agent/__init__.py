@@ -8,12 +8,15 @@ An Agent instance uses components configured and provided by the 'config' module
 The Agent class is what the entrypoints must import to interact with the application logic.
 """
 
+import asyncio
 import json
 from collections.abc import AsyncGenerator
+from contextlib import aclosing, nullcontext
 from pathlib import Path
-from typing import Any
+from typing import Any, Literal
 
-from rag import config
+from rag import config, telemetry
+from rag.components.search import fuse_results
 from rag.types import (
     AssistantMessage,
     Messages,
@@ -21,9 +24,14 @@ from rag.types import (
     OptionalEmbed,
     OptionalSearch,
     SearchResult,
+    Tool,
 )
 
-__all__ = ["Agent"]
+from .cascade import ESCALATE_TOOL, Cascade
+from .compaction import Compaction, compact, estimate_tokens
+from .recording import Recorder, tool_call
+
+__all__ = ["Agent", "MaxRoundsError"]
 
 agent_dir = Path(__file__).parent
 
@@ -32,6 +40,10 @@ system_prompt_txt = agent_dir / "system_prompt.txt"
 tools_json = agent_dir / "tools.json"
 
 
+class MaxRoundsError(RuntimeError):
+    """The LLM kept calling tools for more rounds than allowed."""
+
+
 class Agent:
     """`Agent` encapsulates a system prompt, tool definitions, and tool execution logic."""
 
@@ -44,67 +56,153 @@ class Agent:
         _chat: OptionalChat = None,
         _search: OptionalSearch = None,
         _embed: OptionalEmbed = None,
+        _recorder: Recorder | Literal[False] | None = None,
+        _compaction: Compaction | Literal[False] | None = None,
+        _cascade: Cascade | Literal[False] | None = None,
     ) -> None:
         """Initialize an `Agent` instance.
 
         Args:
             model (str): The model to use for inference, as defined in the litellm config.
             _chat (OptionalChat, optional): The chat component to use to generate chat completions. Defaults to OpenAIChat if not provided.
-            _search (OptionalSearch, optional): The search component to use to generate search results. Defaults to QdrantSearch if not provided.
-            _embed (OptionalEmbed, optional): The embed component to use to generate embeddings. Defaults to OpenAIEmbed if not provided.
+            _search (OptionalSearch, optional): The search component to use to generate search results. Defaults to the configured search component if not provided.
+            _embed (OptionalEmbed, optional): The embed component to use to generate embeddings. Defaults to the `EMBED_BACKEND` component if not provided.
+            _recorder (Recorder, optional): Record the traffic of `generate` calls; False never records. Defaults to a Recorder for `RECORD_PATH` if set.
+            _compaction (Compaction, optional): Compact the history sent to the LLM; False never compacts. Defaults to the `COMPACTION_*` settings, if any is set.
+            _cascade (Cascade, optional): Try a fast model before `model`; False never cascades. Defaults to the `CASCADE_*` settings, if `CASCADE_MODELS` is set.
 
         """
         self.model = model
         self.chat = _chat or config.get_openai_chat()
-        self.search = _search or config.get_qdrant()
-        self.embed = _embed or config.get_openai_embed()
+        self.search = _search or config.get_search()
+        self.embed = _embed or config.get_embed()
+
+        if _recorder is None and (record_path := config.settings.record_path):
+            _recorder = Recorder(record_path)
+
+        self.recorder = _recorder or None
+
+        settings = config.settings
+        if _compaction is None and (
+            settings.compaction_max_tool_age is not None
+            or settings.compaction_token_budget is not None
+        ):
+            _compaction = Compaction(
+                max_tool_age=settings.compaction_max_tool_age,
+                tool_output_characters=settings.compaction_tool_output_characters,
+                token_budget=settings.compaction_token_budget,
+            )
+
+        self.compaction = _compaction or None
+
+        if _cascade is None and settings.cascade_models:
+            _cascade = Cascade(
+                models=settings.cascade_models,
+                escalate_on_tools=settings.cascade_escalate_on_tools,
+                max_prompt_tokens=settings.cascade_max_prompt_tokens,
+            )
+
+        self.cascade = _cascade or None
+        self.search_limit = settings.search_limit
+        if self.recorder is not None:
+            self.chat = self.recorder.wrap_chat(self.chat)
+            self.search = self.recorder.wrap_search(self.search)
+            self.embed = self.recorder.wrap_embed(self.embed)
 
         self.tool_map = {
             "hybrid_search": self._hybrid_search_pipeline,
             "semantic_search": self._semantic_search_pipeline,
             "keyword_search": self._keyword_search_pipeline,
+            "multi_search": self._multi_search_pipeline,
         }
 
+    def _limit(self, limit: int | None) -> int:
+        """The number of results of a search: The one requested by the LLM, up to `search_limit`."""
+        return (
+            self.search_limit
+            if limit is None
+            else max(1, min(limit, self.search_limit))
+        )
+
     async def _hybrid_search_pipeline(
         self,
         query: str,
         keywords: list[str],
-        limit: int = 25,
+        limit: int | None = None,
     ) -> str:
         """Pipeline to perform a hybrid search and build a string template."""
         query_embedding = await self.embed.generate_embedding(text=query)
 
         search_results = await self.search.hybrid_search(
-            query=query_embedding, keywords=keywords, limit=limit
+            query=query_embedding, keywords=keywords, limit=self._limit(limit)
         )
 
-        template = self._build_template(search_results)
+        with telemetry.stage("template_build"):
+            template = self._build_template(search_results)
 
         return template
 
-    async def _semantic_search_pipeline(self, query: str, limit: int = 25) -> str:
+    async def _semantic_search_pipeline(
+        self, query: str, limit: int | None = None
+    ) -> str:
         """Pipeline to perform a semantic search and build a string template."""
         query_embedding = await self.embed.generate_embedding(text=query)
 
         search_results = await self.search.semantic_search(
-            query=query_embedding, limit=limit
+            query=query_embedding, limit=self._limit(limit)
         )
 
-        template = self._build_template(search_results)
+        with telemetry.stage("template_build"):
+            template = self._build_template(search_results)
 
         return template
 
     async def _keyword_search_pipeline(
         self,
         keywords: list[str],
-        limit: int = 25,
+        limit: int | None = None,
     ) -> str:
         """Pipeline to perform a keyword search and build a string template."""
         search_results = await self.search.keyword_search(
-            keywords=keywords, limit=limit
+            keywords=keywords, limit=self._limit(limit)
         )
 
-        template = self._build_template(search_results)
+        with telemetry.stage("template_build"):
+            template = self._build_template(search_results)
+
+        return template
+
+    async def _multi_search_pipeline(
+        self,
+        searches: list[dict[str, Any]],
+        limit: int | None = None,
+    ) -> str:
+        """Pipeline to perform several hybrid searches in one round trip and build a string template."""
+        if not searches:
+            return ""
+
+        limit = self._limit(limit)
+
+        query_embeddings = await self.embed.generate_embeddings(
+            texts=[search["query"] for search in searches]
+        )
+
+        search_results = await self.search.batch_search(
+            [
+                {
+                    "mode": "hybrid",
+                    "query": query_embedding,
+                    "keywords": search["keywords"],
+                    "limit": limit,
+                }
+                for search, query_embedding in zip(
+                    searches, query_embeddings, strict=True
+                )
+            ]
+        )
+
+        with telemetry.stage("template_build"):
+            template = self._build_template(fuse_results(search_results, limit))
 
         return template
 
@@ -131,13 +229,18 @@ class Agent:
             The given tool function's return value.
 
         """
-        return await self.tool_map[tool_name](*args, **kwargs)  # type: ignore[operator]
+        with (
+            telemetry.tool_context(self.model, tool_name),
+            telemetry.stage("tool_call"),
+        ):
+            return await self.tool_map[tool_name](*args, **kwargs)  # type: ignore[operator]
 
     async def generate(self, messages: Messages, **kwargs: Any) -> AsyncGenerator[str]:
         """Send messages to the LLM to generate a response.
 
-        If the LLM responds with a tool call, execute the tool and
-        append the result to the messages list.
+        If the LLM responds with tool calls, execute each tool as soon as its call is complete,
+        concurrently with the rest of the LLM stream, and append the results to the messages list.
+        With a `Cascade`, the round may go to a fast model first (see `agent.cascade`).
 
         Args:
             messages (Messages): The list of messages to send to the LLM. Each message
@@ -150,29 +253,156 @@ class Agent:
             An asynchronous generator that yields the LLM's response content one token (str) at a time.
 
         """
-        assistant_message: AssistantMessage = {"role": "assistant", "content": ""}
+        async with (
+            self.recorder.record(self.model, messages)
+            if self.recorder
+            else nullcontext()
+        ):
+            prompt = messages
+            if self.compaction is not None:
+                with telemetry.stage("compaction", model=self.model):
+                    prompt, saved = compact(messages, self.compaction)
+                    telemetry.record_compaction(
+                        self.model, tokens=estimate_tokens(prompt), saved=saved
+                    )
 
-        new_messages: Messages = []
-        new_messages.append(assistant_message)
+            fast = (
+                self.cascade.fast_model(self.model, messages, prompt)
+                if self.cascade is not None
+                else None
+            )
 
-        async for chunk in self.chat.generate_stream(
-            messages, model=self.model, tools=self.tools, **kwargs
-        ):
-            if content := chunk["content"]:
-                assistant_message["content"] += content
-                yield content
+            new_messages: Messages = []
 
-            if tools := chunk["tools"]:
-                assistant_message["tool_calls"] = tools
+            if fast is not None:
+                async for content in self._round(prompt, new_messages, fast, kwargs):
+                    yield content
 
-                for tool in tools:
-                    result = await self.execute(
-                        tool_name=tool["function"]["name"],
-                        **json.loads(tool["function"]["arguments"]),
-                    )
+                # An escalated round leaves `new_messages` empty: Only its prompt is counted
+                telemetry.record_cascade(
+                    self.model,
+                    "fast" if new_messages else "escalated",
+                    estimate_tokens(prompt + new_messages[:1]),
+                )
+
+            # The round goes to the large model unless the fast one answered it
+            if not new_messages:
+                async for content in self._round(prompt, new_messages, None, kwargs):
+                    yield content
 
-                    new_messages.append(
-                        {"role": "tool", "tool_call_id": tool["id"], "content": result}
+                if self.cascade is not None and self.model in self.cascade.models:
+                    telemetry.record_cascade(
+                        self.model, "large", estimate_tokens(prompt + new_messages[:1])
                     )
 
         messages.extend(new_messages)
+
+    async def generate_answer(
+        self, messages: Messages, max_rounds: int = 5, **kwargs: Any
+    ) -> AsyncGenerator[str]:
+        """Generate rounds until the LLM answers instead of calling tools.
+
+        Each round is a call to `generate`; Its tool results are added to the messages list
+        and sent back to the LLM by the next round, like a chat session does.
+
+        Args:
+            messages (Messages): The list of messages to send to the LLM; New messages are appended to it.
+            max_rounds (int, optional): The maximum number of rounds. Defaults to 5.
+            **kwargs: Arbitrary keyword arguments to pass to the LLM.
+
+        Returns:
+            An asynchronous generator that yields the content of every round one token (str) at a time.
+
+        Raises:
+            MaxRoundsError: If the LLM still calls tools after `max_rounds` rounds.
+
+        """
+        for _ in range(max_rounds):
+            async for content in self.generate(messages, **kwargs):
+                yield content
+
+            if messages[-1]["role"] != "tool":
+                return
+
+        raise MaxRoundsError(f"No answer after {max_rounds} rounds")
+
+    async def _round(
+        self,
+        prompt: Messages,
+        new_messages: Messages,
+        fast: str | None,
+        kwargs: dict[str, Any],
+    ) -> AsyncGenerator[str]:
+        """Stream one round of the LLM and execute its tool calls, adding the new messages to `new_messages`.
+
+        If `fast` is given, the round goes to that model with the `escalate` tool; `new_messages` is
+        left empty if it calls it. `escalate` may come after other tool calls, so the round is only known
+        not to escalate at the end of the stream: Its content is held back and its tools are executed
+        then, so that the caller never receives content, nor the tools run searches, for a round that
+        is then replaced by the large model's.
+        """
+        model = fast or self.model
+        tools = [*self.tools, ESCALATE_TOOL] if fast else self.tools
+
+        answer = ""
+        assistant_message: AssistantMessage = {"role": "assistant", "content": answer}
+
+        tool_calls: list[Tool] = []
+        tasks: list[asyncio.Task[str]] = []
+        held = ""
+
+        def execute(tools: list[Tool]) -> None:
+            for tool in tools:
+                # The task copies the context, so recordings know the tool call
+                with tool_call(tool["id"]):
+                    tasks.append(
+                        asyncio.create_task(
+                            self.execute(
+                                tool_name=tool["function"]["name"],
+                                **json.loads(tool["function"]["arguments"]),
+                            )
+                        )
+                    )
+
+        try:
+            async with aclosing(
+                self.chat.generate_stream(prompt, model=model, tools=tools, **kwargs)
+            ) as stream:
+                async for chunk in stream:
+                    if content := chunk["content"]:
+                        answer += content
+                        assistant_message["content"] = answer
+                        if fast:
+                            held += content
+                        else:
+                            yield content
+
+                    # Tool calls arrive as soon as each one is complete; Executing them
+                    # while the LLM is still streaming overlaps retrieval with decoding
+                    if tools := chunk["tools"]:
+                        if any(
+                            tool["function"]["name"] == "escalate" for tool in tools
+                        ):
+                            return
+
+                        tool_calls.extend(tools)
+                        assistant_message["tool_calls"] = tool_calls
+
+                        if not fast:
+                            execute(tools)
+
+            if fast:
+                execute(tool_calls)
+                if held:
+                    yield held
+
+            results = await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        new_messages.append(assistant_message)
+        new_messages.extend(
+            {"role": "tool", "tool_call_id": tool["id"], "content": result}
+            for tool, result in zip(tool_calls, results, strict=True)
+        )
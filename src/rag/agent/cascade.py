@@ -0,0 +1,80 @@
+"""`agent.cascade` routes the simple rounds of a conversation to a smaller, faster model.
+
+Greetings and simple follow-ups do not need the large model the user asked for. With a `Cascade`,
+the first round of each turn (the one answering a user message) goes to the fast model paired with
+the requested one. The fast model is given an extra `escalate` tool and the turn moves to the large model:
+    - When the fast model calls `escalate`, because it is not confident it can answer well. The round
+      is then generated again by the large model.
+    - When the fast model searches (with `escalate_on_tools`): It chooses the searches, and the large
+      model answers from their results. Otherwise, the fast model answers from them too.
+    - When the prompt is larger than `max_prompt_tokens`, as long conversations are seldom simple.
+
+A fast round is only known not to escalate at the end of its stream, as `escalate` may follow other
+tool calls. Its content is streamed and its tools executed only then, so callers never receive a partial
+answer from the fast model followed by the large model's answer.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any
+
+from rag.types import Messages
+
+from .compaction import estimate_tokens
+
+__all__ = ["ESCALATE_TOOL", "Cascade"]
+
+ESCALATE_TOOL: dict[str, Any] = {
+    "type": "function",
+    "function": {
+        "name": "escalate",
+        "description": (
+            "Hand the conversation over to a more capable assistant. Call it before writing anything "
+            "if you are not confident that you can answer well, e.g. for complex, ambiguous or sensitive requests."
+        ),
+        "parameters": {"type": "object", "properties": {}},
+    },
+}
+
+
+@dataclass
+class Cascade:
+    """Routing policy of the model cascade.
+
+    Attributes:
+        models (dict[str, str]): The fast model to try first for each large model; Other models are never cascaded.
+        escalate_on_tools (bool): Let the large model answer once the fast model has searched.
+        max_prompt_tokens (int, optional): Send prompts with more estimated tokens straight to the large model; None cascades every prompt.
+
+    """
+
+    models: dict[str, str] = field(default_factory=dict)
+    escalate_on_tools: bool = True
+    max_prompt_tokens: int | None = None
+
+    def fast_model(
+        self, model: str, messages: Messages, prompt: Messages
+    ) -> str | None:
+        """The fast model to send this round to, or None if it goes to the large model.
+
+        Args:
+            model (str): The large model requested for the conversation.
+            messages (Messages): The conversation history.
+            prompt (Messages): The (possibly compacted) messages that will be sent to the LLM.
+
+        Returns:
+            str | None: The fast model, or None to use `model`.
+
+        """
+        if (fast := self.models.get(model)) is None or not messages:
+            return None
+
+        if messages[-1]["role"] == "tool" and self.escalate_on_tools:
+            return None
+
+        if (
+            self.max_prompt_tokens is not None
+            and estimate_tokens(prompt) > self.max_prompt_tokens
+        ):
+            return None
+
+        return fast
@@ -0,0 +1,151 @@
+"""`agent.compaction` bounds the size of the prompt sent to the LLM.
+
+Conversations resend their whole history every turn, and each tool call adds a message with
+a page of search results. Before each chat round, `compact` builds a smaller copy of the history:
+    - Tool outputs older than `max_tool_age` user turns are shrunk to their first characters.
+    - If a `token_budget` is set, the oldest turns are dropped until the history fits in it.
+
+System messages, in their place, and the current turn (everything since the last user message) are always kept.
+The caller's messages are never modified. Tokens are estimated from characters (about 4 per token),
+which is enough to bound the prompt without depending on a tokenizer.
+"""
+
+from dataclasses import dataclass
+
+from rag.types import (
+    AssistantMessage,
+    Messages,
+    SystemMessage,
+    ToolMessage,
+    UserMessage,
+)
+
+__all__ = ["Compaction", "compact", "estimate_tokens"]
+
+CHARACTERS_PER_TOKEN = 4
+
+# Role, separators and other framing that each message adds to the prompt
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+@dataclass
+class Compaction:
+    """Compaction policy of the conversation history.
+
+    Attributes:
+        max_tool_age (int, optional): Shrink tool outputs that are more than this many user turns old; None keeps them whole.
+        tool_output_characters (int): Characters kept from the beginning of a shrunk tool output.
+        token_budget (int, optional): Drop the oldest turns until the estimated prompt tokens fit; None keeps every turn.
+
+    """
+
+    max_tool_age: int | None = 1
+    tool_output_characters: int = 500
+    token_budget: int | None = None
+
+
+def _characters(
+    message: SystemMessage | AssistantMessage | ToolMessage | UserMessage,
+) -> int:
+    characters = len(message.get("content") or "")
+
+    if message["role"] == "assistant":
+        for tool in message.get("tool_calls") or []:
+            characters += len(tool["function"]["name"]) + len(
+                tool["function"]["arguments"]
+            )
+
+    return characters
+
+
+def _tokens(characters: int, count: int) -> int:
+    return characters // CHARACTERS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS * count
+
+
+def estimate_tokens(messages: Messages) -> int:
+    """Estimate the prompt tokens of the messages from their characters."""
+    return _tokens(sum(map(_characters, messages)), len(messages))
+
+
+def _shrink_tool_outputs(messages: Messages, compaction: Compaction) -> Messages:
+    if compaction.max_tool_age is None:
+        return list(messages)
+
+    shrunk: Messages = []
+    age = 0
+
+    # Walk backwards so that the age (user turns since the message) is known
+    for message in reversed(messages):
+        if message["role"] == "user":
+            age += 1
+        elif (
+            message["role"] == "tool"
+            and age > compaction.max_tool_age
+            and len(message["content"]) > compaction.tool_output_characters
+        ):
+            content = message["content"]
+            omitted = len(content) - compaction.tool_output_characters
+            shrunk.append(
+                {
+                    "role": "tool",
+                    "tool_call_id": message["tool_call_id"],
+                    "content": f"{content[: compaction.tool_output_characters]}\n[{omitted} characters omitted]",
+                }
+            )
+            continue
+
+        shrunk.append(message)
+
+    shrunk.reverse()
+    return shrunk
+
+
+def _fit_budget(messages: Messages, token_budget: int) -> Messages:
+    # System messages are always kept, where they are; The others are dropped oldest first
+    history = [i for i, message in enumerate(messages) if message["role"] != "system"]
+
+    last_user = max(
+        (n for n, i in enumerate(history) if messages[i]["role"] == "user"),
+        default=0,
+    )
+
+    # Running totals, so that each dropped message costs O(1) instead of a new estimate
+    sizes = [_characters(message) for message in messages]
+    characters = sum(sizes)
+    count = len(messages)
+
+    def drop(n: int) -> None:
+        nonlocal characters, count
+        characters -= sizes[history[n]]
+        count -= 1
+
+    start = 0
+    while start < last_user and _tokens(characters, count) > token_budget:
+        drop(start)
+        start += 1
+        # Never start with tool outputs whose assistant message was dropped
+        while start < last_user and messages[history[start]]["role"] == "tool":
+            drop(start)
+            start += 1
+
+    dropped = set(history[:start])
+    return [message for i, message in enumerate(messages) if i not in dropped]
+
+
+def compact(messages: Messages, compaction: Compaction) -> tuple[Messages, int]:
+    """Build a compacted copy of the messages to send to the LLM.
+
+    Args:
+        messages (Messages): The conversation history; It is not modified.
+        compaction (Compaction): The compaction policy.
+
+    Returns:
+        tuple[Messages, int]: The compacted messages and the estimated number of tokens saved.
+
+    """
+    compacted = _shrink_tool_outputs(messages, compaction)
+
+    if compaction.token_budget is not None:
+        compacted = _fit_budget(compacted, compaction.token_budget)
+
+    return compacted, estimate_tokens(messages) - estimate_tokens(compacted)
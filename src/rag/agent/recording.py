@@ -0,0 +1,419 @@
+"""`agent.recording` records production traffic and replays it offline.
+
+A `Recorder` wraps the components of an `Agent`. While `Agent.generate` runs, the wrappers capture
+the request's messages, the LLM stream parts with their timings, the embeddings and the search results.
+Each request becomes one JSON line in a gzip file; Embeddings are stored as base64-encoded float32.
+
+The `Replay*` components serve a recording back through a real `Agent`, optionally sleeping for the
+original (or scaled) upstream timings, so performance regressions can be measured on a realistic
+workload without network access.
+
+Tools run concurrently, so their embedding and search calls are recorded in completion order. Each call
+is therefore recorded with its method and the id of the tool call it was made for (see `tool_call`), and
+replayed to the same tool call, in the order of that tool call's own calls, whatever the timing.
+"""
+
+import asyncio
+import base64
+import copy
+import gzip
+import json
+import threading
+import time
+from array import array
+from collections import defaultdict, deque
+from collections.abc import AsyncGenerator, AsyncIterator, Awaitable, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from rag.types import (
+    Chat,
+    Embed,
+    Messages,
+    Search,
+    SearchRequest,
+    SearchResult,
+    Stream,
+    StreamPart,
+)
+
+__all__ = [
+    "Recorder",
+    "Recording",
+    "ReplayChat",
+    "ReplayEmbed",
+    "ReplayMismatchError",
+    "ReplaySearch",
+    "read_recordings",
+    "tool_call",
+]
+
+
+@dataclass
+class Recording:
+    """Everything a single `Agent.generate` call exchanged with its components.
+
+    Attributes:
+        model (str): The model of the agent.
+        messages (Messages): The messages as they were sent to the agent.
+        rounds (list): The LLM stream of each chat round, as `[seconds since round start, StreamPart]` pairs.
+        embeddings (list): Each embedding call, as `{"method": name, "tool_call_id": id, "latency": seconds,
+            "vector": base64 float32}` (or `"vectors"` for batch calls).
+        searches (list): Each search call, as `{"method": name, "tool_call_id": id, "latency": seconds,
+            "results": list[SearchResult]}`.
+
+    """
+
+    model: str
+    messages: Messages
+    rounds: list[list[tuple[float, StreamPart]]] = field(default_factory=list)
+    embeddings: list[dict[str, Any]] = field(default_factory=list)
+    searches: list[dict[str, Any]] = field(default_factory=list)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Serialize the recording."""
+        return {
+            "model": self.model,
+            "messages": self.messages,
+            "rounds": self.rounds,
+            "embeddings": self.embeddings,
+            "searches": self.searches,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Recording":
+        """Deserialize a recording."""
+        return cls(**data)
+
+
+def encode_vector(vector: list[float]) -> str:
+    """Encode a vector compactly as base64 float32."""
+    return base64.b64encode(array("f", vector).tobytes()).decode()
+
+
+def decode_vector(encoded: str) -> list[float]:
+    """Decode a vector encoded with `encode_vector`."""
+    return array("f", base64.b64decode(encoded)).tolist()
+
+
+def read_recordings(path: Path) -> Iterator[Recording]:
+    """Read the recordings of a file written by a `Recorder`."""
+    with gzip.open(path, "rt") as file:
+        for line in file:
+            yield Recording.from_dict(json.loads(line))
+
+
+_recording: ContextVar[Recording | None] = ContextVar("rag_recording", default=None)
+
+_tool_call_id: ContextVar[str | None] = ContextVar("rag_tool_call_id", default=None)
+
+
+@contextmanager
+def tool_call(tool_call_id: str) -> Iterator[None]:
+    """Attribute the component calls of tasks created inside the block to a tool call."""
+    token = _tool_call_id.set(tool_call_id)
+    try:
+        yield
+    finally:
+        _tool_call_id.reset(token)
+
+
+class ReplayMismatchError(LookupError):
+    """The agent made a call that its recording does not have."""
+
+
+class _Calls:
+    """Recorded calls, queued per tool call in the order that tool call made them."""
+
+    def __init__(self, calls: list[dict[str, Any]], kind: str) -> None:
+        self.kind = kind
+        self.queues: defaultdict[str | None, deque[dict[str, Any]]] = defaultdict(deque)
+        for call in calls:
+            self.queues[call.get("tool_call_id")].append(call)
+
+    def next(self, method: str) -> dict[str, Any]:
+        tool_call_id = _tool_call_id.get()
+        if not (queue := self.queues[tool_call_id]):
+            raise ReplayMismatchError(
+                f"The recording has no more {self.kind} for tool call {tool_call_id}"
+            )
+
+        call = queue.popleft()
+        if (recorded := call.get("method", method)) != method:
+            raise ReplayMismatchError(
+                f"Tool call {tool_call_id} called {method}, but the recording has {recorded}"
+            )
+        return call
+
+
+class Recorder:
+    """Capture `Agent.generate` calls to a gzip-compressed JSONL file."""
+
+    def __init__(self, path: Path) -> None:
+        """Initialize a Recorder appending to `path`, creating parent directories as needed."""
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+
+    @asynccontextmanager
+    async def record(self, model: str, messages: Messages) -> AsyncIterator[Recording]:
+        """Capture component calls made inside the block and append them to the file on exit.
+
+        The recording is compressed and written in a thread, off the event loop.
+        """
+        recording = Recording(model=model, messages=copy.deepcopy(messages))
+
+        previous = _recording.get()
+        _recording.set(recording)
+        try:
+            yield recording
+        finally:
+            _recording.set(previous)
+
+            await asyncio.to_thread(self._write, recording)
+
+    def _write(self, recording: Recording) -> None:
+        line = json.dumps(recording.to_dict()) + "\n"
+
+        # Concurrent requests write from several threads
+        with self.lock, gzip.open(self.path, "at") as file:
+            file.write(line)
+
+    def wrap_chat(self, chat: Chat) -> "RecordingChat":
+        """Wrap a chat component so that its streams are recorded."""
+        return RecordingChat(chat)
+
+    def wrap_embed(self, embed: Embed) -> "RecordingEmbed":
+        """Wrap an embed component so that its embeddings are recorded."""
+        return RecordingEmbed(embed)
+
+    def wrap_search(self, search: Search) -> "RecordingSearch":
+        """Wrap a search component so that its results are recorded."""
+        return RecordingSearch(search)
+
+
+class RecordingChat:
+    """Chat component wrapper that records stream parts with their timings."""
+
+    def __init__(self, chat: Chat) -> None:
+        """Wrap `chat`."""
+        self.chat = chat
+
+    async def generate_stream(
+        self, messages: Messages, model: str, **kwargs: Any
+    ) -> Stream:
+        """Generate a stream with the wrapped component and record its parts."""
+        parts: list[tuple[float, StreamPart]] = []
+        if (recording := _recording.get()) is not None:
+            recording.rounds.append(parts)
+
+        start = time.perf_counter()
+        async for part in self.chat.generate_stream(messages, model, **kwargs):
+            parts.append((round(time.perf_counter() - start, 6), part))
+            yield part
+
+
+class RecordingEmbed:
+    """Embed component wrapper that records embeddings and their latency."""
+
+    def __init__(self, embed: Embed) -> None:
+        """Wrap `embed`."""
+        self.embed = embed
+
+    async def generate_embedding(self, text: str, **kwargs: Any) -> list[float]:
+        """Generate an embedding with the wrapped component and record it."""
+        start = time.perf_counter()
+        embedding = await self.embed.generate_embedding(text, **kwargs)
+
+        if (recording := _recording.get()) is not None:
+            recording.embeddings.append(
+                {
+                    "method": "generate_embedding",
+                    "tool_call_id": _tool_call_id.get(),
+                    "latency": round(time.perf_counter() - start, 6),
+                    "vector": encode_vector(embedding),
+                }
+            )
+
+        return embedding
+
+    async def generate_embeddings(
+        self, texts: list[str], **kwargs: Any
+    ) -> list[list[float]]:
+        """Generate embeddings with the wrapped component and record them."""
+        start = time.perf_counter()
+        embeddings = await self.embed.generate_embeddings(texts, **kwargs)
+
+        if (recording := _recording.get()) is not None:
+            recording.embeddings.append(
+                {
+                    "method": "generate_embeddings",
+                    "tool_call_id": _tool_call_id.get(),
+                    "latency": round(time.perf_counter() - start, 6),
+                    "vectors": [encode_vector(embedding) for embedding in embeddings],
+                }
+            )
+
+        return embeddings
+
+
+class RecordingSearch:
+    """Search component wrapper that records search results and their latency."""
+
+    def __init__(self, search: Search) -> None:
+        """Wrap `search`."""
+        self.search = search
+
+    async def _record[T](self, method: str, results: Awaitable[T]) -> T:
+        start = time.perf_counter()
+        searched = await results
+
+        if (recording := _recording.get()) is not None:
+            recording.searches.append(
+                {
+                    "method": method,
+                    "tool_call_id": _tool_call_id.get(),
+                    "latency": round(time.perf_counter() - start, 6),
+                    "results": searched,
+                }
+            )
+
+        return searched
+
+    async def hybrid_search(
+        self, query: list[float], keywords: list[str], limit: int = 25
+    ) -> list[SearchResult]:
+        """Perform a hybrid search with the wrapped component and record it."""
+        return await self._record(
+            "hybrid_search", self.search.hybrid_search(query, keywords, limit)
+        )
+
+    async def semantic_search(
+        self, query: list[float], limit: int = 25
+    ) -> list[SearchResult]:
+        """Perform a semantic search with the wrapped component and record it."""
+        return await self._record(
+            "semantic_search", self.search.semantic_search(query, limit)
+        )
+
+    async def keyword_search(
+        self, keywords: list[str], limit: int = 25
+    ) -> list[SearchResult]:
+        """Perform a keyword search with the wrapped component and record it."""
+        return await self._record(
+            "keyword_search", self.search.keyword_search(keywords, limit)
+        )
+
+    async def batch_search(
+        self, searches: list[SearchRequest]
+    ) -> list[list[SearchResult]]:
+        """Perform a batch of searches with the wrapped component and record it."""
+        return await self._record("batch_search", self.search.batch_search(searches))
+
+
+class ReplayChat:
+    """Chat component that replays the recorded rounds of a recording in order."""
+
+    def __init__(self, recording: Recording, time_scale: float = 1.0) -> None:
+        """Initialize a ReplayChat.
+
+        Args:
+            recording (Recording): The recording to replay.
+            time_scale (float, optional): Multiplier of the recorded timings; 0 replays without waiting. Defaults to 1.0.
+
+        """
+        self.rounds = iter(recording.rounds)
+        self.time_scale = time_scale
+
+    async def generate_stream(
+        self, messages: Messages, model: str, **kwargs: Any
+    ) -> AsyncGenerator[StreamPart]:
+        """Yield the parts of the next recorded round at their recorded times."""
+        if (parts := next(self.rounds, None)) is None:
+            raise ReplayMismatchError("The recording has no more chat rounds")
+
+        elapsed = 0.0
+        for offset, part in parts:
+            if self.time_scale:
+                await asyncio.sleep((offset - elapsed) * self.time_scale)
+                elapsed = offset
+            yield part
+
+
+class ReplayEmbed:
+    """Embed component that replays the recorded embeddings of each tool call in order.
+
+    Raises:
+        ReplayMismatchError: If a tool call makes more embedding calls than recorded,
+            or calls another method than recorded.
+
+    """
+
+    def __init__(self, recording: Recording, time_scale: float = 1.0) -> None:
+        """Initialize a ReplayEmbed; See `ReplayChat` for the arguments."""
+        self.embeddings = _Calls(recording.embeddings, "embeddings")
+        self.time_scale = time_scale
+
+    async def generate_embedding(self, text: str, **kwargs: Any) -> list[float]:
+        """Return the next recorded embedding after its recorded latency."""
+        embedding = await self._next("generate_embedding")
+        return decode_vector(embedding["vector"])
+
+    async def generate_embeddings(
+        self, texts: list[str], **kwargs: Any
+    ) -> list[list[float]]:
+        """Return the next recorded batch of embeddings after its recorded latency."""
+        embedding = await self._next("generate_embeddings")
+        return [decode_vector(vector) for vector in embedding["vectors"]]
+
+    async def _next(self, method: str) -> dict[str, Any]:
+        embedding = self.embeddings.next(method)
+        await asyncio.sleep(embedding["latency"] * self.time_scale)
+        return embedding
+
+
+class ReplaySearch:
+    """Search component that replays the recorded search results of each tool call in order.
+
+    Raises:
+        ReplayMismatchError: If a tool call makes more search calls than recorded,
+            or calls another method than recorded.
+
+    """
+
+    def __init__(self, recording: Recording, time_scale: float = 1.0) -> None:
+        """Initialize a ReplaySearch; See `ReplayChat` for the arguments."""
+        self.searches = _Calls(recording.searches, "search results")
+        self.time_scale = time_scale
+
+    async def _next(self, method: str) -> list[Any]:
+        search = self.searches.next(method)
+        await asyncio.sleep(search["latency"] * self.time_scale)
+        return search["results"]
+
+    async def hybrid_search(
+        self, query: list[float], keywords: list[str], limit: int = 25
+    ) -> list[SearchResult]:
+        """Return the next recorded hybrid search results."""
+        return await self._next("hybrid_search")
+
+    async def semantic_search(
+        self, query: list[float], limit: int = 25
+    ) -> list[SearchResult]:
+        """Return the next recorded semantic search results."""
+        return await self._next("semantic_search")
+
+    async def keyword_search(
+        self, keywords: list[str], limit: int = 25
+    ) -> list[SearchResult]:
+        """Return the next recorded keyword search results."""
+        return await self._next("keyword_search")
+
+    async def batch_search(
+        self, searches: list[SearchRequest]
+    ) -> list[list[SearchResult]]:
+        """Return the next recorded batch of search results."""
+        return await self._next("batch_search")
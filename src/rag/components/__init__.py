@@ -4,4 +4,7 @@ Component groups:
     chat: The chat component group contains components that can generate chat completions.
     embed: The embed component group contains components that can generate embeddings.
     search: The search component group contains components that can perform searches on an external knowledge base (VectorDB).
+
+Modules:
+    replicas: Latency-aware routing, failover and hedging across equivalent upstream replicas.
 """
@@ -4,14 +4,86 @@ This component uses the OpenAI API to generate chat completions.
 It uses the AsyncOpenAI client to interact with the OpenAI API.
 It exposes the following methods:
     - `generate_stream`: Generates a stream of chat completions.
+
+Tool calls are yielded as soon as each one is complete, while the rest of the stream is still
+being generated, so that callers can start executing them early. A tool call is complete once
+its arguments parse as a JSON object, or once the next tool call starts.
+
+With several base URLs (equivalent LiteLLM instances or deployments), each completion is routed to
+the endpoint with the best recent time to first token for its model, failed endpoints are taken out
+of rotation, and with `hedge_after` a completion whose first chunk has not arrived in time is also
+sent to a second endpoint; The loser is cancelled (see `components.replicas`). Once a stream has
+started, it is never moved to another endpoint.
 """
 
+import json
+from collections.abc import AsyncIterator
 from typing import Any
 
-from openai import AsyncOpenAI
+from openai import APIStatusError, AsyncOpenAI, AsyncStream
+from openai.types.chat import ChatCompletionChunk
 
+from rag import telemetry
+from rag.components.replicas import ReplicaPool
 from rag.types import Messages, Stream, Tool
 
+type Opened = tuple[AsyncStream[ChatCompletionChunk], ChatCompletionChunk | None]
+
+TOO_MANY_REQUESTS = 429
+
+
+def _complete_arguments(arguments: str) -> bool:
+    """Whether streamed tool call arguments already form a complete JSON object."""
+    # Only attempt to parse when the object may be closed, not on each fragment
+    if not arguments.rstrip().endswith("}"):
+        return False
+
+    try:
+        json.loads(arguments)
+    except ValueError:
+        return False
+
+    return True
+
+
+def _endpoint_failure(error: Exception) -> bool:
+    """Whether the error comes from the endpoint itself, rather than from the request (4xx besides 429)."""
+    return not (
+        isinstance(error, APIStatusError)
+        and error.status_code < 500  # noqa: PLR2004
+        and error.status_code != TOO_MANY_REQUESTS
+    )
+
+
+async def _open(
+    openai: AsyncOpenAI, model: str, messages: Messages, kwargs: dict[str, Any]
+) -> Opened:
+    """Start a completion stream and wait for its first chunk."""
+    response: AsyncStream[ChatCompletionChunk] = await openai.chat.completions.create(  # type: ignore[assignment]
+        model=model,
+        messages=messages,  # type: ignore[arg-type]
+        stream=True,
+        **kwargs,
+    )
+
+    try:
+        first = await anext(aiter(response), None)
+    except BaseException:
+        await response.close()
+        raise
+
+    return response, first
+
+
+async def _chunks(opened: Opened) -> AsyncIterator[ChatCompletionChunk]:
+    response, first = opened
+    if first is None:
+        return
+
+    yield first
+    async for chunk in response:
+        yield chunk
+
 
 class OpenAIChat:
     """OpenAIChat is an chat component that uses the OpenAI API to generate chat completions."""
@@ -19,18 +91,52 @@ class OpenAIChat:
     def __init__(
         self,
         api_key: str,
-        base_url: str | None = None,
+        base_url: str | list[str] | None = None,
+        model_urls: dict[str, list[str]] | None = None,
+        hedge_after: float | None = None,
+        endpoint_cooldown: float = 5.0,
         _openai_client_class: type[AsyncOpenAI] = AsyncOpenAI,
     ) -> None:
         """Initialize an OpenAIChat instance.
 
         Args:
             api_key (str): The API key to use for authentication.
-            base_url (str, optional): The base URL of the OpenAI API. Defaults to None.
+            base_url (str | list[str], optional): The base URL of the OpenAI API, or the URLs of equivalent endpoints. Defaults to None.
+            model_urls (dict[str, list[str]], optional): The endpoints of specific models, instead of `base_url`. Defaults to None.
+            hedge_after (float, optional): Also send a completion to a second endpoint if no chunk arrives in this many seconds. Defaults to None.
+            endpoint_cooldown (float, optional): Seconds a failed endpoint stays out of rotation. Defaults to 5.0.
             _openai_client_class (AsyncOpenAI, optional): The OpenAI client class to use. Defaults to AsyncOpenAI.
 
         """
-        self.openai = _openai_client_class(api_key=api_key, base_url=base_url)
+        self.api_key = api_key
+        self.base_urls = base_url if isinstance(base_url, list) else [base_url]
+        self.model_urls = model_urls or {}
+        self.hedge_after = hedge_after
+        self.endpoint_cooldown = endpoint_cooldown
+        self.openai_client_class = _openai_client_class
+        self.clients: dict[str | None, AsyncOpenAI] = {}
+        self.endpoints: dict[str, ReplicaPool[AsyncOpenAI]] = {}
+        self.openai = self._client(self.base_urls[0])
+
+    def _client(self, url: str | None) -> AsyncOpenAI:
+        """The client of an endpoint, shared by the models it serves."""
+        if url not in self.clients:
+            self.clients[url] = self.openai_client_class(
+                api_key=self.api_key, base_url=url
+            )
+        return self.clients[url]
+
+    def _endpoints(self, model: str) -> ReplicaPool[AsyncOpenAI]:
+        """The endpoints of a model; Their latencies are tracked per model."""
+        if model not in self.endpoints:
+            urls = self.model_urls.get(model, self.base_urls)
+            self.endpoints[model] = ReplicaPool(
+                {str(url): self._client(url) for url in urls},
+                is_failure=_endpoint_failure,
+                cooldown=self.endpoint_cooldown,
+                hedge_after=self.hedge_after,
+            )
+        return self.endpoints[model]
 
     async def generate_stream(
         self,
@@ -49,37 +155,62 @@ class OpenAIChat:
             AsyncGenerator[StreamPart, None]: An asynchronous generator that yields the chat completions in chunks.
 
         """
-        response = await self.openai.chat.completions.create(
-            model=model,
-            messages=messages,  # type: ignore[arg-type]
-            stream=True,
-            **kwargs,
-        )
-
-        tool_buffer_index: dict[int, Tool] = {}
-
-        async for chunk in response:  # type: ignore[union-attr]
-            delta = chunk.choices[0].delta
-            if content := delta.content:
-                yield {"content": content, "tools": None}
-
-            if tool_calls := delta.tool_calls:
-                for call in tool_calls:
-                    idx = call.index
-                    if idx not in tool_buffer_index:
-                        tool_buffer_index[idx] = {
-                            "id": "",
-                            "type": "function",
-                            "function": {"name": "", "arguments": ""},
+        timer = telemetry.stream_timer(model)
+
+        try:
+            opened = await self._endpoints(model).run(
+                lambda openai: _open(openai, model, messages, kwargs),
+                discard=lambda opened: opened[0].close(),
+            )
+
+            tool_buffer_index: dict[int, Tool] = {}
+            dispatched: set[int] = set()
+
+            async for chunk in _chunks(opened):
+                delta = chunk.choices[0].delta
+                if content := delta.content:
+                    timer.tick(token=True)
+                    yield {"content": content, "tools": None}
+
+                if tool_calls := delta.tool_calls:
+                    timer.tick()
+                    for call in tool_calls:
+                        idx = call.index
+                        if idx not in tool_buffer_index:
+                            tool_buffer_index[idx] = {
+                                "id": "",
+                                "type": "function",
+                                "function": {"name": "", "arguments": ""},
+                            }
+                        if call_id := call.id:
+                            tool_buffer_index[idx]["id"] = call_id
+                        if function := call.function:
+                            if name := function.name:
+                                tool_buffer_index[idx]["function"]["name"] = name
+                            if arguments := function.arguments:
+                                tool_buffer_index[idx]["function"]["arguments"] += (
+                                    arguments
+                                )
+
+                    last = max(tool_buffer_index)
+                    if ready := [
+                        idx
+                        for idx, tool in tool_buffer_index.items()
+                        if idx not in dispatched
+                        and (
+                            idx < last
+                            or _complete_arguments(tool["function"]["arguments"])
+                        )
+                    ]:
+                        dispatched.update(ready)
+                        yield {
+                            "content": None,
+                            "tools": [tool_buffer_index[idx] for idx in ready],
                         }
-                    if call_id := call.id:
-                        tool_buffer_index[idx]["id"] = call_id
-                    if function := call.function:
-                        if name := function.name:
-                            tool_buffer_index[idx]["function"]["name"] = name
-                        if arguments := function.arguments:
-                            tool_buffer_index[idx]["function"]["arguments"] += arguments
-
-        if tool_buffer_index:
-            tool_buffers = list(tool_buffer_index.values())
-            yield {"content": None, "tools": tool_buffers}
+        finally:
+            timer.close()
+
+        if remaining := [
+            tool for idx, tool in tool_buffer_index.items() if idx not in dispatched
+        ]:
+            yield {"content": None, "tools": remaining}
@@ -4,8 +4,12 @@ This component group contains components that can run inference on LLM models.
 
 Components:
     OpenAIEmbed: Run inference on OpenAI's models (ADA-family) or with compatible APIs.
+    FastEmbedEmbed: Run FastEmbed models locally on the CPU.
+    BatchingEmbed: Coalesce concurrent embedding requests into batches for another component.
 """
 
+from .batching_embed import BatchingEmbed
+from .fastembed_embed import FastEmbedEmbed
 from .openai_embed import OpenAIEmbed
 
-__all__ = ["OpenAIEmbed"]
+__all__ = ["BatchingEmbed", "FastEmbedEmbed", "OpenAIEmbed"]
@@ -0,0 +1,109 @@
+"""`embed.batching_embed` defines the BatchingEmbed component.
+
+This component wraps another embed component.
+Concurrent calls to `generate_embedding` are queued for a short time and sent
+together with a single `generate_embeddings` call, so many conversations
+running at once share one embeddings request instead of paying for one each.
+It exposes the following methods:
+    - `generate_embedding`: Generates an embedding for a given text, as part of a batch.
+    - `generate_embeddings`: Generates the embeddings of many texts, as their own batch.
+"""
+
+import asyncio
+from typing import Any
+
+from rag.types import Embed
+
+
+class BatchingEmbed:
+    """BatchingEmbed is an embed component that batches concurrent requests to another component."""
+
+    def __init__(
+        self,
+        embed: Embed,
+        max_batch_size: int = 64,
+        max_wait: float = 0.005,
+    ) -> None:
+        """Initialize a BatchingEmbed instance.
+
+        Args:
+            embed (Embed): The component that generates the embeddings of each batch.
+            max_batch_size (int, optional): Send a batch as soon as it has this many texts. Defaults to 64.
+            max_wait (float, optional): Seconds a text waits for others to join its batch. Defaults to 0.005.
+
+        """
+        self.embed = embed
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        self._pending: list[tuple[str, asyncio.Future[list[float]]]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def generate_embedding(self, text: str, **kwargs: Any) -> list[float]:
+        """Generate an embedding for a given text, batched with concurrent calls.
+
+        Args:
+            text (str): The text to generate the embedding for.
+            **kwargs: Additional keyword arguments; Calls with keyword arguments are sent on their own.
+
+        Returns:
+            list[float]: The embedding vector.
+
+        """
+        if kwargs:
+            return (await self.embed.generate_embeddings([text], **kwargs))[0]
+
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[list[float]] = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    async def generate_embeddings(
+        self, texts: list[str], **kwargs: Any
+    ) -> list[list[float]]:
+        """Generate the embeddings of many texts with a single request to the wrapped component.
+
+        Args:
+            texts (list[str]): The texts to generate the embeddings for.
+            **kwargs: Additional keyword arguments to pass to the wrapped component.
+
+        Returns:
+            list[list[float]]: The embedding vectors, in the order of `texts`.
+
+        """
+        return await self.embed.generate_embeddings(texts, **kwargs)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+
+        task = asyncio.create_task(self._embed_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _embed_batch(
+        self, batch: list[tuple[str, asyncio.Future[list[float]]]]
+    ) -> None:
+        try:
+            embeddings = await self.embed.generate_embeddings(
+                [text for text, _ in batch]
+            )
+        except Exception as err:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(err)
+            return
+
+        for (_, future), embedding in zip(batch, embeddings, strict=True):
+            if not future.done():
+                future.set_result(embedding)
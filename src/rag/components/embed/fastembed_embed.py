@@ -0,0 +1,133 @@
+"""`embed.fastembed_embed` defines the FastEmbedEmbed component.
+
+This component runs a FastEmbed `TextEmbedding` model on the CPU, so embedding a query does not
+need a round trip to a remote API. Inference is blocking, so it runs in a bounded thread pool
+and the event loop stays free to serve other requests.
+
+FastEmbed is an optional dependency; Install the `local` extra to use this component.
+It exposes the following methods:
+    - `generate_embedding`: Generates an embedding for a given text.
+    - `generate_embeddings`: Generates the embeddings of many texts in batches.
+    - `generate_passage_embeddings`: Generates the embeddings of documents to index.
+"""
+
+import asyncio
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from rag import telemetry
+
+if TYPE_CHECKING:
+    from fastembed import TextEmbedding
+
+__all__ = ["FastEmbedEmbed"]
+
+
+class FastEmbedEmbed:
+    """FastEmbedEmbed is an embed component that runs a FastEmbed model locally."""
+
+    def __init__(
+        self,
+        model: str = "BAAI/bge-small-en-v1.5",
+        model_path: Path | None = None,
+        threads: int | None = None,
+        max_workers: int = 1,
+        batch_size: int = 32,
+        _text_embedding_class: "type[TextEmbedding] | None" = None,
+    ) -> None:
+        """Initialize a FastEmbedEmbed instance.
+
+        Args:
+            model (str, optional): The FastEmbed model name. Defaults to "BAAI/bge-small-en-v1.5".
+            model_path (Path, optional): Load the model files from this directory instead of downloading them. Defaults to None.
+            threads (int, optional): ONNX Runtime threads per inference. Defaults to the runtime's choice.
+            max_workers (int, optional): Inferences run at the same time; Others wait for a free worker. Defaults to 1.
+            batch_size (int, optional): Texts embedded per inference. Defaults to 32.
+            _text_embedding_class (TextEmbedding, optional): The TextEmbedding class to use. Defaults to FastEmbed's.
+
+        Raises:
+            ImportError: If the `local` extra is not installed.
+
+        """
+        if _text_embedding_class is None:
+            try:
+                from fastembed import TextEmbedding  # noqa: PLC0415
+            except ImportError as err:
+                raise ImportError(
+                    "Local embeddings require the `local` extra: `uv sync --extra local`"
+                ) from err
+            _text_embedding_class = TextEmbedding
+
+        options: dict[str, Any] = {"threads": threads}
+        if model_path is not None:
+            options["specific_model_path"] = str(model_path)
+
+        self.model = model
+        self.batch_size = batch_size
+        self.text_embedding = _text_embedding_class(model_name=model, **options)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="fastembed"
+        )
+
+    def _embed(self, texts: list[str], *, passages: bool) -> list[list[float]]:
+        embed = (
+            self.text_embedding.passage_embed
+            if passages
+            else self.text_embedding.query_embed
+        )
+        vectors: Iterable[Any] = embed(texts, batch_size=self.batch_size)
+        return [vector.tolist() for vector in vectors]
+
+    async def _run(self, texts: list[str], *, passages: bool) -> list[list[float]]:
+        loop = asyncio.get_running_loop()
+
+        with telemetry.stage("embed"):
+            return await loop.run_in_executor(
+                self.executor, lambda: self._embed(texts, passages=passages)
+            )
+
+    async def generate_embedding(self, text: str, **kwargs: Any) -> list[float]:
+        """Generate an embedding for a given query.
+
+        Args:
+            text (str): The text to generate the embedding for.
+            **kwargs: Ignored; Accepted for compatibility with the other embed components.
+
+        Returns:
+            list[float]: The embedding vector.
+
+        """
+        embeddings = await self._run([text], passages=False)
+
+        return embeddings[0]
+
+    async def generate_embeddings(
+        self, texts: list[str], **kwargs: Any
+    ) -> list[list[float]]:
+        """Generate the embeddings of many queries, `batch_size` texts per inference.
+
+        Args:
+            texts (list[str]): The texts to generate the embeddings for.
+            **kwargs: Ignored; Accepted for compatibility with the other embed components.
+
+        Returns:
+            list[list[float]]: The embedding vectors, in the order of `texts`.
+
+        """
+        return await self._run(texts, passages=False)
+
+    async def generate_passage_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """Generate the embeddings of documents to index, `batch_size` texts per inference.
+
+        Some models embed queries and documents differently; Use this method when ingesting.
+
+        Args:
+            texts (list[str]): The documents to generate the embeddings for.
+
+        Returns:
+            list[list[float]]: The embedding vectors, in the order of `texts`.
+
+        """
+        return await self._run(texts, passages=True)
@@ -4,12 +4,15 @@ This component uses the OpenAI API to generate embeddings.
 It uses the AsyncOpenAI client to interact with the OpenAI API.
 It exposes the following methods:
     - `generate_embedding`: Generates an embedding for a given text.
+    - `generate_embeddings`: Generates the embeddings of many texts in a single request.
 """
 
 from typing import Any
 
 from openai import AsyncOpenAI
 
+from rag import telemetry
+
 
 class OpenAIEmbed:
     """OpenAIEmbed is an embed component that uses the OpenAI API to generate embeddings."""
@@ -19,6 +22,7 @@ class OpenAIEmbed:
         model: str,
         api_key: str,
         base_url: str | None = None,
+        dimensions: int | None = None,
         _openai_client_class: type[AsyncOpenAI] = AsyncOpenAI,
     ) -> None:
         """Initialize an OpenAIInference instance.
@@ -27,12 +31,19 @@ class OpenAIEmbed:
             model (str): The model to use for embedding generation.
             api_key (str): The API key to use for authentication.
             base_url (str, optional): The base URL of the OpenAI API. Defaults to None.
+            dimensions (int, optional): Request embeddings shortened to these dimensions. Defaults to the model's full size.
             _openai_client_class (AsyncOpenAI, optional): The OpenAI client class to use. Defaults to AsyncOpenAI.
 
         """
         self.model = model
+        self.dimensions = dimensions
         self.openai = _openai_client_class(api_key=api_key, base_url=base_url)
 
+    def _options(self, kwargs: dict[str, Any]) -> dict[str, Any]:
+        if self.dimensions is not None:
+            return {"dimensions": self.dimensions} | kwargs
+        return kwargs
+
     async def generate_embedding(self, text: str, **kwargs: Any) -> list[float]:
         """Generate an embedding for a given text.
 
@@ -44,10 +55,31 @@ class OpenAIEmbed:
             list[float]: The embedding vector.
 
         """
-        response = await self.openai.embeddings.create(
-            input=text, model=self.model, **kwargs
-        )
+        with telemetry.stage("embed"):
+            response = await self.openai.embeddings.create(
+                input=text, model=self.model, **self._options(kwargs)
+            )
 
         embedding = response.data[0].embedding
 
         return embedding
+
+    async def generate_embeddings(
+        self, texts: list[str], **kwargs: Any
+    ) -> list[list[float]]:
+        """Generate the embeddings of many texts in a single request.
+
+        Args:
+            texts (list[str]): The texts to generate the embeddings for.
+            **kwargs: Additional keyword arguments to pass to the OpenAI API.
+
+        Returns:
+            list[list[float]]: The embedding vectors, in the order of `texts`.
+
+        """
+        with telemetry.stage("embed"):
+            response = await self.openai.embeddings.create(
+                input=texts, model=self.model, **self._options(kwargs)
+            )
+
+        return [data.embedding for data in sorted(response.data, key=lambda d: d.index)]
@@ -0,0 +1,217 @@
+"""`components.replicas` routes calls across equivalent upstream replicas.
+
+Components use it to spread their calls over several endpoints of one service, such as the read
+replicas of a Qdrant cluster or several deployments of an LLM. Each call goes to the replica
+expected to answer first. Two healthy replicas are drawn at random (power of two choices) and the
+one with the lowest exponentially weighted moving average (EWMA) of its latency, scaled by its
+calls in flight, is chosen. Replicas without observations yet score
+zero, so every replica is tried early on. Estimates fade with a `half_life` while a replica is not
+chosen, so that one slow call does not keep a replica out of rotation forever.
+
+A replica that fails is taken out of rotation for `cooldown` seconds and the call is retried on
+another one; Components tell replica failures (e.g. network errors) from errors caused by the call
+itself, which are raised right away. With `hedge_after`, a call that has not been answered after
+that many seconds is also sent to a second replica; The first answer wins and the other call is
+cancelled. Its elapsed time still counts towards the EWMA of its replica.
+"""
+
+import asyncio
+import random
+import time
+from collections.abc import Awaitable, Callable, Coroutine
+from dataclasses import dataclass
+from typing import Any
+
+from rag import telemetry
+
+__all__ = ["ReplicaPool"]
+
+
+@dataclass
+class Replica[C]:
+    """A replica with its client and routing statistics."""
+
+    name: str
+    client: C
+    latency: float | None = None
+    observed: float = 0.0
+    in_flight: int = 0
+    down_until: float = 0.0
+
+    def cost(self, now: float, half_life: float) -> float:
+        """The expected wait for a new call: Its faded latency for each call already in flight."""
+        if self.latency is None:
+            return 0.0
+
+        faded = self.latency * 0.5 ** ((now - self.observed) / half_life)
+        return faded * (self.in_flight + 1)
+
+
+class ReplicaPool[C]:
+    """A pool of equivalent clients that routes each call to the fastest healthy replica."""
+
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        clients: dict[str, C],
+        is_failure: Callable[[Exception], bool] | None = None,
+        decay: float = 0.3,
+        half_life: float = 30.0,
+        cooldown: float = 5.0,
+        hedge_after: float | None = None,
+        _random: random.Random | None = None,
+    ) -> None:
+        """Initialize a ReplicaPool.
+
+        Args:
+            clients (dict[str, C]): The client of each replica, by name (e.g. its URL).
+            is_failure (Callable, optional): Whether an error is a failure of the replica, rather than of the call. Defaults to every error.
+            decay (float, optional): Weight of the newest latency in the EWMA. Defaults to 0.3.
+            half_life (float, optional): Seconds for the latency estimate of an unused replica to fade by half. Defaults to 30.0.
+            cooldown (float, optional): Seconds a failed replica stays out of rotation. Defaults to 5.0.
+            hedge_after (float, optional): Also send a call to a second replica if it is not answered in this many seconds. Defaults to None.
+            _random (random.Random, optional): The random generator of the power of two choices. Defaults to a new one.
+
+        """
+        self.replicas = [Replica(name, client) for name, client in clients.items()]
+        self.is_failure = is_failure or (lambda _: True)
+        self.decay = decay
+        self.half_life = half_life
+        self.cooldown = cooldown
+        self.hedge_after = hedge_after
+        self.random = _random or random.Random()  # noqa: S311
+        self._discarding: set[asyncio.Task[None]] = set()
+
+    def _pick(self, tried: list[Replica[C]]) -> Replica[C]:
+        candidates = [replica for replica in self.replicas if replica not in tried]
+        now = time.monotonic()
+
+        # If every replica is down, trying one anyway beats failing outright
+        healthy = [r for r in candidates if r.down_until <= now] or candidates
+
+        if len(healthy) == 1:
+            return healthy[0]
+
+        first, second = self.random.sample(healthy, 2)
+        return min(first, second, key=lambda r: r.cost(now, self.half_life))
+
+    def _observe(self, replica: Replica[C], latency: float) -> None:
+        if replica.latency is None:
+            replica.latency = latency
+        else:
+            replica.latency += self.decay * (latency - replica.latency)
+        replica.observed = time.monotonic()
+
+    async def _attempt[T](
+        self, replica: Replica[C], call: Callable[[C], Awaitable[T]]
+    ) -> T:
+        replica.in_flight += 1
+        start = time.perf_counter()
+
+        try:
+            result = await call(replica.client)
+        except asyncio.CancelledError:
+            # The call lost a hedge: The replica took at least this long
+            self._observe(replica, time.perf_counter() - start)
+            telemetry.record_replica_request(replica.name, "cancelled")
+            raise
+        except Exception as err:
+            if self.is_failure(err):
+                replica.down_until = time.monotonic() + self.cooldown
+                telemetry.record_replica_request(replica.name, "error")
+            raise
+        finally:
+            replica.in_flight -= 1
+
+        self._observe(replica, time.perf_counter() - start)
+        telemetry.record_replica_request(replica.name, "ok")
+
+        return result
+
+    def _discard[T](
+        self,
+        task: asyncio.Task[T],
+        discard: Callable[[T], Coroutine[Any, Any, None]] | None,
+    ) -> None:
+        """Cancel a losing call, and release its answer if it completed anyway."""
+        task.cancel()
+
+        if discard is None:
+            return
+
+        def release(task: asyncio.Task[T]) -> None:
+            if not task.cancelled() and task.exception() is None:
+                releasing = asyncio.create_task(discard(task.result()))
+                self._discarding.add(releasing)
+                releasing.add_done_callback(self._discarding.discard)
+
+        task.add_done_callback(release)
+
+    async def _hedged[T](
+        self,
+        replica: Replica[C],
+        call: Callable[[C], Awaitable[T]],
+        tried: list[Replica[C]],
+        discard: Callable[[T], Coroutine[Any, Any, None]] | None,
+    ) -> T:
+        if self.hedge_after is None or len(tried) == len(self.replicas):
+            return await self._attempt(replica, call)
+
+        tasks = [asyncio.create_task(self._attempt(replica, call))]
+        winner = None
+
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_after)
+            if done:
+                winner = tasks[0]
+                return winner.result()
+
+            hedge = self._pick(tried)
+            tried.append(hedge)
+            telemetry.record_replica_request(hedge.name, "hedged")
+            tasks.append(asyncio.create_task(self._attempt(hedge, call)))
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                        return winner.result()
+
+            return tasks[0].result()
+        finally:
+            for task in tasks:
+                if task is not winner:
+                    self._discard(task, discard)
+
+    async def run[T](
+        self,
+        call: Callable[[C], Awaitable[T]],
+        discard: Callable[[T], Coroutine[Any, Any, None]] | None = None,
+    ) -> T:
+        """Run the call on the best replica, failing over to the others if replicas fail.
+
+        Args:
+            call (Callable): Sends the call with the client it is given.
+            discard (Callable, optional): Releases the answer of a hedged call that completed but lost. Defaults to None.
+
+        Returns:
+            T: The answer of the first replica that succeeds.
+
+        Raises:
+            Exception: The error of the last replica tried, if all of them fail, or any error caused by the call itself.
+
+        """
+        tried: list[Replica[C]] = []
+
+        while True:
+            replica = self._pick(tried)
+            tried.append(replica)
+
+            try:
+                return await self._hedged(replica, call, tried, discard)
+            except Exception as err:
+                if not self.is_failure(err) or len(tried) == len(self.replicas):
+                    raise
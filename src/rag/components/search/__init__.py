@@ -4,8 +4,19 @@ This component group contains components that can perform searches on an externa
 
 Components:
     QdrantSearch: Perform searches on a Qdrant vector database.
+    ShardedSearch: Fan searches out to several shards and fuse their results.
+    fuse_results: Fuse several rankings of search results, by best score or Reciprocal Rank Fusion.
+    Bm25: Encode query keywords into BM25 sparse vectors for QdrantSearch.
 """
 
-from .qdrant_search import QdrantSearch
+from .bm25 import Bm25
+from .qdrant_search import QdrantSearch, truncate_embedding
+from .sharded_search import ShardedSearch, fuse_results
 
-__all__ = ["QdrantSearch"]
+__all__ = [
+    "Bm25",
+    "QdrantSearch",
+    "ShardedSearch",
+    "fuse_results",
+    "truncate_embedding",
+]
@@ -0,0 +1,90 @@
+"""`search.bm25` defines a lightweight BM25 query encoder.
+
+Queries only need their keywords tokenized, stemmed and hashed into sparse indices, all with
+a weight of 1 (Qdrant applies the IDF of each index). `Bm25` reproduces the query embeddings of
+fastembed's "Qdrant/bm25" model without loading fastembed, its model files or its ONNX runtime:
+    - The text is lowercased and split into words on non-word characters.
+    - Punctuation, stopwords and words over `token_max_length` characters are dropped.
+    - The words are stemmed with the Snowball stemmer of the language.
+    - Each unique stem is hashed with 32-bit MurmurHash3 into an index.
+
+Queries often repeat the same keywords, so the encodings are memoized; Hits and misses of the memo
+are counted by `telemetry` as the "bm25" cache.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+
+import mmh3
+from py_rust_stemmers import SnowballStemmer
+
+from rag import telemetry
+
+__all__ = ["Bm25"]
+
+stopwords_dir = Path(__file__).parent / "stopwords"
+
+WORD = re.compile(r"\w+")
+
+
+class Bm25:
+    """Bm25 encodes query texts into sparse BM25 vectors, as fastembed's "Qdrant/bm25" model does."""
+
+    def __init__(
+        self,
+        language: str = "english",
+        token_max_length: int = 40,
+        cache_size: int = 4096,
+    ) -> None:
+        """Initialize a Bm25 instance.
+
+        Args:
+            language (str, optional): The language of the stopwords and stemmer. Defaults to "english".
+            token_max_length (int, optional): Drop words longer than this many characters. Defaults to 40.
+            cache_size (int, optional): The encodings kept in memory; 0 disables the memo. Defaults to 4096.
+
+        """
+        stopwords = stopwords_dir / f"{language}.txt"
+        self.stopwords = (
+            set(stopwords.read_text().splitlines()) if stopwords.exists() else set()
+        )
+        self.stemmer = SnowballStemmer(language)
+        self.token_max_length = token_max_length
+        self.cache_size = cache_size
+        self._encode = lru_cache(maxsize=cache_size)(self._encode_text)
+
+    def _keep(self, token: str) -> bool:
+        # Words are made of word characters, so "_" is the only punctuation that can be one
+        if len(token) == 1 and unicodedata.category(token).startswith("P"):
+            return False
+        return token not in self.stopwords and len(token) <= self.token_max_length
+
+    def _encode_text(self, text: str) -> tuple[tuple[int, ...], tuple[float, ...]]:
+        stems = {
+            stem
+            for token in WORD.findall(text.lower())
+            if self._keep(token) and (stem := self.stemmer.stem_word(token))
+        }
+        indices = tuple(sorted({abs(mmh3.hash(stem)) for stem in stems}))
+        return indices, (1.0,) * len(indices)
+
+    def encode(self, text: str) -> tuple[tuple[int, ...], tuple[float, ...]]:
+        """Encode a query text into the indices and values of its sparse BM25 vector.
+
+        Args:
+            text (str): The query text, e.g. its keywords separated by spaces.
+
+        Returns:
+            tuple[tuple[int, ...], tuple[float, ...]]: The sorted indices and their values.
+
+        """
+        if not self.cache_size:
+            return self._encode(text)
+
+        hits = self._encode.cache_info().hits
+        encoded = self._encode(text)
+        telemetry.record_cache("bm25", hit=self._encode.cache_info().hits > hits)
+
+        return encoded
@@ -1,50 +1,139 @@
 """`search.qdrant_search` defines the QdrantSearch component.
 
 This component performs searches on a Qdrant vector database.
-It uses the QdrantClient to interact with the Qdrant API.
+It uses the QdrantClient to interact with the Qdrant API, or runs Qdrant embedded
+in the process (on disk or in memory) to skip the network entirely.
 This component exposes the following methods:
     - `hybrid_search`: Performs a hybrid search using BM25 and Qdrant's dense index.
     - `semantic_search`: Performs a semantic search using Qdrant's dense index.
     - `keyword_search`: Performs a keyword search using BM25 and Qdrant's sparse index.
+    - `batch_search`: Performs many searches of any kind in a single Qdrant round trip.
+    - `create_collection`: Creates the collection, optionally with quantized dense vectors.
+
+Every search accepts Qdrant `SearchParams` (`hnsw_ef`, `exact`, quantization rescoring and
+oversampling) to trade recall for latency; The instance's `search_params` are used by default.
+
+With `small_dimensions`, the collection also stores a truncated (Matryoshka) copy of each dense vector.
+Dense searches then prefetch candidates on the small vectors and rescore them on the full ones.
+
+Easy lookups need fewer results than hard ones, and each result costs prompt tokens:
+    - `score_threshold` drops results that score below it. For hybrid searches, it applies
+      to the dense candidates only: Fused (RRF) scores come from ranks, not from similarities.
+    - With `adaptive_limit`, semantic and keyword searches first fetch only that many results, and
+      fetch the full `limit` only if their scores are flat (the last one is within `flat_ratio` of
+      the top one), as there is then no clear set of best results. Hybrid searches always fetch
+      their full `limit`, as the flatness of RRF scores says nothing about relevance.
+
+With several `url`s, the component queries equivalent read replicas: Each query is routed to the
+replica with the best recent latency, failed replicas are taken out of rotation, and slow queries
+can be hedged to a second replica (see `components.replicas`).
 """
 
-from fastembed import SparseTextEmbedding
+import math
+from typing import Literal
+
 from qdrant_client import AsyncQdrantClient, models
+from qdrant_client.http.exceptions import UnexpectedResponse
 from qdrant_client.http.models import QueryResponse
 
-from rag.types import SearchResult
+from rag import telemetry
+from rag.components.replicas import ReplicaPool
+from rag.types import SearchRequest, SearchResult
+
+from .bm25 import Bm25
+
+__all__ = ["QdrantSearch", "truncate_embedding"]
+
+
+def truncate_embedding(embedding: list[float], dimensions: int) -> list[float]:
+    """Truncate a Matryoshka embedding to its first `dimensions` and L2-normalize it again."""
+    truncated = embedding[:dimensions]
+    norm = math.sqrt(sum(value * value for value in truncated)) or 1.0
+    return [value / norm for value in truncated]
+
+
+def _replica_failure(error: Exception) -> bool:
+    """Whether the error comes from the replica itself, rather than from the query (4xx)."""
+    return not (
+        isinstance(error, UnexpectedResponse)
+        and error.status_code is not None
+        and error.status_code < 500  # noqa: PLR2004
+    )
 
 
 class QdrantSearch:
     """QdrantSearch is a component that performs searches on a Qdrant vector database."""
 
-    def __init__(
+    def __init__(  # noqa: PLR0913, PLR0917
         self,
         collection: str,
-        url: str,
+        url: str | list[str] | None = None,
         api_key: str | None = None,
+        path: str | None = None,
+        search_params: models.SearchParams | None = None,
+        small_dimensions: int | None = None,
+        small_oversampling: float = 4.0,
+        score_threshold: float | None = None,
+        adaptive_limit: int | None = None,
+        flat_ratio: float = 0.8,
+        hedge_after: float | None = None,
+        replica_cooldown: float = 5.0,
         _dense_index: str = "dense",
         _sparse_index: str = "sparse",
+        _small_index: str = "dense_small",
         _qdrant_client_class: type[AsyncQdrantClient] = AsyncQdrantClient,
-        _sparse_text_embedding_class: type[SparseTextEmbedding] = SparseTextEmbedding,
+        _bm25_class: type[Bm25] = Bm25,
     ) -> None:
         """Initialize a QdrantSearch instance.
 
         Args:
             collection (str): The name of the Qdrant collection to use.
-            url (str): The URL of the Qdrant server.
+            url (str | list[str], optional): The URL of the Qdrant server, the URLs of its read replicas, or ":memory:" for an embedded in-memory database. Defaults to None.
             api_key (str, optional): The API key to use for authentication. Defaults to None.
+            path (str, optional): Run an embedded on-disk database in this directory instead of connecting to `url`. Defaults to None.
+            search_params (models.SearchParams, optional): The default parameters of dense searches. Defaults to None.
+            small_dimensions (int, optional): Prefetch dense candidates on vectors truncated to these dimensions. Defaults to None.
+            small_oversampling (float, optional): Candidates prefetched on the small vectors per result. Defaults to 4.0.
+            score_threshold (float, optional): The default minimum score of the results. Defaults to None.
+            adaptive_limit (int, optional): Fetch this many results first, and the full limit only if their scores are flat. Defaults to None.
+            flat_ratio (float, optional): Scores are flat when the last result scores at least this fraction of the top one. Defaults to 0.8.
+            hedge_after (float, optional): Also send a query to a second replica if it is not answered in this many seconds. Defaults to None.
+            replica_cooldown (float, optional): Seconds a failed replica stays out of rotation. Defaults to 5.0.
             _dense_index (str, optional): The name of the dense index to use. Defaults to "dense".
             _sparse_index (str, optional): The name of the sparse index to use. Defaults to "sparse".
+            _small_index (str, optional): The name of the truncated dense index to use. Defaults to "dense_small".
             _qdrant_client_class (AsyncQdrantClient, optional): The Qdrant client class to use. Defaults to AsyncQdrantClient.
-            _sparse_text_embedding_class (SparseTextEmbedding, optional): The SparseTextEmbedding class to use. Defaults to SparseTextEmbedding.
+            _bm25_class (Bm25, optional): The BM25 query encoder class to use. Defaults to Bm25.
 
         """
         self.collection = collection
-        self.qdrant = _qdrant_client_class(url, api_key=api_key)
-        self.bm25 = _sparse_text_embedding_class(model_name="Qdrant/bm25")
+
+        clients = (
+            {path: _qdrant_client_class(path=path)}
+            if path is not None
+            else {
+                str(u): _qdrant_client_class(u, api_key=api_key)
+                for u in (url if isinstance(url, list) else [url])
+            }
+        )
+        # Collection management goes to the first replica; Queries are routed across all of them
+        self.qdrant = next(iter(clients.values()))
+        self.replicas = ReplicaPool(
+            clients,
+            is_failure=_replica_failure,
+            cooldown=replica_cooldown,
+            hedge_after=hedge_after,
+        )
+        self.bm25 = _bm25_class()
+        self.search_params = search_params
+        self.small_dimensions = small_dimensions
+        self.small_oversampling = small_oversampling
+        self.score_threshold = score_threshold
+        self.adaptive_limit = adaptive_limit
+        self.flat_ratio = flat_ratio
         self.dense_index = _dense_index
         self.sparse_index = _sparse_index
+        self.small_index = _small_index
 
     def _build_result(self, response: QueryResponse) -> list[SearchResult]:
         return [
@@ -53,11 +142,150 @@ class QdrantSearch:
             if point.payload is not None
         ]
 
+    def _sparse_vectors(self, keywords: list[list[str]]) -> list[models.SparseVector]:
+        """Encode each list of keywords as a BM25 sparse vector."""
+        if not keywords:
+            return []
+
+        with telemetry.stage("sparse_encode"):
+            vectors = []
+            for k in keywords:
+                indices, values = self.bm25.encode(" ".join(k))
+                vectors.append(
+                    models.SparseVector(indices=list(indices), values=list(values))
+                )
+            return vectors
+
+    def _small_prefetch(
+        self, query: list[float], limit: int, params: models.SearchParams | None
+    ) -> list[models.Prefetch] | None:
+        """Prefetch dense candidates on the small vectors, if the collection has them."""
+        if self.small_dimensions is None:
+            return None
+
+        return [
+            models.Prefetch(
+                query=truncate_embedding(query, self.small_dimensions),
+                using=self.small_index,
+                limit=math.ceil(limit * self.small_oversampling),
+                params=params or self.search_params,
+            )
+        ]
+
+    def _hybrid_request(
+        self,
+        query: list[float],
+        sparse: models.SparseVector,
+        limit: int,
+        params: models.SearchParams | None,
+        score_threshold: float | None,
+    ) -> models.QueryRequest:
+        return models.QueryRequest(
+            prefetch=[
+                models.Prefetch(
+                    prefetch=self._small_prefetch(query, limit, params),
+                    query=query,
+                    using=self.dense_index,
+                    limit=limit,
+                    params=params or self.search_params,
+                    score_threshold=self._threshold(score_threshold),
+                ),
+                models.Prefetch(query=sparse, using=self.sparse_index, limit=limit),
+            ],
+            query=models.FusionQuery(fusion=models.Fusion.RRF),
+            limit=limit,
+            with_payload=True,
+        )
+
+    def _semantic_request(
+        self,
+        query: list[float],
+        limit: int,
+        params: models.SearchParams | None,
+        score_threshold: float | None,
+    ) -> models.QueryRequest:
+        return models.QueryRequest(
+            prefetch=self._small_prefetch(query, limit, params),
+            query=query,
+            limit=limit,
+            using=self.dense_index,
+            params=params or self.search_params,
+            score_threshold=self._threshold(score_threshold),
+            with_payload=True,
+        )
+
+    def _keyword_request(
+        self,
+        sparse: models.SparseVector,
+        limit: int,
+        params: models.SearchParams | None,
+        score_threshold: float | None,
+    ) -> models.QueryRequest:
+        return models.QueryRequest(
+            query=sparse,
+            limit=limit,
+            using=self.sparse_index,
+            params=params,
+            score_threshold=self._threshold(score_threshold),
+            with_payload=True,
+        )
+
+    def _threshold(self, score_threshold: float | None) -> float | None:
+        return score_threshold if score_threshold is not None else self.score_threshold
+
+    def _shallow_limit(self, limit: int) -> int | None:
+        """The number of results to fetch first, if searches are adaptive and it is below `limit`."""
+        if self.adaptive_limit is None or self.adaptive_limit >= limit:
+            return None
+        return self.adaptive_limit
+
+    def _flat(self, results: list[SearchResult], shallow: int) -> bool:
+        """Whether a shallow search found all it could, with no clear best results."""
+        if len(results) < shallow:
+            return False
+
+        top, last = results[0]["score"], results[-1]["score"]
+        return top <= 0 or last / top >= self.flat_ratio
+
+    async def _query(
+        self, request: models.QueryRequest, limit: int
+    ) -> list[SearchResult]:
+        with telemetry.stage("qdrant_query"):
+            response = await self.replicas.run(
+                lambda qdrant: qdrant.query_points(
+                    self.collection,
+                    prefetch=request.prefetch,
+                    query=request.query,
+                    using=request.using,
+                    limit=limit,
+                    score_threshold=request.score_threshold,
+                    search_params=request.params,
+                )
+            )
+
+        return self._build_result(response)
+
+    async def _search(
+        self, request: models.QueryRequest, limit: int
+    ) -> list[SearchResult]:
+        """Query Qdrant, going deeper than `adaptive_limit` only if the first results are flat."""
+        if (shallow := self._shallow_limit(limit)) is None:
+            return await self._query(request, limit)
+
+        results = await self._query(request, shallow)
+
+        if not self._flat(results, shallow):
+            return results
+
+        return await self._query(request, limit)
+
     async def hybrid_search(
         self,
         query: list[float],
         keywords: list[str],
         limit: int = 25,
+        params: models.SearchParams | None = None,
+        score_threshold: float | None = None,
     ) -> list[SearchResult]:
         """Perform a hybrid search using BM25 and Semantic Search.
 
@@ -65,85 +293,225 @@ class QdrantSearch:
             query (list[float]): The query vector to use for the search.
             keywords (list[str]): The keywords to use for the search.
             limit (int, optional): The maximum number of results to return. Defaults to 25.
+            params (models.SearchParams, optional): Overrides the instance's `search_params`. Defaults to None.
+            score_threshold (float, optional): Overrides the instance's `score_threshold`. Defaults to None.
 
         Returns:
             list[SearchResult]: A list of search results, sorted by score.
 
         """
-        text = " ".join(keywords)
-        embedding = next(iter(self.bm25.query_embed(text)))
+        [sparse] = self._sparse_vectors([keywords])
 
-        prefetch = [
-            models.Prefetch(query=query, using=self.dense_index, limit=limit),
-            models.Prefetch(
-                query=models.SparseVector(
-                    indices=embedding.indices.astype(float).tolist(),
-                    values=embedding.values.astype(float).tolist(),
-                ),
-                using=self.sparse_index,
-                limit=limit,
-            ),
-        ]
-
-        response = await self.qdrant.query_points(
-            self.collection,
-            prefetch=prefetch,
-            query=models.FusionQuery(fusion=models.Fusion.RRF),
-            limit=limit,
+        return await self._query(
+            self._hybrid_request(query, sparse, limit, params, score_threshold), limit
         )
 
-        return self._build_result(response)
-
     async def semantic_search(
         self,
         query: list[float],
         limit: int = 25,
+        params: models.SearchParams | None = None,
+        score_threshold: float | None = None,
     ) -> list[SearchResult]:
         """Perform a semantic search using Qdrant's dense index.
 
         Args:
             query (list[float]): The query vector to use for the search.
             limit (int, optional): The maximum number of results to return. Defaults to 25.
+            params (models.SearchParams, optional): Overrides the instance's `search_params`. Defaults to None.
+            score_threshold (float, optional): Overrides the instance's `score_threshold`. Defaults to None.
 
         Returns:
             list[SearchResult]: A list of search results, sorted by score.
 
         """
-        response = await self.qdrant.query_points(
-            self.collection,
-            query=query,
-            limit=limit,
-            using=self.dense_index,
+        return await self._search(
+            self._semantic_request(query, limit, params, score_threshold), limit
         )
 
-        return self._build_result(response)
-
     async def keyword_search(
         self,
         keywords: list[str],
         limit: int = 25,
+        params: models.SearchParams | None = None,
+        score_threshold: float | None = None,
     ) -> list[SearchResult]:
         """Perform a keyword search using BM25 and Qdrant's sparse index.
 
         Args:
             keywords (list[str]): The keywords to use for the search.
             limit (int, optional): The maximum number of results to return. Defaults to 25.
+            params (models.SearchParams, optional): Overrides the instance's `search_params`. Defaults to None.
+            score_threshold (float, optional): Overrides the instance's `score_threshold`. Defaults to None.
 
         Returns:
             list[SearchResult]: A list of search results, sorted by score.
 
         """
-        text = " ".join(keywords)
-        embedding = next(iter(self.bm25.query_embed(text)))
+        [sparse] = self._sparse_vectors([keywords])
 
-        response = await self.qdrant.query_points(
-            self.collection,
-            query=models.SparseVector(
-                indices=embedding.indices.astype(float).tolist(),
-                values=embedding.values.astype(float).tolist(),
-            ),
-            limit=limit,
-            using=self.sparse_index,
+        return await self._search(
+            self._keyword_request(sparse, limit, params, score_threshold), limit
         )
 
-        return self._build_result(response)
+    async def batch_search(
+        self,
+        searches: list[SearchRequest],
+        params: models.SearchParams | None = None,
+    ) -> list[list[SearchResult]]:
+        """Perform many searches with a single call to Qdrant's batch query API.
+
+        The keywords of all hybrid and keyword searches are BM25-encoded together. With `adaptive_limit`,
+        the semantic and keyword searches with flat results are sent again, together, in a second batch
+        with their full limit.
+
+        Args:
+            searches (list[SearchRequest]): The searches to perform; Each one may use a different mode.
+            params (models.SearchParams, optional): Overrides the instance's `search_params`. Defaults to None.
+
+        Returns:
+            list[list[SearchResult]]: The search results of each search, in the order of `searches`.
+
+        Raises:
+            KeyError: If a search is missing the `query` or `keywords` required by its mode.
+
+        """
+        sparse = iter(
+            self._sparse_vectors(
+                [
+                    search["keywords"]
+                    for search in searches
+                    if search["mode"] != "semantic"
+                ]
+            )
+        )
+
+        requests = []
+        shallow_limits = []
+        for search in searches:
+            limit = search.get("limit", 25)
+            score_threshold = search.get("score_threshold")
+
+            match search["mode"]:
+                case "hybrid":
+                    request = self._hybrid_request(
+                        search["query"], next(sparse), limit, params, score_threshold
+                    )
+                case "semantic":
+                    request = self._semantic_request(
+                        search["query"], limit, params, score_threshold
+                    )
+                case "keyword":
+                    request = self._keyword_request(
+                        next(sparse), limit, params, score_threshold
+                    )
+
+            shallow = None if search["mode"] == "hybrid" else self._shallow_limit(limit)
+            shallow_limits.append(shallow)
+            requests.append(
+                request.model_copy(update={"limit": shallow}) if shallow else request
+            )
+
+        if not requests:
+            return []
+
+        with telemetry.stage("qdrant_query"):
+            responses = await self.replicas.run(
+                lambda qdrant: qdrant.query_batch_points(
+                    self.collection, requests=requests
+                )
+            )
+
+        results = [self._build_result(response) for response in responses]
+
+        deeper = [
+            i
+            for i, shallow in enumerate(shallow_limits)
+            if shallow is not None and self._flat(results[i], shallow)
+        ]
+
+        if deeper:
+            deeper_requests = [
+                requests[i].model_copy(update={"limit": searches[i].get("limit", 25)})
+                for i in deeper
+            ]
+
+            with telemetry.stage("qdrant_query"):
+                responses = await self.replicas.run(
+                    lambda qdrant: qdrant.query_batch_points(
+                        self.collection, requests=deeper_requests
+                    )
+                )
+
+            for i, response in zip(deeper, responses, strict=True):
+                results[i] = self._build_result(response)
+
+        return results
+
+    async def create_collection(
+        self,
+        dimensions: int,
+        quantization: Literal["scalar", "binary"] | None = None,
+        on_disk: bool = False,
+        hnsw_m: int | None = None,
+        hnsw_ef_construct: int | None = None,
+    ) -> None:
+        """Create the collection with a dense and a sparse (BM25) index.
+
+        With quantization, the quantized vectors are kept in RAM for the HNSW search while the
+        original vectors can be stored on disk (`on_disk`) and are only read for rescoring.
+        With `small_dimensions`, a truncated dense index is also created (in RAM); Points must
+        then include a `truncate_embedding` copy of their dense vector under its name.
+
+        Args:
+            dimensions (int): The dimensions of the dense vectors.
+            quantization (str, optional): "scalar" (int8, 4x smaller) or "binary" (1 bit, 32x smaller). Defaults to None.
+            on_disk (bool, optional): Store the original dense vectors on disk instead of RAM. Defaults to False.
+            hnsw_m (int, optional): Edges per node of the HNSW graph. Defaults to Qdrant's default.
+            hnsw_ef_construct (int, optional): Neighbours considered while building the HNSW graph. Defaults to Qdrant's default.
+
+        """
+        quantization_config: models.QuantizationConfig | None
+        match quantization:
+            case "scalar":
+                quantization_config = models.ScalarQuantization(
+                    scalar=models.ScalarQuantizationConfig(
+                        type=models.ScalarType.INT8, quantile=0.99, always_ram=True
+                    )
+                )
+            case "binary":
+                quantization_config = models.BinaryQuantization(
+                    binary=models.BinaryQuantizationConfig(always_ram=True)
+                )
+            case None:
+                quantization_config = None
+
+        hnsw_config = (
+            models.HnswConfigDiff(m=hnsw_m, ef_construct=hnsw_ef_construct)
+            if hnsw_m is not None or hnsw_ef_construct is not None
+            else None
+        )
+
+        vectors_config = {
+            self.dense_index: models.VectorParams(
+                size=dimensions,
+                distance=models.Distance.COSINE,
+                on_disk=on_disk,
+                hnsw_config=hnsw_config,
+                quantization_config=quantization_config,
+            )
+        }
+
+        if self.small_dimensions is not None:
+            vectors_config[self.small_index] = models.VectorParams(
+                size=self.small_dimensions,
+                distance=models.Distance.COSINE,
+                hnsw_config=hnsw_config,
+                quantization_config=quantization_config,
+            )
+
+        await self.qdrant.create_collection(
+            self.collection,
+            vectors_config=vectors_config,
+            sparse_vectors_config={self.sparse_index: models.SparseVectorParams()},
+        )
@@ -0,0 +1,226 @@
+"""`search.sharded_search` defines the ShardedSearch component.
+
+This component spreads searches over several shards, each being another search component
+(typically a `QdrantSearch` on one collection of one Qdrant node). Every search is sent to all
+shards concurrently and their results are merged client-side:
+    - "score" fusion keeps the best score of each document; Use it when the shards hold disjoint
+      parts of one corpus, indexed with the same models, so that their scores are comparable.
+    - "rrf" fusion sums the Reciprocal Rank Fusion score of each document across shards; Use it
+      when scores are not comparable, e.g. with different models or overlapping shards.
+
+Documents are identified by a payload field (`content` by default) to merge duplicates.
+`fuse_results` does the same fusion for any list of rankings, e.g. those of a batch of searches.
+Each shard has `timeout` seconds to answer. Slow or failing shards are left out and counted
+by `telemetry`, so a search returns partial results instead of failing or waiting for the slowest node.
+It only fails if no shard answers.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any, Literal
+
+import numpy as np
+
+from rag import telemetry
+from rag.types import Search, SearchRequest, SearchResult
+
+__all__ = ["ShardedSearch", "fuse_results"]
+
+
+def fuse_results(
+    rankings: list[list[SearchResult]],
+    limit: int,
+    fusion: Literal["score", "rrf"] = "rrf",
+    rrf_k: int = 60,
+    key: str = "content",
+) -> list[SearchResult]:
+    """Merge several rankings into the `limit` best documents, deduplicated by a payload field.
+
+    Args:
+        rankings (list[list[SearchResult]]): The results of each search, best first.
+        limit (int): The maximum number of documents to return.
+        fusion (str, optional): "score" keeps the best score of each document, "rrf" sums their reciprocal ranks. Defaults to "rrf".
+        rrf_k (int, optional): The rank constant of RRF fusion. Defaults to 60.
+        key (str, optional): The payload field that identifies a document across rankings. Defaults to "content".
+
+    Returns:
+        list[SearchResult]: The fused documents, best first; Ties keep the order in which they were first ranked.
+
+    """
+    results = [result for ranking in rankings for result in ranking]
+    if not results:
+        return []
+
+    # Results without the key field are never merged with others
+    keys = np.array(
+        [str(result["data"].get(key, f"\0{i}")) for i, result in enumerate(results)],
+        dtype=object,
+    )
+    _, first, document = np.unique(keys, return_index=True, return_inverse=True)
+
+    if fusion == "rrf":
+        ranks = np.concatenate([np.arange(len(ranking)) for ranking in rankings])
+        scores = np.bincount(document, weights=1 / (rrf_k + ranks + 1))
+    else:
+        scores = np.full(len(first), -np.inf)
+        np.maximum.at(
+            scores, document, np.array([result["score"] for result in results])
+        )
+
+    # Best score first; Ties keep the order in which the rankings returned them
+    order = np.lexsort((first, -scores))[:limit]
+
+    return [
+        {"score": float(scores[i]), "data": results[first[i]]["data"]} for i in order
+    ]
+
+
+class ShardedSearch:
+    """ShardedSearch is a component that fans searches out to several shards and fuses their results."""
+
+    def __init__(
+        self,
+        shards: list[Search],
+        timeout: float | None = 1.0,
+        fusion: Literal["score", "rrf"] = "score",
+        rrf_k: int = 60,
+        key: str = "content",
+    ) -> None:
+        """Initialize a ShardedSearch instance.
+
+        Args:
+            shards (list[Search]): The search components of the shards.
+            timeout (float, optional): Seconds each shard has to answer; None waits for every shard. Defaults to 1.0.
+            fusion (str, optional): "score" keeps the best score of each document, "rrf" sums their reciprocal ranks. Defaults to "score".
+            rrf_k (int, optional): The rank constant of RRF fusion. Defaults to 60.
+            key (str, optional): The payload field that identifies a document across shards. Defaults to "content".
+
+        Raises:
+            ValueError: If there are no shards.
+
+        """
+        if not shards:
+            raise ValueError("ShardedSearch requires at least one shard")
+
+        self.shards = shards
+        self.timeout = timeout
+        self.fusion = fusion
+        self.rrf_k = rrf_k
+        self.key = key
+
+    async def _fan_out[T](self, search: Callable[[Search], Awaitable[T]]) -> list[T]:
+        """Run the search on every shard and return the answers of those that succeed in time."""
+
+        async def run(shard: Search) -> T:
+            async with asyncio.timeout(self.timeout):
+                return await search(shard)
+
+        with telemetry.stage("shard_fan_out"):
+            answers = await asyncio.gather(
+                *(run(shard) for shard in self.shards), return_exceptions=True
+            )
+
+        results: list[T] = []
+        errors: list[BaseException] = []
+        for i, answer in enumerate(answers):
+            if isinstance(answer, BaseException):
+                if not isinstance(answer, Exception):
+                    raise answer
+                telemetry.record_shard_failure(
+                    str(i), "timeout" if isinstance(answer, TimeoutError) else "error"
+                )
+                errors.append(answer)
+            else:
+                results.append(answer)
+
+        if not results:
+            raise errors[0]
+
+        return results
+
+    def _fuse(
+        self, shard_results: list[list[SearchResult]], limit: int
+    ) -> list[SearchResult]:
+        """Merge the results of every shard into the `limit` best documents."""
+        with telemetry.stage("shard_fusion"):
+            return fuse_results(shard_results, limit, self.fusion, self.rrf_k, self.key)
+
+    async def hybrid_search(
+        self, query: list[float], keywords: list[str], limit: int = 25, **kwargs: Any
+    ) -> list[SearchResult]:
+        """Perform a hybrid search on every shard.
+
+        Args:
+            query (list[float]): The query vector to use for the search.
+            keywords (list[str]): The keywords to use for the search.
+            limit (int, optional): The maximum number of results to return. Defaults to 25.
+            **kwargs: Additional keyword arguments to pass to the search of each shard.
+
+        Returns:
+            list[SearchResult]: A list of search results, sorted by fused score.
+
+        """
+        results = await self._fan_out(
+            lambda shard: shard.hybrid_search(query, keywords, limit, **kwargs)
+        )
+        return self._fuse(results, limit)
+
+    async def semantic_search(
+        self, query: list[float], limit: int = 25, **kwargs: Any
+    ) -> list[SearchResult]:
+        """Perform a semantic search on every shard.
+
+        Args:
+            query (list[float]): The query vector to use for the search.
+            limit (int, optional): The maximum number of results to return. Defaults to 25.
+            **kwargs: Additional keyword arguments to pass to the search of each shard.
+
+        Returns:
+            list[SearchResult]: A list of search results, sorted by fused score.
+
+        """
+        results = await self._fan_out(
+            lambda shard: shard.semantic_search(query, limit, **kwargs)
+        )
+        return self._fuse(results, limit)
+
+    async def keyword_search(
+        self, keywords: list[str], limit: int = 25, **kwargs: Any
+    ) -> list[SearchResult]:
+        """Perform a keyword search on every shard.
+
+        Args:
+            keywords (list[str]): The keywords to use for the search.
+            limit (int, optional): The maximum number of results to return. Defaults to 25.
+            **kwargs: Additional keyword arguments to pass to the search of each shard.
+
+        Returns:
+            list[SearchResult]: A list of search results, sorted by fused score.
+
+        """
+        results = await self._fan_out(
+            lambda shard: shard.keyword_search(keywords, limit, **kwargs)
+        )
+        return self._fuse(results, limit)
+
+    async def batch_search(
+        self, searches: list[SearchRequest]
+    ) -> list[list[SearchResult]]:
+        """Send the whole batch to every shard and fuse the results of each search.
+
+        Args:
+            searches (list[SearchRequest]): The searches to perform; Each one may use a different mode.
+
+        Returns:
+            list[list[SearchResult]]: The search results of each search, in the order of `searches`.
+
+        """
+        if not searches:
+            return []
+
+        batches = await self._fan_out(lambda shard: shard.batch_search(searches))
+
+        return [
+            self._fuse([batch[i] for batch in batches], search.get("limit", 25))
+            for i, search in enumerate(searches)
+        ]
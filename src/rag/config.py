@@ -6,44 +6,198 @@ Environment variables are type-checked with pydantic settings to avoid misconfig
 """
 
 from functools import lru_cache
+from pathlib import Path
+from typing import Literal, Self
 
-from pydantic import HttpUrl
+from pydantic import BaseModel, HttpUrl, model_validator
 from pydantic_settings import BaseSettings
+from qdrant_client import models
 
 from .components import chat, embed, search
 
-__all__ = ["get_openai_chat", "get_openai_embed", "get_qdrant"]
+__all__ = [
+    "get_embed",
+    "get_local_embed",
+    "get_openai_chat",
+    "get_openai_embed",
+    "get_qdrant",
+    "get_search",
+    "get_sharded_search",
+]
+
+
+class QdrantShard(BaseModel):
+    """A shard of the corpus: a collection on a Qdrant server (or its replicas); The server defaults to `QDRANT_URL`."""
+
+    collection: str
+    url: HttpUrl | list[HttpUrl] | None = None
+    api_key: str | None = None
 
 
 class Settings(BaseSettings):
     qdrant_collection: str = "Wikipedia"
     qdrant_url: HttpUrl = HttpUrl("http://localhost:6333")
+    qdrant_replica_urls: list[HttpUrl] = []
+    qdrant_hedge_after: float | None = None
+    qdrant_replica_cooldown: float = 5.0
     qdrant_api_key: str | None = None
+    qdrant_path: Path | None = None
+    qdrant_in_memory: bool = False
+    qdrant_hnsw_ef: int | None = None
+    qdrant_exact: bool = False
+    qdrant_quantization_rescore: bool | None = None
+    qdrant_quantization_oversampling: float | None = None
+    qdrant_small_dimensions: int | None = None
+    qdrant_small_oversampling: float = 4.0
+    qdrant_score_threshold: float | None = None
+    qdrant_adaptive_limit: int | None = None
+    qdrant_flat_ratio: float = 0.8
+    qdrant_shards: list[QdrantShard] = []
+    qdrant_shard_timeout: float | None = 1.0
+    qdrant_shard_fusion: Literal["score", "rrf"] = "score"
+
+    search_limit: int = 25
 
     openai_embedding_model: str = "text-embedding-3-large"
+    openai_embedding_dimensions: int | None = None
     openai_url: HttpUrl = HttpUrl("http://localhost:4000")
+    openai_chat_urls: list[HttpUrl] = []
+    openai_model_urls: dict[str, list[HttpUrl]] = {}
+    openai_hedge_after: float | None = None
+    openai_endpoint_cooldown: float = 5.0
     openai_api_key: str = "None"
 
+    embed_backend: Literal["openai", "local"] = "openai"
+    local_embedding_model: str = "BAAI/bge-small-en-v1.5"
+    local_embedding_path: Path | None = None
+    local_embedding_threads: int | None = None
+    local_embedding_workers: int = 1
+    local_embedding_batch_size: int = 32
+
+    trace_log_path: Path | None = None
+    otel_endpoint: HttpUrl | None = None
+
+    record_path: Path | None = None
+
+    profile_path: Path | None = None
+    profile_sample_rate: float = 0.0
+    profile_header: str = "X-Profile"
+    profile_token: str | None = None
+    profile_min_interval: float = 10.0
+    profile_interval: float = 0.005
+    profile_format: Literal["speedscope", "folded"] = "speedscope"
+
+    compaction_max_tool_age: int | None = None
+    compaction_tool_output_characters: int = 500
+    compaction_token_budget: int | None = None
+
+    cascade_models: dict[str, str] = {}
+    cascade_escalate_on_tools: bool = True
+    cascade_max_prompt_tokens: int | None = None
+
+    chat_batch_concurrency: int = 16
+
+    session_max_count: int = 10_000
+    session_ttl: float = 3600
+    session_path: Path | None = None
+    embed_batch_size: int = 64
+
+    @model_validator(mode="after")
+    def _check_qdrant_local(self) -> Self:
+        # A local database can only be opened by one client, and it would replace the servers' URLs
+        if self.qdrant_shards or self.qdrant_replica_urls:
+            if self.qdrant_path is not None:
+                raise ValueError(
+                    "QDRANT_PATH cannot be combined with QDRANT_SHARDS or QDRANT_REPLICA_URLS"
+                )
+            if self.qdrant_in_memory:
+                raise ValueError(
+                    "QDRANT_IN_MEMORY cannot be combined with QDRANT_SHARDS or QDRANT_REPLICA_URLS"
+                )
+        return self
+
 
 settings = Settings()
 
 
+def _urls(url: HttpUrl | list[HttpUrl]) -> str | list[str]:
+    return [str(u) for u in url] if isinstance(url, list) else str(url)
+
+
+def _qdrant_search(
+    collection: str, url: str | list[str], api_key: str | None
+) -> search.QdrantSearch:
+    return search.QdrantSearch(
+        collection=collection,
+        url=url,
+        api_key=api_key,
+        path=str(settings.qdrant_path) if settings.qdrant_path else None,
+        search_params=models.SearchParams(
+            hnsw_ef=settings.qdrant_hnsw_ef,
+            exact=settings.qdrant_exact,
+            quantization=models.QuantizationSearchParams(
+                rescore=settings.qdrant_quantization_rescore,
+                oversampling=settings.qdrant_quantization_oversampling,
+            ),
+        ),
+        small_dimensions=settings.qdrant_small_dimensions,
+        small_oversampling=settings.qdrant_small_oversampling,
+        score_threshold=settings.qdrant_score_threshold,
+        adaptive_limit=settings.qdrant_adaptive_limit,
+        flat_ratio=settings.qdrant_flat_ratio,
+        hedge_after=settings.qdrant_hedge_after,
+        replica_cooldown=settings.qdrant_replica_cooldown,
+    )
+
+
 @lru_cache(1)
 def get_qdrant() -> search.QdrantSearch:
     """Create a QdrantSearch instance from type-checked environment variables. Instance is cached on first call."""
-    return search.QdrantSearch(
+    return _qdrant_search(
         collection=settings.qdrant_collection,
-        url=str(settings.qdrant_url),
+        url=":memory:"
+        if settings.qdrant_in_memory
+        else _urls(settings.qdrant_replica_urls or settings.qdrant_url),
         api_key=settings.qdrant_api_key,
     )
 
 
+@lru_cache(1)
+def get_sharded_search() -> search.ShardedSearch:
+    """Create a ShardedSearch instance over the `QDRANT_SHARDS`. Instance is cached on first call."""
+    return search.ShardedSearch(
+        shards=[
+            _qdrant_search(
+                collection=shard.collection,
+                url=_urls(shard.url or settings.qdrant_url),
+                api_key=shard.api_key or settings.qdrant_api_key,
+            )
+            for shard in settings.qdrant_shards
+        ],
+        timeout=settings.qdrant_shard_timeout,
+        fusion=settings.qdrant_shard_fusion,
+    )
+
+
+def get_search() -> search.QdrantSearch | search.ShardedSearch:
+    """Return the sharded search if `QDRANT_SHARDS` are set, else the single collection search."""
+    if settings.qdrant_shards:
+        return get_sharded_search()
+    return get_qdrant()
+
+
 @lru_cache(1)
 def get_openai_chat() -> chat.OpenAIChat:
     """Create an OpenAIChat instance from type-checked environment variables. Instance is cached on first call."""
     return chat.OpenAIChat(
-        base_url=str(settings.openai_url),
+        base_url=_urls(settings.openai_chat_urls or settings.openai_url),
         api_key=settings.openai_api_key,
+        model_urls={
+            model: [str(url) for url in urls]
+            for model, urls in settings.openai_model_urls.items()
+        },
+        hedge_after=settings.openai_hedge_after,
+        endpoint_cooldown=settings.openai_endpoint_cooldown,
     )
 
 
@@ -54,4 +208,24 @@ def get_openai_embed() -> embed.OpenAIEmbed:
         model=settings.openai_embedding_model,
         base_url=str(settings.openai_url),
         api_key=settings.openai_api_key,
+        dimensions=settings.openai_embedding_dimensions,
     )
+
+
+@lru_cache(1)
+def get_local_embed() -> embed.FastEmbedEmbed:
+    """Create a FastEmbedEmbed instance from type-checked environment variables. Instance is cached on first call."""
+    return embed.FastEmbedEmbed(
+        model=settings.local_embedding_model,
+        model_path=settings.local_embedding_path,
+        threads=settings.local_embedding_threads,
+        max_workers=settings.local_embedding_workers,
+        batch_size=settings.local_embedding_batch_size,
+    )
+
+
+def get_embed() -> embed.OpenAIEmbed | embed.FastEmbedEmbed:
+    """Return the embed component selected by `EMBED_BACKEND`."""
+    if settings.embed_backend == "local":
+        return get_local_embed()
+    return get_openai_embed()
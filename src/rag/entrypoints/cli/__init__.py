@@ -5,14 +5,23 @@ the logic to interact with the `Agent` via the console.
 """
 
 import asyncio
+import json
+import sys
+from contextlib import nullcontext
+from pathlib import Path
 from typing import Annotated
 
-from typer import Exit, Option, Typer
+from typer import Argument, Exit, Option, Typer, echo
 
+from rag import config, telemetry
 from rag.agent import Agent
 from rag.types import Messages
 
-from .tui import ChatUI
+from .batch import Ask, read_prompts, run_ask
+from .loadtest import LoadTest, run_load_test
+from .replay import Replay, run_replay
+from .standins import Upstream
+from .tui import ChatUI, print_bench_report
 
 app = Typer()
 
@@ -20,6 +29,10 @@ app = Typer()
 @app.command()
 def chat(  # pragma: no cover
     model: Annotated[str, Option("-m", "--model", help="The LLM to use")] = "mock",
+    profile: Annotated[
+        Path | None,
+        Option(help="Write a sampling profile of each answer to this directory"),
+    ] = None,
 ) -> None:
     """Start an interactive chat session with a RAG LLM."""
     agent = Agent(model=model)
@@ -28,14 +41,146 @@ def chat(  # pragma: no cover
 
     tui = ChatUI(agent=agent)
 
+    async def answer() -> None:
+        if profile is None:
+            await tui.display_assistant_output(messages)
+            return
+
+        # The trace's spans attribute the samples to the stages of the `Agent`
+        with (
+            telemetry.start_trace("chat", model=model),
+            telemetry.profile("chat", config.settings.profile_interval) as collected,
+        ):
+            await tui.display_assistant_output(messages)
+
+        path = collected.write(profile, config.settings.profile_format)
+        tui.console.print(f"[grey35]Profile written to {path}[/]")
+
     async def chat_session() -> None:
         try:
             tui.print_welcome_message()
             while True:
                 if messages[-1]["role"] != "tool":
                     tui.get_user_input(messages)
-                await tui.display_assistant_output(messages)
+                await answer()
         except SystemExit as err:
             raise Exit() from err
 
     asyncio.run(chat_session())
+
+
+@app.command()
+def ask(  # pragma: no cover
+    path: Annotated[
+        Path | None,
+        Argument(help="A JSONL file of prompts; Reads stdin if omitted or -"),
+    ] = None,
+    model: Annotated[str, Option("-m", "--model", help="The LLM to use")] = "mock",
+    concurrency: Annotated[
+        int, Option("-c", "--concurrency", help="Prompts answered at once")
+    ] = 8,
+    max_rounds: Annotated[
+        int, Option(help="Rounds per prompt before giving up on tool calls")
+    ] = 5,
+    output: Annotated[
+        Path | None,
+        Option("-o", "--output", help="Write the results instead of stdout"),
+    ] = None,
+) -> None:
+    """Answer prompts in bulk and write the results, with their timings, as JSONL."""
+    agent = Agent(model=model)
+    batch = Ask(concurrency=concurrency, max_rounds=max_rounds)
+
+    with (
+        nullcontext(sys.stdin)
+        if path is None or str(path) == "-"
+        else path.open() as lines,
+        nullcontext(sys.stdout) if output is None else output.open("w") as results,
+    ):
+        summary = asyncio.run(run_ask(agent, read_prompts(lines), results, batch))
+
+    echo(
+        f"{summary['prompts']} prompts ({summary['errors']} errors) "
+        f"in {summary['duration']:.2f}s",
+        err=True,
+    )
+
+
+@app.command()
+def bench(  # noqa: PLR0913, PLR0917 # pragma: no cover
+    requests: Annotated[
+        int, Option("-n", "--requests", help="Conversations to send")
+    ] = 200,
+    concurrency: Annotated[
+        int, Option("-c", "--concurrency", help="Conversations in flight")
+    ] = 16,
+    stream: Annotated[bool, Option(help="Request SSE responses")] = True,
+    ttft: Annotated[float, Option(help="Stand-in LLM time to first token (s)")] = 0.3,
+    token_rate: Annotated[float, Option(help="Stand-in LLM tokens per second")] = 50.0,
+    answer_tokens: Annotated[int, Option(help="Stand-in LLM tokens per answer")] = 100,
+    tool_call_rate: Annotated[
+        float, Option(help="Probability of a tool call per user message")
+    ] = 0.5,
+    embed_latency: Annotated[
+        float, Option(help="Stand-in embeddings latency (s)")
+    ] = 0.05,
+    search_latency: Annotated[
+        float, Option(help="Stand-in Qdrant query latency (s)")
+    ] = 0.01,
+    search_results: Annotated[
+        int, Option(help="Points returned per Qdrant query")
+    ] = 25,
+    output: Annotated[
+        Path | None, Option("-o", "--output", help="Write the report as JSON")
+    ] = None,
+) -> None:
+    """Load test one `api` worker against local stand-in LLM, embedding and Qdrant servers."""
+    test = LoadTest(requests=requests, concurrency=concurrency, stream=stream)
+    upstream = Upstream(
+        ttft=ttft,
+        token_rate=token_rate,
+        answer_tokens=answer_tokens,
+        tool_call_rate=tool_call_rate,
+        embed_latency=embed_latency,
+        search_latency=search_latency,
+        search_results=search_results,
+    )
+
+    report = asyncio.run(run_load_test(test, upstream))
+
+    print_bench_report(report)
+
+    if output is not None:
+        output.write_text(json.dumps(report, indent=2))
+
+
+@app.command()
+def replay(  # pragma: no cover
+    path: Annotated[Path, Argument(help="A recording file written with RECORD_PATH")],
+    concurrency: Annotated[
+        int, Option("-c", "--concurrency", help="Recordings replayed at once")
+    ] = 16,
+    time_scale: Annotated[
+        float, Option(help="Multiplier of the recorded upstream timings; 0 for none")
+    ] = 1.0,
+    repeat: Annotated[int, Option(help="Times to replay the recordings")] = 1,
+    output: Annotated[
+        Path | None, Option("-o", "--output", help="Write the report as JSON")
+    ] = None,
+) -> None:
+    """Replay recorded traffic through the agent without network access."""
+    report = asyncio.run(
+        run_replay(
+            Replay(
+                path=path,
+                concurrency=concurrency,
+                time_scale=time_scale,
+                repeat=repeat,
+            )
+        )
+    )
+
+    print_bench_report(report, title="RAG agent replay")
+
+    if output is not None:
+        output.write_text(json.dumps(report, indent=2))
@@ -0,0 +1,160 @@
+"""`cli.batch` answers many prompts through the `Agent` without an interactive session.
+
+Prompts are read as JSON lines, each being either:
+    - An object with a `prompt` string or a `messages` list (the system prompt is added if missing),
+      and an optional `id` echoed in the output.
+    - A JSON string, or a line of plain text, used as the prompt.
+
+Prompts are answered concurrently, up to `concurrency` at a time. Each one goes through `Agent.generate`
+until the LLM answers instead of calling tools, as in a chat session. One JSON line is written per prompt
+as soon as it is answered, so outputs may be out of order; Use `id` to match them with their prompts.
+A prompt without a `prompt` or valid `messages` gets an output line with its `error`, and does not stop the batch.
+"""
+
+import asyncio
+import json
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from typing import Any, TextIO
+
+from pydantic import TypeAdapter, ValidationError
+
+from rag.agent import Agent
+from rag.types import Messages
+
+__all__ = ["Ask", "read_prompts", "run_ask"]
+
+
+@dataclass
+class Ask:
+    """Parameters of a batch run.
+
+    Attributes:
+        concurrency (int): Number of prompts answered at the same time.
+        max_rounds (int): Rounds of `Agent.generate` per prompt before giving up on its tool calls.
+
+    """
+
+    concurrency: int = 8
+    max_rounds: int = 5
+
+
+_messages: TypeAdapter[Messages] = TypeAdapter(Messages)
+
+
+def read_prompts(lines: Iterable[str]) -> Iterator[dict[str, Any]]:
+    """Parse prompt lines into items with an `id` and the `messages` to answer.
+
+    Args:
+        lines (Iterable[str]): JSON lines or plain text lines; Blank lines are skipped.
+
+    Yields:
+        dict: The `id` of the prompt (its line number by default) and its `messages`, or an `error`
+            instead of `messages` if a JSON object has neither a `prompt` nor valid `messages`.
+
+    """
+    for number, line in enumerate(lines, start=1):
+        if not (line := line.strip()):
+            continue
+
+        try:
+            item = json.loads(line)
+        except ValueError:
+            item = line
+
+        if not isinstance(item, dict):
+            item = {"prompt": item if isinstance(item, str) else line}
+
+        if "messages" in item:
+            try:
+                messages = _messages.validate_python(item["messages"])
+            except ValidationError as err:
+                yield {
+                    "id": item.get("id", number),
+                    "error": f"Line {number} has invalid messages: {err.errors()[0]['msg']}",
+                }
+                continue
+        elif "prompt" in item:
+            messages = [{"role": "user", "content": str(item["prompt"])}]
+        else:
+            yield {
+                "id": item.get("id", number),
+                "error": f"Line {number} has neither a prompt nor messages",
+            }
+            continue
+
+        if not messages or messages[0]["role"] != "system":
+            messages.insert(0, {"role": "system", "content": Agent.system})
+
+        yield {"id": item.get("id", number), "messages": messages}
+
+
+async def _ask_one(
+    agent: Agent, item: dict[str, Any], max_rounds: int
+) -> dict[str, Any]:
+    messages: Messages = item.get("messages", [])
+    history = len(messages)
+    start = time.perf_counter()
+    ttft = None
+    answer = ""
+    error = item.get("error")
+
+    try:
+        if error is None:
+            async for content in agent.generate_answer(messages, max_rounds):
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                answer += content
+    except Exception as err:
+        error = f"{type(err).__name__}: {err}"
+
+    new_messages = messages[history:]
+
+    return {
+        "id": item["id"],
+        "answer": answer,
+        "error": error,
+        "rounds": sum(message["role"] == "assistant" for message in new_messages),
+        "tool_calls": sum(message["role"] == "tool" for message in new_messages),
+        "ttft": ttft,
+        "latency": time.perf_counter() - start,
+    }
+
+
+async def run_ask(
+    agent: Agent, items: Iterable[dict[str, Any]], output: TextIO, ask: Ask
+) -> dict[str, Any]:
+    """Answer every prompt and write one JSON line per result to `output`.
+
+    Args:
+        agent (Agent): The agent answering the prompts.
+        items (Iterable[dict]): The prompts, as parsed by `read_prompts`.
+        output (TextIO): Where the results are written, as soon as each one is complete.
+        ask (Ask): How to run the batch.
+
+    Returns:
+        dict: The number of prompts, errors and the duration (seconds) of the batch.
+
+    """
+    semaphore = asyncio.Semaphore(ask.concurrency)
+    errors = 0
+
+    async def bounded(item: dict[str, Any]) -> None:
+        nonlocal errors
+        async with semaphore:
+            result = await _ask_one(agent, item, ask.max_rounds)
+
+        errors += result["error"] is not None
+        output.write(json.dumps(result) + "\n")
+        output.flush()
+
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(bounded(item)) for item in items]
+    await asyncio.gather(*tasks)
+
+    return {
+        "prompts": len(tasks),
+        "errors": errors,
+        "duration": time.perf_counter() - start,
+    }
@@ -0,0 +1,344 @@
+"""`cli.loadtest` measures the throughput of one `api` worker against stand-in upstreams.
+
+The load test starts the stand-ins from `cli.standins` in the current event loop, runs the real
+FastAPI app as a separate `uvicorn` worker process pointed at them, and drives concurrent
+conversations through `/chat`. CPU time and memory are read from the worker process only,
+so the load generator and the stand-ins do not pollute the measurements.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+
+from .standins import Upstream, create_openai_standin, create_qdrant_standin
+
+__all__ = ["LoadTest", "percentile", "run_load_test"]
+
+# Settings that would send the worker's traffic elsewhere than the stand-ins, or make it
+# record, profile or export it: They are removed from the worker's environment
+WORKER_OVERRIDDEN_SETTINGS = frozenset(
+    {
+        "OPENAI_URL",
+        "OPENAI_CHAT_URLS",
+        "OPENAI_MODEL_URLS",
+        "QDRANT_URL",
+        "QDRANT_REPLICA_URLS",
+        "QDRANT_SHARDS",
+        "QDRANT_PATH",
+        "QDRANT_IN_MEMORY",
+        "EMBED_BACKEND",
+        "RECORD_PATH",
+        "CASCADE_MODELS",
+        "PROFILE_PATH",
+        "TRACE_LOG_PATH",
+        "OTEL_ENDPOINT",
+        "SESSION_PATH",
+    }
+)
+
+PROMPTS = [
+    "Who founded the city of Rome and when?",
+    "Summarize the history of the printing press.",
+    "What is the difference between a comet and an asteroid?",
+    "Explain how vaccines train the immune system.",
+    "Which countries border Switzerland?",
+]
+
+
+@dataclass
+class LoadTest:
+    """Parameters of a load test run.
+
+    Attributes:
+        requests (int): Total number of conversations to send.
+        concurrency (int): Number of conversations in flight at the same time.
+        model (str): The model name sent to the API.
+        stream (bool): Whether to request SSE responses.
+        warmup (int): Conversations sent before measuring, to load models and fill connection pools.
+        max_rounds (int): Requests per conversation before giving up on its tool calls.
+
+    """
+
+    requests: int = 200
+    concurrency: int = 16
+    model: str = "standin"
+    stream: bool = True
+    warmup: int = 4
+    max_rounds: int = 5
+
+
+@dataclass
+class Sample:
+    """Timings of one conversation."""
+
+    ok: bool
+    latency: float
+    ttft: float | None
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Return the `q`-th percentile (0-100) of `values` by linear interpolation."""
+    if not values:
+        return float("nan")
+
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _process_stats(pid: int) -> tuple[float, int] | None:
+    """Return the CPU seconds and peak RSS (bytes) of a process; Only available on Linux."""
+    try:
+        stat = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+        status = Path(f"/proc/{pid}/status").read_text()
+    except OSError:
+        return None
+
+    ticks = os.sysconf("SC_CLK_TCK")
+    cpu = (int(stat[11]) + int(stat[12])) / ticks
+    peak = next(
+        int(line.split()[1]) * 1024
+        for line in status.splitlines()
+        if line.startswith("VmHWM:")
+    )
+
+    return cpu, peak
+
+
+@asynccontextmanager
+async def _serve(app: FastAPI, port: int, patience: float = 10) -> AsyncIterator[None]:
+    server = uvicorn.Server(
+        uvicorn.Config(app, port=port, log_level="warning", access_log=False)
+    )
+
+    async def serve() -> None:
+        try:
+            await server.serve()
+        except SystemExit as err:
+            # uvicorn exits when it cannot start, e.g. if the port is taken; asyncio
+            # would propagate `SystemExit` out of the event loop instead of the task
+            raise RuntimeError(
+                f"The stand-in on port {port} stopped while starting"
+            ) from err
+
+    task = asyncio.create_task(serve())
+    deadline = time.monotonic() + patience
+
+    while not server.started:
+        if task.done():
+            await task
+            raise RuntimeError(f"The stand-in on port {port} stopped while starting")
+        if time.monotonic() > deadline:
+            server.should_exit = True
+            task.cancel()
+            raise TimeoutError(f"The stand-in on port {port} did not start in time")
+        await asyncio.sleep(0.01)
+
+    try:
+        yield
+    finally:
+        server.should_exit = True
+        await task
+
+
+async def _wait_ready(client: httpx.AsyncClient, url: str, patience: float) -> None:
+    deadline = time.monotonic() + patience
+    while True:
+        try:
+            await client.get(f"{url}/metrics")
+            return
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def _round(
+    client: httpx.AsyncClient, url: str, test: LoadTest, messages: list[dict[str, Any]]
+) -> tuple[bool, float | None, list[dict[str, Any]] | None]:
+    """Send one `/chat` request; Return whether it succeeded, when its first token arrived and its tool round messages."""
+    payload = {"model": test.model, "messages": messages}
+
+    if not test.stream:
+        response = await client.post(f"{url}/chat", json=payload)
+        body = response.json() if response.is_success else {}
+        return response.is_success, None, body.get("messages")
+
+    first_token = None
+    new_messages = None
+    event = None
+
+    async with client.stream(
+        "POST", f"{url}/chat", json=payload, params={"stream": True}
+    ) as response:
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                event = line.removeprefix("event: ")
+                if event == "timing":
+                    break
+            elif line.startswith("data: "):
+                if event == "messages":
+                    new_messages = json.loads(line.removeprefix("data: "))
+                elif first_token is None:
+                    first_token = time.perf_counter()
+
+    return response.is_success, first_token, new_messages
+
+
+async def _conversation(
+    client: httpx.AsyncClient, url: str, test: LoadTest, prompt: str
+) -> Sample:
+    messages = [{"role": "user", "content": prompt}]
+    start = time.perf_counter()
+    ttft = None
+    ok = False
+
+    try:
+        # Send the tool round messages back until the API answers, like a chat session does
+        for _ in range(test.max_rounds):
+            ok, first_token, new_messages = await _round(client, url, test, messages)
+            if ttft is None and first_token is not None:
+                ttft = first_token - start
+            if not ok or new_messages is None:
+                break
+            messages.extend(new_messages)
+        else:
+            ok = False
+    except httpx.HTTPError:
+        ok = False
+
+    return Sample(ok=ok, latency=time.perf_counter() - start, ttft=ttft)
+
+
+async def _drive(
+    client: httpx.AsyncClient, url: str, test: LoadTest, count: int
+) -> list[Sample]:
+    semaphore = asyncio.Semaphore(test.concurrency)
+
+    async def bounded(i: int) -> Sample:
+        async with semaphore:
+            return await _conversation(client, url, test, PROMPTS[i % len(PROMPTS)])
+
+    return await asyncio.gather(*(bounded(i) for i in range(count)))
+
+
+def _worker_env(openai_port: int, qdrant_port: int) -> dict[str, str]:
+    """Return the environment of the `api` worker, pointed at the stand-ins only."""
+    # Settings are read case-insensitively; Tuning settings are kept, so they can be benchmarked
+    env = {
+        name: value
+        for name, value in os.environ.items()
+        if name.upper() not in WORKER_OVERRIDDEN_SETTINGS
+    }
+
+    return env | {
+        "OPENAI_URL": f"http://127.0.0.1:{openai_port}",
+        "QDRANT_URL": f"http://127.0.0.1:{qdrant_port}",
+    }
+
+
+async def _measure(
+    test: LoadTest, openai_port: int, qdrant_port: int, api_port: int
+) -> tuple[list[Sample], float, tuple[float, int] | None, tuple[float, int] | None]:
+    """Run an `api` worker against the stand-ins and drive the load through it."""
+    env = _worker_env(openai_port, qdrant_port)
+    worker = subprocess.Popen(  # noqa: ASYNC220, S603
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "rag.entrypoints.rest:app",
+            "--port",
+            str(api_port),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        env=env,
+    )
+
+    url = f"http://127.0.0.1:{api_port}"
+    limits = httpx.Limits(max_connections=test.concurrency)
+
+    try:
+        async with httpx.AsyncClient(limits=limits, timeout=None) as client:  # noqa: S113
+            await _wait_ready(client, url, patience=120)
+            await _drive(client, url, test, test.warmup)
+
+            before = _process_stats(worker.pid)
+            start = time.perf_counter()
+            samples = await _drive(client, url, test, test.requests)
+            elapsed = time.perf_counter() - start
+            after = _process_stats(worker.pid)
+    finally:
+        worker.terminate()
+        worker.wait()
+
+    return samples, elapsed, before, after
+
+
+async def run_load_test(test: LoadTest, upstream: Upstream) -> dict[str, Any]:
+    """Run a load test against a fresh `api` worker and return its report.
+
+    Args:
+        test (LoadTest): The load to generate.
+        upstream (Upstream): The behaviour of the stand-in upstream services.
+
+    Returns:
+        dict: Throughput, latency and TTFT percentiles (seconds), and the worker's CPU and peak RSS.
+
+    """
+    openai_port, qdrant_port, api_port = _free_port(), _free_port(), _free_port()
+
+    async with (
+        _serve(create_openai_standin(upstream), openai_port),
+        _serve(create_qdrant_standin(upstream), qdrant_port),
+    ):
+        samples, elapsed, before, after = await _measure(
+            test, openai_port, qdrant_port, api_port
+        )
+
+    ok = [sample for sample in samples if sample.ok]
+    latencies = [sample.latency for sample in ok]
+    ttfts = [sample.ttft for sample in ok if sample.ttft is not None]
+
+    report: dict[str, Any] = {
+        "requests": len(samples),
+        "errors": len(samples) - len(ok),
+        "concurrency": test.concurrency,
+        "duration": elapsed,
+        "requests_per_second": len(ok) / elapsed,
+    }
+
+    for name, values in (("latency", latencies), ("ttft", ttfts)):
+        for q in (50, 95, 99):
+            report[f"{name}_p{q}"] = percentile(values, q)
+
+    if before is not None and after is not None:
+        report["cpu_seconds"] = after[0] - before[0]
+        report["cpu_utilization"] = (after[0] - before[0]) / elapsed
+        report["peak_rss_bytes"] = after[1]
+
+    return report
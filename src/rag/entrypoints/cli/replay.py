@@ -0,0 +1,120 @@
+"""`cli.replay` replays recorded production traffic through the `Agent` without network access.
+
+Recordings are written by `agent.recording.Recorder` when `RECORD_PATH` is set. Each recording is
+fed through `Agent.generate` with replay components that return the recorded LLM streams, embeddings
+and search results, sleeping for the recorded upstream timings multiplied by `time_scale`. Everything
+else (tool dispatch, argument parsing, template building, instrumentation) runs for real, in-process.
+"""
+
+import asyncio
+import resource
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from rag.agent import Agent
+from rag.agent.recording import (
+    Recording,
+    ReplayChat,
+    ReplayEmbed,
+    ReplayMismatchError,
+    ReplaySearch,
+    read_recordings,
+)
+
+from .loadtest import Sample, percentile
+
+__all__ = ["Replay", "run_replay"]
+
+
+@dataclass
+class Replay:
+    """Parameters of a replay run.
+
+    Attributes:
+        path (Path): The recording file to replay.
+        concurrency (int): Number of recordings replayed at the same time.
+        time_scale (float): Multiplier of the recorded upstream timings; 0 replays as fast as possible.
+        repeat (int): Number of times the recordings are replayed.
+
+    """
+
+    path: Path
+    concurrency: int = 16
+    time_scale: float = 1.0
+    repeat: int = 1
+
+
+async def _replay_one(recording: Recording, time_scale: float) -> Sample:
+    agent = Agent(
+        model=recording.model,
+        _chat=ReplayChat(recording, time_scale),
+        _search=ReplaySearch(recording, time_scale),
+        _embed=ReplayEmbed(recording, time_scale),
+        # The recording already holds the effects of the settings it was made with
+        _recorder=False,
+        _compaction=False,
+        _cascade=False,
+    )
+    messages = list(recording.messages)
+    start = time.perf_counter()
+    ttft = None
+
+    try:
+        async for _ in agent.generate(messages):
+            if ttft is None:
+                ttft = time.perf_counter() - start
+        ok = True
+    except ReplayMismatchError:
+        # The recording does not match the agent's current behaviour
+        ok = False
+
+    return Sample(ok=ok, latency=time.perf_counter() - start, ttft=ttft)
+
+
+async def run_replay(replay: Replay) -> dict[str, Any]:
+    """Replay a recording file through the `Agent` and return its report.
+
+    Args:
+        replay (Replay): The recordings and how to replay them.
+
+    Returns:
+        dict: Throughput, latency and TTFT percentiles (seconds), and the CPU time and peak RSS of this process.
+
+    """
+    recordings = list(read_recordings(replay.path)) * replay.repeat
+    semaphore = asyncio.Semaphore(replay.concurrency)
+
+    async def bounded(recording: Recording) -> Sample:
+        async with semaphore:
+            return await _replay_one(recording, replay.time_scale)
+
+    cpu = time.process_time()
+    start = time.perf_counter()
+    samples = await asyncio.gather(*(bounded(recording) for recording in recordings))
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu
+
+    ok = [sample for sample in samples if sample.ok]
+    latencies = [sample.latency for sample in ok]
+    ttfts = [sample.ttft for sample in ok if sample.ttft is not None]
+
+    report: dict[str, Any] = {
+        "requests": len(samples),
+        "errors": len(samples) - len(ok),
+        "concurrency": replay.concurrency,
+        "duration": elapsed,
+        "requests_per_second": len(ok) / elapsed if elapsed else float("nan"),
+    }
+
+    for name, values in (("latency", latencies), ("ttft", ttfts)):
+        for q in (50, 95, 99):
+            report[f"{name}_p{q}"] = percentile(values, q)
+
+    report["cpu_seconds"] = cpu
+    report["cpu_utilization"] = cpu / elapsed if elapsed else float("nan")
+    # ru_maxrss is reported in KiB on Linux
+    report["peak_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    return report
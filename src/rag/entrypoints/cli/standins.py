@@ -0,0 +1,214 @@
+"""`cli.standins` defines local stand-ins for the upstream services of the application.
+
+The stand-ins are small FastAPI apps that speak just enough of the OpenAI and Qdrant HTTP APIs
+for the components to work against them: streamed chat completions (with optional tool calls),
+embeddings, and point queries. Their latency, token rate and tool-call behaviour are configurable,
+which makes them suitable for load testing the application without real LLMs or a real corpus.
+"""
+
+import asyncio
+import json
+import random
+from collections.abc import AsyncGenerator
+from dataclasses import dataclass
+from importlib.metadata import version
+from typing import Any
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+__all__ = ["Upstream", "create_openai_standin", "create_qdrant_standin"]
+
+WORDS = [
+    "the",
+    "retrieval",
+    "augmented",
+    "answer",
+    "cites",
+    "several",
+    "passages",
+    "from",
+    "the",
+    "knowledge",
+    "base",
+    "and",
+    "explains",
+    "how",
+    "each",
+    "of",
+    "them",
+    "supports",
+    "the",
+    "conclusion",
+    "in",
+    "plain",
+    "language",
+]
+
+
+@dataclass
+class Upstream:
+    """Behaviour of the stand-in upstream services.
+
+    Attributes:
+        ttft (float): Seconds before the first chat completion chunk is sent.
+        token_rate (float): Chat completion tokens streamed per second.
+        answer_tokens (int): Number of tokens in each answer.
+        tool_call_rate (float): Probability of answering a user message with a tool call.
+        embed_latency (float): Seconds to answer an embeddings request.
+        embed_dimensions (int): Dimensions of the returned embeddings.
+        search_latency (float): Seconds to answer a point query.
+        search_results (int): Maximum number of points returned by a query.
+        seed (int): Seed of the random tool-call decisions.
+
+    """
+
+    ttft: float = 0.3
+    token_rate: float = 50.0
+    answer_tokens: int = 100
+    tool_call_rate: float = 0.5
+    embed_latency: float = 0.05
+    embed_dimensions: int = 3072
+    search_latency: float = 0.01
+    search_results: int = 25
+    seed: int = 0
+
+
+def _chunk(model: str, delta: dict[str, Any]) -> str:
+    payload = {
+        "id": "chatcmpl-standin",
+        "object": "chat.completion.chunk",
+        "created": 0,
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+    }
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+def create_openai_standin(upstream: Upstream) -> FastAPI:
+    """Create an OpenAI-compatible app serving streamed chat completions and embeddings."""
+    app = FastAPI()
+    rng = random.Random(upstream.seed)  # noqa: S311
+    embedding = [rng.uniform(-1.0, 1.0) for _ in range(upstream.embed_dimensions)]
+
+    async def stream_answer(model: str) -> AsyncGenerator[str]:
+        await asyncio.sleep(upstream.ttft)
+        for i in range(upstream.answer_tokens):
+            if i:
+                await asyncio.sleep(1 / upstream.token_rate)
+            yield _chunk(model, {"content": WORDS[i % len(WORDS)] + " "})
+        yield "data: [DONE]\n\n"
+
+    async def stream_tool_call(model: str, query: str) -> AsyncGenerator[str]:
+        arguments = json.dumps({"query": query, "keywords": query.split()[:5]})
+        fragments = [arguments[i : i + 8] for i in range(0, len(arguments), 8)]
+
+        await asyncio.sleep(upstream.ttft)
+        yield _chunk(
+            model,
+            {
+                "tool_calls": [
+                    {
+                        "index": 0,
+                        "id": "call_standin",
+                        "type": "function",
+                        "function": {"name": "hybrid_search", "arguments": ""},
+                    }
+                ]
+            },
+        )
+        for fragment in fragments:
+            await asyncio.sleep(1 / upstream.token_rate)
+            yield _chunk(
+                model,
+                {"tool_calls": [{"index": 0, "function": {"arguments": fragment}}]},
+            )
+        yield "data: [DONE]\n\n"
+
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request) -> StreamingResponse:
+        body = await request.json()
+        model = body.get("model", "standin")
+        last = body["messages"][-1]
+
+        if (
+            last["role"] == "user"
+            and body.get("tools")
+            and rng.random() < upstream.tool_call_rate
+        ):
+            stream = stream_tool_call(model, last["content"])
+        else:
+            stream = stream_answer(model)
+
+        return StreamingResponse(stream, media_type="text/event-stream")
+
+    @app.post("/embeddings")
+    async def embeddings(request: Request) -> JSONResponse:
+        body = await request.json()
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        dimensions = body.get("dimensions") or upstream.embed_dimensions
+
+        await asyncio.sleep(upstream.embed_latency)
+
+        return JSONResponse(
+            {
+                "object": "list",
+                "model": body.get("model", "standin"),
+                "data": [
+                    {
+                        "object": "embedding",
+                        "index": i,
+                        "embedding": embedding[:dimensions],
+                    }
+                    for i in range(len(inputs))
+                ],
+                "usage": {"prompt_tokens": 0, "total_tokens": 0},
+            }
+        )
+
+    return app
+
+
+def create_qdrant_standin(upstream: Upstream) -> FastAPI:
+    """Create a Qdrant-like app answering point queries with synthetic passages."""
+    app = FastAPI()
+    points = [
+        {
+            "id": i,
+            "version": 0,
+            "score": 1 / (i + 1),
+            "payload": {"content": " ".join(WORDS[i % 7 :] * 3)},
+        }
+        for i in range(upstream.search_results)
+    ]
+
+    def query_result(body: dict[str, Any]) -> dict[str, Any]:
+        return {"points": points[: body.get("limit", 10)]}
+
+    @app.get("/")
+    async def root() -> dict[str, str]:
+        # Report the client's own version so that its compatibility check passes
+        return {
+            "title": "qdrant - vector search engine",
+            "version": version("qdrant-client"),
+        }
+
+    @app.post("/collections/{collection}/points/query")
+    async def query_points(collection: str, request: Request) -> JSONResponse:
+        body = await request.json()
+        await asyncio.sleep(upstream.search_latency)
+        return JSONResponse({"result": query_result(body), "status": "ok", "time": 0.0})
+
+    @app.post("/collections/{collection}/points/query/batch")
+    async def query_batch_points(collection: str, request: Request) -> JSONResponse:
+        body = await request.json()
+        await asyncio.sleep(upstream.search_latency)
+        return JSONResponse(
+            {
+                "result": [query_result(search) for search in body["searches"]],
+                "status": "ok",
+                "time": 0.0,
+            }
+        )
+
+    return app
@@ -3,14 +3,80 @@
 This module use `rich` to define how the CLI application is rendered in the console.
 It does not contain any application logic; It merely determines the style and content
 of what is output to the terminal.
+
+Streamed answers are rendered incrementally by `MarkdownStream`: Finished Markdown blocks are
+printed once and frozen above the live region, which only re-parses the trailing block, at most
+`max_fps` times per second. Rendering cost is then linear in the length of the answer.
 """
 
+from time import perf_counter
+from typing import Any
+
 from rich.console import Console
 from rich.live import Live
 from rich.markdown import Markdown
+from rich.table import Table
 
 from rag.types import Agent, Messages
 
+FENCES = ("```", "~~~")
+
+
+class MarkdownStream:
+    """Render a Markdown answer streamed into a `Live` display, freezing each finished block."""
+
+    def __init__(self, live: Live, max_fps: float = 10.0) -> None:
+        """Initialize a MarkdownStream.
+
+        Args:
+            live (Live): The live display to render into; Frozen blocks are printed to its console.
+            max_fps (float, optional): The maximum number of times per second the trailing block is re-rendered. Defaults to 10.0.
+
+        """
+        self.live = live
+        self.interval = 1 / max_fps
+        self.buffer = ""
+        self.frozen = 0
+        self.scanned = 0
+        self.in_fence = False
+        self.rendered_at = float("-inf")
+
+    def _freeze(self) -> None:
+        """Print the blocks finished by a blank line, outside of fenced code, and freeze them."""
+        end = self.buffer.rfind("\n") + 1
+
+        while self.scanned < end:
+            line_end = self.buffer.index("\n", self.scanned) + 1
+            line = self.buffer[self.scanned : line_end].strip()
+            self.scanned = line_end
+
+            if line.startswith(FENCES):
+                self.in_fence = not self.in_fence
+            elif not line and not self.in_fence:
+                if block := self.buffer[self.frozen : line_end].strip():
+                    self.live.console.print(Markdown(block))
+                    self.live.console.print()
+                self.frozen = line_end
+
+    def _render(self) -> None:
+        self.live.update(Markdown(self.buffer[self.frozen :]), refresh=True)
+        self.rendered_at = perf_counter()
+
+    def feed(self, content: str) -> None:
+        """Add streamed content, re-rendering the trailing block if a frame is due."""
+        self.buffer += content
+
+        if "\n" in content:
+            self._freeze()
+
+        if perf_counter() - self.rendered_at >= self.interval:
+            self._render()
+
+    def close(self) -> None:
+        """Render the final state of the trailing block."""
+        if self.buffer:
+            self._render()
+
 
 class ChatUI:  # pragma: no cover
     """The terminal user interface for the CLI app."""
@@ -46,14 +112,16 @@ class ChatUI:  # pragma: no cover
         """Display the assistant's output in the console."""
         self.console.print("\n[bold green]Assistant:[/]")
 
-        buffer = ""
+        with Live("[grey35]Thinking...[/]", auto_refresh=False) as live:
+            live.refresh()
+            stream = MarkdownStream(live)
 
-        with Live("[grey35]Thinking...[/]", refresh_per_second=10) as live:
             async for content in self.agent.generate(messages):
-                buffer += content
-                live.update(Markdown(buffer))
+                stream.feed(content)
 
-            if len(buffer) == 0:
+            stream.close()
+
+            if len(stream.buffer) == 0:
                 assistant_messages = [m for m in messages if m["role"] == "assistant"]
                 last_assistant_message = assistant_messages[-1]
 
@@ -62,5 +130,32 @@ class ChatUI:  # pragma: no cover
                         name = tool_call["function"]["name"]
                         arguments = tool_call["function"]["arguments"]
                         live.update(
-                            f"[bold yellow]Tool call:[/] {name}\n[bold yellow]Arguments:[/] {arguments}"
+                            f"[bold yellow]Tool call:[/] {name}\n[bold yellow]Arguments:[/] {arguments}",
+                            refresh=True,
                         )
+
+
+def print_bench_report(  # pragma: no cover
+    report: dict[str, Any], title: str = "RAG API load test"
+) -> None:
+    """Print a load test or replay report as a table."""
+    table = Table(title=title, show_header=False)
+
+    table.add_row("Requests", f"{report['requests']} ({report['errors']} errors)")
+    table.add_row("Concurrency", str(report["concurrency"]))
+    table.add_row("Throughput", f"{report['requests_per_second']:.2f} req/s")
+
+    for name in ("ttft", "latency"):
+        percentiles = " / ".join(
+            f"{report[f'{name}_p{q}'] * 1000:.0f}" for q in (50, 95, 99)
+        )
+        table.add_row(f"{name.upper()} p50/p95/p99", f"{percentiles} ms")
+
+    if "cpu_seconds" in report:
+        table.add_row(
+            "CPU",
+            f"{report['cpu_seconds']:.2f} s ({report['cpu_utilization']:.0%} of a core)",
+        )
+        table.add_row("Peak RSS", f"{report['peak_rss_bytes'] / 2**20:.0f} MiB")
+
+    Console().print(table)
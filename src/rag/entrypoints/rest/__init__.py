@@ -5,20 +5,64 @@ the logic to interact with the `Agent` via HTTP requests.
 It also defined a helper function to run the REST API using uvicorn.
 """
 
+import asyncio
 import json
 import os
 from collections.abc import AsyncGenerator
+from typing import Any
+from uuid import uuid4
 
 import uvicorn
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import Field
 
-from rag.agent import Agent
+from rag import config, telemetry
+from rag.agent import Agent, MaxRoundsError
+from rag.components.embed import BatchingEmbed
+from rag.types import Messages as MessageList
+from rag.types import SearchRequest
 
-from .models import BaseModel, Messages
+from .models import (
+    BaseModel,
+    Messages,
+    SearchQuery,
+    UserMessage,
+    chat_payload_openapi,
+    encode_sse,
+    parse_chat_payload,
+)
+from .profiling import ProfilingMiddleware
+from .sessions import SessionStore
 
 app = FastAPI()
 
+if (profile_path := config.settings.profile_path) is not None:
+    app.add_middleware(
+        ProfilingMiddleware,
+        directory=profile_path,
+        sample_rate=config.settings.profile_sample_rate,
+        header=config.settings.profile_header,
+        token=config.settings.profile_token,
+        min_interval=config.settings.profile_min_interval,
+        interval=config.settings.profile_interval,
+        format=config.settings.profile_format,
+    )
+
+telemetry.configure_tracing(
+    log_path=config.settings.trace_log_path,
+    otel_endpoint=str(otel) if (otel := config.settings.otel_endpoint) else None,
+)
+
+sessions = SessionStore(
+    max_sessions=config.settings.session_max_count,
+    ttl=config.settings.session_ttl,
+    path=config.settings.session_path,
+)
+
+# Tool rounds run by the server for one session message or batch conversation before it gives up on an answer
+MAX_SESSION_ROUNDS = 5
+
 
 class Data(BaseModel):
     """POST input data for the chat endpoint."""
@@ -27,39 +71,281 @@ class Data(BaseModel):
     messages: Messages
 
 
-@app.post("/chat")
-async def send_messages(data: Data, stream: bool = False):  # noqa: ANN201
+class BatchData(BaseModel):
+    """POST input data for the batch chat endpoint."""
+
+    model: str
+    conversations: list[Messages]
+    concurrency: int | None = Field(default=None, ge=1)
+
+
+class SessionData(BaseModel):
+    """POST input data for the session chat endpoint."""
+
+    model: str
+    session_id: str | None = Field(default=None, max_length=64)
+    message: UserMessage
+
+
+class SearchData(BaseModel):
+    """POST input data for the search endpoint."""
+
+    queries: list[SearchQuery] = Field(min_length=1)
+
+
+@app.post("/chat", openapi_extra=chat_payload_openapi("/chat"))
+async def send_messages(request: Request, stream: bool = False):  # noqa: ANN201
     """Receives a POST request with a JSON payload following the `Data` model.
 
     This function will reject the request if the payload does not conform to the `Data` model.
+    The body is validated straight into dicts with `parse_chat_payload` rather than into `Data`,
+    which would then have to be dumped back to dicts for the `Agent`.
 
     Args:
-        data (Data): The POST request payload; Must include `model` (str) and `messages` (Messages)
+        request (Request): The POST request; Its payload must include `model` (str) and `messages` (Messages)
         stream (bool, optional): Query parameter; Whether to return the response as JSON (False) or SSE (True). Defaults to False.
 
+    When the LLM calls tools, the round ends with their results instead of an answer. The new messages
+    (the assistant's tool calls and the tool results) are then returned too: Append them to the
+    conversation and send it again to get the answer.
+
     Returns:
-        JSONResponse: If stream is False; A JSON response containing the generated text.
-        StreamingResponse: If stream is True; A SSE response containing the generated text in data events.
+        JSONResponse: If stream is False; A JSON response containing the generated text, with a `Server-Timing` header,
+            and the new `messages` if the round ended with tool results.
+        StreamingResponse: If stream is True; A SSE response containing the generated text in data events,
+            a `messages` event with the new messages if the round ended with tool results,
+            and a final `timing` event with the request's span tree.
 
     """
-    agent = Agent(model=data.model)
+    data = parse_chat_payload(await request.body())
+    model = data["model"]
+    messages = data["messages"]
+    history = len(messages)
+
+    agent = Agent(model=model)
+
+    response = agent.generate(messages)
 
-    response = agent.generate(data.messages.model_dump())
+    def tool_round() -> MessageList | None:
+        new_messages = messages[history:]
+        return (
+            new_messages
+            if new_messages and new_messages[-1]["role"] == "tool"
+            else None
+        )
 
     if stream:
 
         async def stream_response() -> AsyncGenerator[str]:
-            async for chunk in response:
-                yield f"data: {json.dumps(chunk)}\n\n"
+            with telemetry.start_trace("chat", model=model, stream=True) as trace:
+                async for chunk in response:
+                    yield encode_sse(chunk)
+
+            if (new_messages := tool_round()) is not None:
+                yield encode_sse(new_messages, "messages")
+
+            yield encode_sse(trace.to_dict(), "timing")
 
         return StreamingResponse(stream_response())
     else:
         buffer = ""
 
-        async for chunk in response:
-            buffer += chunk
+        with telemetry.start_trace("chat", model=model) as trace:
+            async for chunk in response:
+                buffer += chunk
+
+        content: dict[str, Any] = {"response": buffer}
+        if (new_messages := tool_round()) is not None:
+            content["messages"] = new_messages
+
+        return JSONResponse(content, headers={"Server-Timing": trace.server_timing()})
+
+
+@app.post("/chat/session")
+async def send_session_message(data: SessionData, stream: bool = False):  # noqa: ANN201
+    """Receives a POST request with a single new user message following the `SessionData` model.
+
+    The conversation history is kept on the server: Omit `session_id` to start a new session,
+    then send the returned ID with each following message. Tool calls are executed on the server
+    until the assistant answers, so each request returns the complete answer.
+
+    Args:
+        data (SessionData): The POST request payload; Must include `model` (str) and `message` (UserMessage).
+        stream (bool, optional): Query parameter; Whether to return the response as JSON (False) or SSE (True). Defaults to False.
+
+    Returns:
+        JSONResponse: If stream is False; The session ID and the generated text, with a `Server-Timing` header.
+        StreamingResponse: If stream is True; A SSE response like the one of `/chat`, with the session ID in an `X-Session-Id` header.
+
+    Raises:
+        HTTPException: 404 if the session does not exist or expired.
+
+    """
+    if data.session_id is not None and await sessions.get(data.session_id) is None:
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+
+    session_id = data.session_id or uuid4().hex
+    agent = Agent(model=data.model)
+
+    async def converse() -> AsyncGenerator[str]:
+        async with sessions.lock(session_id):
+            messages: MessageList = await sessions.get(session_id) or [
+                {"role": "system", "content": agent.system}
+            ]
+            messages.append({"role": "user", "content": data.message.content})
+
+            try:
+                async for chunk in agent.generate_answer(messages, MAX_SESSION_ROUNDS):
+                    yield chunk
+            except MaxRoundsError:
+                # The answer ends there; The history keeps the tool results for the next message
+                pass
+            finally:
+                await sessions.put(session_id, messages)
+
+    headers = {"X-Session-Id": session_id}
+
+    if stream:
+
+        async def stream_response() -> AsyncGenerator[str]:
+            with telemetry.start_trace(
+                "chat", model=data.model, stream=True, session=True
+            ) as trace:
+                async for chunk in converse():
+                    yield encode_sse(chunk)
+
+            yield encode_sse(trace.to_dict(), "timing")
+
+        return StreamingResponse(stream_response(), headers=headers)
+    else:
+        with telemetry.start_trace("chat", model=data.model, session=True) as trace:
+            buffer = "".join([chunk async for chunk in converse()])
+
+        return JSONResponse(
+            {"session_id": session_id, "response": buffer},
+            headers=headers | {"Server-Timing": trace.server_timing()},
+        )
+
+
+@app.post("/chat/batch")
+async def send_batch(data: BatchData) -> StreamingResponse:
+    """Receives a POST request with many conversations following the `BatchData` model.
+
+    The conversations run concurrently, up to `concurrency` at a time (capped by the
+    `CHAT_BATCH_CONCURRENCY` setting), and their embedding requests are batched together.
+    Tool calls are executed on the server until the assistant answers, as in session mode.
+
+    Args:
+        data (BatchData): The POST request payload; Must include `model` (str) and `conversations` (list[Messages]).
+
+    Returns:
+        StreamingResponse: A NDJSON response with one `{"index", "response"}` line per conversation
+            (or `{"index", "error"}` if it failed), in completion order rather than input order.
+
+    """
+    limit = config.settings.chat_batch_concurrency
+    semaphore = asyncio.Semaphore(min(data.concurrency or limit, limit))
+    embed = BatchingEmbed(
+        config.get_embed(), max_batch_size=config.settings.embed_batch_size
+    )
+
+    async def run(index: int, messages: Messages) -> dict[str, Any]:
+        async with semaphore:
+            agent = Agent(model=data.model, _embed=embed)
+
+            try:
+                with telemetry.start_trace("chat", model=data.model, batch=True):
+                    response = "".join(
+                        [
+                            chunk
+                            async for chunk in agent.generate_answer(
+                                messages.model_dump(), MAX_SESSION_ROUNDS
+                            )
+                        ]
+                    )
+            except Exception as err:
+                return {"index": index, "error": str(err)}
+
+            return {"index": index, "response": response}
+
+    async def stream_results() -> AsyncGenerator[str]:
+        tasks = [
+            asyncio.create_task(run(index, messages))
+            for index, messages in enumerate(data.conversations)
+        ]
+        try:
+            for result in asyncio.as_completed(tasks):
+                yield json.dumps(await result) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+@app.post("/search")
+async def search(data: SearchData) -> JSONResponse:
+    """Receives a POST request with many search queries following the `SearchData` model.
+
+    Only the retrieval half of the pipeline runs: The texts of all hybrid and semantic queries
+    are embedded in one batch, and all queries are sent to Qdrant in a single batch request.
+
+    Args:
+        data (SearchData): The POST request payload; Must include `queries`, each with a `mode`
+            ("hybrid", "semantic" or "keyword"), its `query` text and/or `keywords`, and an optional `limit`.
+
+    Returns:
+        JSONResponse: The search results of each query, in input order, with a `Server-Timing` header.
+
+    """
+    with telemetry.start_trace("search", queries=len(data.queries)) as trace:
+        texts = [query.query for query in data.queries if query.mode != "keyword"]
+        embeddings = iter(
+            await config.get_embed().generate_embeddings(texts) if texts else []
+        )
+
+        searches: list[SearchRequest] = []
+        for query in data.queries:
+            match query.mode:
+                case "hybrid":
+                    searches.append(
+                        {
+                            "mode": "hybrid",
+                            "query": next(embeddings),
+                            "keywords": query.keywords,
+                            "limit": query.limit,
+                        }
+                    )
+                case "semantic":
+                    searches.append(
+                        {
+                            "mode": "semantic",
+                            "query": next(embeddings),
+                            "limit": query.limit,
+                        }
+                    )
+                case "keyword":
+                    searches.append(
+                        {
+                            "mode": "keyword",
+                            "keywords": query.keywords,
+                            "limit": query.limit,
+                        }
+                    )
+
+        results = await config.get_search().batch_search(searches)
+
+    return JSONResponse(
+        {"results": results}, headers={"Server-Timing": trace.server_timing()}
+    )
+
 
-        return JSONResponse({"response": buffer})
+@app.get("/metrics")
+async def metrics() -> Response:
+    """Expose the application metrics in the Prometheus text format."""
+    return Response(
+        telemetry.render_metrics(), media_type=telemetry.CONTENT_TYPE_LATEST
+    )
 
 
 def api() -> None:  # pragma: no cover
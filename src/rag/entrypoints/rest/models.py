@@ -3,13 +3,32 @@
 This module defines models that are used to validate and parse
 the JSON payloads sent to the REST API. These models MUST be
 respected by the request of they will be rejected.
+
+Long conversations are costly to validate into models and dump back to dicts, so the chat
+endpoint instead validates its raw JSON body straight into dicts with `parse_chat_payload`, in a
+single pass, against the TypedDict mirrors of the message models in `rest.wire`. Streamed answers are sent back as events encoded by `encode_sse`.
 """
 
-from typing import Literal
+import json
+from typing import Annotated, Any, Literal, TypedDict, cast
+
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, Field, RootModel, TypeAdapter, ValidationError
+
+from rag import config, types
 
-from pydantic import BaseModel, RootModel
+from . import wire
 
-__all__ = ["BaseModel", "Messages"]
+__all__ = [
+    "BaseModel",
+    "ChatPayload",
+    "Messages",
+    "SearchQuery",
+    "UserMessage",
+    "chat_payload_openapi",
+    "encode_sse",
+    "parse_chat_payload",
+]
 
 
 class Function(BaseModel):
@@ -36,6 +55,8 @@ class ToolMessage(BaseModel):
 
 
 class UserMessage(BaseModel):
+    """A message with role "user" and content."""
+
     role: Literal["user"]
     content: str
 
@@ -49,3 +70,116 @@ class Messages(RootModel):
     """Messages represents a list of UserMessage, AssistantMessage, ToolMessage."""
 
     root: list[SystemMessage | AssistantMessage | ToolMessage | UserMessage]
+
+
+# Each query returns at most `SEARCH_LIMIT` documents, like the agent's searches
+type SearchLimit = Annotated[int, Field(ge=1, le=config.settings.search_limit)]
+
+
+class HybridQuery(BaseModel):
+    mode: Literal["hybrid"]
+    query: str
+    keywords: list[str]
+    limit: SearchLimit = config.settings.search_limit
+
+
+class SemanticQuery(BaseModel):
+    mode: Literal["semantic"]
+    query: str
+    limit: SearchLimit = config.settings.search_limit
+
+
+class KeywordQuery(BaseModel):
+    mode: Literal["keyword"]
+    keywords: list[str]
+    limit: SearchLimit = config.settings.search_limit
+
+
+type SearchQuery = Annotated[
+    HybridQuery | SemanticQuery | KeywordQuery, Field(discriminator="mode")
+]
+
+
+class ChatPayload(TypedDict):
+    """The chat endpoint payload, as plain dicts that can be passed to the `Agent`."""
+
+    model: str
+    messages: types.Messages
+
+
+class _WirePayload(TypedDict):
+    model: str
+    messages: list[wire.ChatMessage]
+
+
+_chat_payload = TypeAdapter(_WirePayload)
+
+
+def parse_chat_payload(body: bytes) -> ChatPayload:
+    """Validate a raw JSON chat payload into dicts, without building intermediate models.
+
+    The body is accepted or rejected, with the same errors, exactly as the `Data` model would.
+
+    Args:
+        body (bytes): The raw request body.
+
+    Returns:
+        ChatPayload: The validated payload.
+
+    Raises:
+        RequestValidationError: If the body is not valid JSON or does not follow `ChatPayload`;
+            FastAPI answers it with a 422 response, like for the bodies it validates itself.
+
+    """
+    try:
+        # The wire messages are valid `rag.types` messages
+        return cast(ChatPayload, _chat_payload.validate_json(body))
+    except ValidationError as err:
+        raise RequestValidationError(
+            [
+                {**error, "loc": ("body", *error["loc"])}
+                for error in err.errors(include_url=False)
+            ],
+            body=body,
+        ) from err
+
+
+def chat_payload_openapi(path: str) -> dict[str, Any]:
+    """Return the OpenAPI request body of an endpoint that calls `parse_chat_payload`.
+
+    FastAPI only documents the bodies it validates itself. The schema definitions are
+    referenced where they end up in the OpenAPI document, under the endpoint's POST operation.
+
+    Args:
+        path (str): The path of the endpoint.
+
+    Returns:
+        dict[str, Any]: The `openapi_extra` of the endpoint.
+
+    """
+    pointer = path.replace("~", "~0").replace("/", "~1")
+    schema = _chat_payload.json_schema(
+        ref_template=f"#/paths/{pointer}/post/requestBody/content/application~1json/schema/$defs/{{model}}"
+    )
+
+    return {
+        "requestBody": {
+            "content": {"application/json": {"schema": schema}},
+            "required": True,
+        }
+    }
+
+
+def encode_sse(data: object, event: str | None = None) -> str:
+    """Encode `data` as the JSON data of one Server-Sent Event.
+
+    Args:
+        data (object): The JSON-serializable data of the event.
+        event (str, optional): The name of the event; None for unnamed (`message`) events. Defaults to None.
+
+    Returns:
+        str: The event, terminated by a blank line.
+
+    """
+    encoded = f"data: {json.dumps(data)}\n\n"
+    return encoded if event is None else f"event: {event}\n{encoded}"
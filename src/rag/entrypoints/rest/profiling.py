@@ -0,0 +1,113 @@
+"""`rest.profiling` profiles a sample of the API's requests with `telemetry.profile`.
+
+A request is profiled if it carries the profiling header with the secret `token` as its value,
+or otherwise at random, with probability `sample_rate`. Its profile covers the whole response,
+including streamed bodies, and is written to `directory` once the response is complete.
+
+Profiles are started at most once every `min_interval` seconds, flagged or not, so that neither
+the sampling overhead nor the files written grow with the traffic.
+
+Profiling never fails the request it samples: If the sampler cannot start (e.g. outside of the main
+thread, under a threaded server) or the profile cannot be written, the request is served as usual
+and the failure is counted in the `rag_profiles` metric.
+"""
+
+import asyncio
+import hmac
+import random
+import time
+from collections.abc import Callable
+from contextlib import ExitStack
+from pathlib import Path
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from rag import telemetry
+
+__all__ = ["ProfilingMiddleware"]
+
+
+class ProfilingMiddleware:
+    """ASGI middleware writing a sampling profile of selected requests to a directory."""
+
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        app: ASGIApp,
+        directory: Path,
+        sample_rate: float = 0.0,
+        header: str = "X-Profile",
+        token: str | None = None,
+        min_interval: float = 10.0,
+        interval: float = 0.005,
+        format: telemetry.ProfileFormat = "speedscope",  # noqa: A002
+        _random: Callable[[], float] = random.random,
+    ) -> None:
+        """Initialize a ProfilingMiddleware.
+
+        Args:
+            app (ASGIApp): The app to profile.
+            directory (Path): Where the profiles are written.
+            sample_rate (float, optional): Probability of profiling a request that is not flagged. Defaults to 0.0.
+            header (str, optional): The header that flags requests to profile. Defaults to "X-Profile".
+            token (str, optional): The secret value of the header; None ignores the header. Defaults to None.
+            min_interval (float, optional): Minimum seconds between the starts of two profiles. Defaults to 10.0.
+            interval (float, optional): Seconds of CPU time between samples. Defaults to 0.005.
+            format (str, optional): "speedscope" or "folded" (collapsed stacks). Defaults to "speedscope".
+            _random (Callable, optional): The random number generator used for sampling. Defaults to `random.random`.
+
+        """
+        self.app = app
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.header = header.lower().encode()
+        self.token = token.encode() if token is not None else None
+        self.min_interval = min_interval
+        self.started = float("-inf")
+        self.interval = interval
+        self.format = format
+        self.random = _random
+
+    def _selected(self, scope: Scope) -> bool:
+        now = time.monotonic()
+        if now - self.started < self.min_interval:
+            return False
+
+        flagged = self.token is not None and any(
+            name == self.header and hmac.compare_digest(value, self.token)
+            for name, value in scope["headers"]
+        )
+
+        if flagged or (self.sample_rate > 0 and self.random() < self.sample_rate):
+            self.started = now
+            return True
+
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Serve the request, profiling it if it is selected."""
+        if scope["type"] != "http" or not self._selected(scope):
+            await self.app(scope, receive, send)
+            return
+
+        with ExitStack() as stack:
+            try:
+                profile = stack.enter_context(
+                    telemetry.profile(
+                        f"{scope['method']} {scope['path']}", self.interval
+                    )
+                )
+            except RuntimeError:
+                telemetry.record_profile("unavailable")
+                profile = None
+
+            await self.app(scope, receive, send)
+
+        if profile is None:
+            return
+
+        try:
+            await asyncio.to_thread(profile.write, self.directory, self.format)
+        except OSError:
+            telemetry.record_profile("error")
+        else:
+            telemetry.record_profile("written")
@@ -0,0 +1,110 @@
+"""`rest.sessions` keeps conversation histories on the server between requests.
+
+In session mode, clients send a session ID and only their new message instead of the whole history.
+Histories are kept in a bounded in-memory LRU with a time-to-live. With a directory configured,
+they are also written to disk, so they survive restarts and evictions from memory.
+"""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from pathlib import Path
+from weakref import WeakValueDictionary
+
+from rag import telemetry
+from rag.types import Messages
+
+__all__ = ["SessionStore"]
+
+
+class SessionStore:
+    """A bounded store of conversation histories with LRU and TTL eviction."""
+
+    def __init__(
+        self, max_sessions: int = 10_000, ttl: float = 3600, path: Path | None = None
+    ) -> None:
+        """Initialize a SessionStore.
+
+        Args:
+            max_sessions (int, optional): Histories kept in memory; The least recently used are evicted. Defaults to 10000.
+            ttl (float, optional): Seconds after its last use when a session expires. Defaults to 3600.
+            path (Path, optional): Also persist histories as JSON files in this directory. Defaults to None.
+
+        """
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.path = path
+        self._sessions: OrderedDict[str, tuple[float, Messages]] = OrderedDict()
+        self._locks: WeakValueDictionary[str, asyncio.Lock] = WeakValueDictionary()
+
+        if self.path is not None:
+            self.path.mkdir(parents=True, exist_ok=True)
+
+    def _file(self, session_id: str) -> Path | None:
+        # Session IDs come from clients; Only plain names may become file names
+        if self.path is None or not session_id.replace("-", "").isalnum():
+            return None
+        return self.path / f"{session_id}.json"
+
+    def _load(self, session_id: str) -> Messages | None:
+        if (file := self._file(session_id)) is None:
+            return None
+
+        try:
+            if time.time() - file.stat().st_mtime > self.ttl:
+                file.unlink(missing_ok=True)
+                return None
+            return json.loads(file.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, session_id: str, messages: Messages) -> None:
+        if (file := self._file(session_id)) is not None:
+            file.write_text(json.dumps(messages))
+
+    @asynccontextmanager
+    async def lock(self, session_id: str) -> AsyncIterator[None]:
+        """Serialize the turns of one session across concurrent requests."""
+        lock = self._locks.setdefault(session_id, asyncio.Lock())
+        async with lock:
+            yield
+
+    async def get(self, session_id: str) -> Messages | None:
+        """Return the history of a session, or None if it does not exist or expired."""
+        now = time.monotonic()
+
+        if (entry := self._sessions.get(session_id)) is not None:
+            used, messages = entry
+            if now - used <= self.ttl:
+                self._sessions.move_to_end(session_id)
+                telemetry.record_cache("sessions", hit=True)
+                return messages
+            del self._sessions[session_id]
+
+        telemetry.record_cache("sessions", hit=False)
+
+        if self.path is None:
+            return None
+
+        loaded = await asyncio.to_thread(self._load, session_id)
+        if loaded is not None:
+            self._remember(session_id, loaded, now)
+
+        return loaded
+
+    async def put(self, session_id: str, messages: Messages) -> None:
+        """Store the history of a session and mark it as recently used."""
+        self._remember(session_id, messages, time.monotonic())
+
+        if self.path is not None:
+            await asyncio.to_thread(self._save, session_id, messages)
+
+    def _remember(self, session_id: str, messages: Messages, now: float) -> None:
+        self._sessions[session_id] = (now, messages)
+        self._sessions.move_to_end(session_id)
+
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
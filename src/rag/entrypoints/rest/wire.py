@@ -0,0 +1,67 @@
+"""`rest.wire` mirrors the chat message models of `rest.models` as TypedDicts.
+
+`parse_chat_payload` validates chat bodies with these types to get plain dicts without building
+models. Their fields, and their names (which Pydantic uses in the locations of union errors), are
+the same as the models', so a body is rejected, with the same errors, exactly when `Data` rejects it.
+"""
+
+from typing import Literal, TypedDict
+
+__all__ = [
+    "AssistantMessage",
+    "ChatMessage",
+    "Function",
+    "SystemMessage",
+    "ToolCall",
+    "ToolMessage",
+    "UserMessage",
+]
+
+
+class Function(TypedDict):
+    """The function called by a `ToolCall`."""
+
+    name: str
+    arguments: str
+
+
+class ToolCall(TypedDict):
+    """A tool call of an assistant message."""
+
+    id: str
+    type: Literal["function"]
+    function: Function
+
+
+class AssistantMessage(TypedDict):
+    """A message with role "assistant", content and tool_calls, both nullable."""
+
+    role: Literal["assistant"]
+    content: str | None
+    tool_calls: list[ToolCall] | None
+
+
+class ToolMessage(TypedDict):
+    """A message with role "tool", tool_call_id and content."""
+
+    role: Literal["tool"]
+    tool_call_id: str
+    content: str
+
+
+class UserMessage(TypedDict):
+    """A message with role "user" and content."""
+
+    role: Literal["user"]
+    content: str
+
+
+class SystemMessage(TypedDict):
+    """A message with role "system" and content."""
+
+    role: Literal["system"]
+    content: str
+
+
+# Not discriminated, like `rest.models.Messages`: Each message is tried against every type
+type ChatMessage = SystemMessage | AssistantMessage | ToolMessage | UserMessage
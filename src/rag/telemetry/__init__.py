@@ -0,0 +1,50 @@
+"""`rag.telemetry` records where the time of a request goes.
+
+Components and the `Agent` wrap each stage of their work with `stage`, which feeds
+Prometheus histograms and in-flight gauges and, when a trace is active, its span tree.
+The entrypoints expose the collected metrics and attach each request's timing breakdown to its response.
+
+Modules:
+    metrics: Prometheus metrics, the `stage` timer and the label context.
+    tracing: Per-request span trees, `Server-Timing` summaries and the JSONL exporter.
+    otel: Optional export of traces to an OpenTelemetry collector.
+    profiling: Opt-in sampling profiles of selected requests, broken down by stage.
+"""
+
+from .metrics import (
+    CONTENT_TYPE_LATEST,
+    record_cache,
+    record_cascade,
+    record_compaction,
+    record_profile,
+    record_replica_request,
+    record_shard_failure,
+    render_metrics,
+    stage,
+    stream_timer,
+    tool_context,
+)
+from .profiling import Profile, ProfileFormat, profile
+from .tracing import Trace, configure_tracing, current_span, span, start_trace
+
+__all__ = [
+    "CONTENT_TYPE_LATEST",
+    "Profile",
+    "ProfileFormat",
+    "Trace",
+    "configure_tracing",
+    "current_span",
+    "profile",
+    "record_cache",
+    "record_cascade",
+    "record_compaction",
+    "record_profile",
+    "record_replica_request",
+    "record_shard_failure",
+    "render_metrics",
+    "span",
+    "stage",
+    "start_trace",
+    "stream_timer",
+    "tool_context",
+]
@@ -0,0 +1,271 @@
+"""`telemetry.metrics` defines the Prometheus metrics recorded by the application.
+
+Stages also open a span in the active trace (see `telemetry.tracing`).
+
+Every observation is labelled by the model that drives the request and by the tool being executed.
+Both labels are read from context variables set by the `Agent`, so components do not need to know them.
+Label children are resolved once per stage and observations are plain counter/histogram updates,
+which keeps the overhead low enough to leave the instrumentation on in production.
+"""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+from .tracing import current_span, span
+
+__all__ = [
+    "CONTENT_TYPE_LATEST",
+    "StreamTimer",
+    "record_cache",
+    "record_cascade",
+    "record_compaction",
+    "record_profile",
+    "record_replica_request",
+    "record_shard_failure",
+    "render_metrics",
+    "stage",
+    "stream_timer",
+    "tool_context",
+]
+
+_model: ContextVar[str] = ContextVar("rag_model", default="")
+_tool: ContextVar[str] = ContextVar("rag_tool", default="")
+
+STAGE_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+)
+
+TOKEN_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+
+STAGE_SECONDS = Histogram(
+    "rag_stage_duration_seconds",
+    "Time spent in each stage of the RAG pipeline.",
+    ["stage", "model", "tool"],
+    buckets=STAGE_BUCKETS,
+)
+
+STAGE_IN_FLIGHT = Gauge(
+    "rag_stage_in_flight",
+    "Number of stages currently executing.",
+    ["stage"],
+)
+
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "rag_llm_time_to_first_token_seconds",
+    "Time from sending a chat completion request to receiving its first token.",
+    ["model"],
+    buckets=STAGE_BUCKETS,
+)
+
+LLM_INTER_TOKEN = Histogram(
+    "rag_llm_inter_token_seconds",
+    "Time between consecutive chunks of a chat completion stream.",
+    ["model"],
+    buckets=TOKEN_BUCKETS,
+)
+
+LLM_TOKENS = Counter(
+    "rag_llm_tokens",
+    "Completion tokens streamed by the LLM, counted as content chunks.",
+    ["model"],
+)
+
+CACHE_REQUESTS = Counter(
+    "rag_cache_requests",
+    "Cache lookups by cache name and result (hit or miss).",
+    ["cache", "result"],
+)
+
+SHARD_FAILURES = Counter(
+    "rag_shard_failures",
+    "Shards left out of a fanned-out search, by shard and reason (timeout or error).",
+    ["shard", "reason"],
+)
+
+CASCADE_ROUNDS = Counter(
+    "rag_cascade_rounds",
+    "Rounds of cascaded models by route: answered by the fast model (fast), escalated by it, or sent to the large one (large).",
+    ["model", "route"],
+)
+
+CASCADE_TOKENS = Counter(
+    "rag_cascade_tokens",
+    "Estimated prompt and completion tokens of cascaded rounds, by the route that served them.",
+    ["model", "route"],
+)
+
+PROFILES = Counter(
+    "rag_profiles",
+    "Requests selected for profiling, by outcome (written, unavailable if sampling could not start, or error).",
+    ["outcome"],
+)
+
+REPLICA_REQUESTS = Counter(
+    "rag_replica_requests",
+    "Queries sent to each replica, by outcome (ok, error, hedged or cancelled).",
+    ["replica", "outcome"],
+)
+
+PROMPT_TOKENS_SAVED = Counter(
+    "rag_prompt_tokens_saved",
+    "Estimated prompt tokens removed from the conversation history by compaction.",
+    ["model"],
+)
+
+
+@contextmanager
+def tool_context(model: str, tool: str = "") -> Iterator[None]:
+    """Label every stage recorded inside the block with the given model and tool name."""
+    model_token = _model.set(model)
+    tool_token = _tool.set(tool)
+    try:
+        yield
+    finally:
+        _tool.reset(tool_token)
+        _model.reset(model_token)
+
+
+@contextmanager
+def stage(name: str, model: str | None = None) -> Iterator[None]:
+    """Time a pipeline stage and track it as in-flight while it runs.
+
+    Args:
+        name (str): The name of the stage, e.g. "embed" or "qdrant_query".
+        model (str, optional): The model label. Defaults to the model of the current tool context.
+
+    """
+    tool = _tool.get()
+    histogram = STAGE_SECONDS.labels(
+        name, _model.get() if model is None else model, tool
+    )
+    in_flight = STAGE_IN_FLIGHT.labels(name)
+
+    in_flight.inc()
+    start = perf_counter()
+    try:
+        with span(name, tool=tool) if tool else span(name):
+            yield
+    finally:
+        histogram.observe(perf_counter() - start)
+        in_flight.dec()
+
+
+class StreamTimer:
+    """Record time to first token, inter-token latency and token counts of one LLM stream."""
+
+    def __init__(self, model: str) -> None:
+        """Start timing a stream for the given model."""
+        self.model = model
+        self.tokens = 0
+        self.last: float | None = None
+        self.first_token: float | None = None
+        self._ttft = LLM_TIME_TO_FIRST_TOKEN.labels(model)
+        self._inter_token = LLM_INTER_TOKEN.labels(model)
+        self._in_flight = STAGE_IN_FLIGHT.labels("llm_round")
+        self._in_flight.inc()
+        parent = current_span()
+        self.span = parent.child("llm_round", model=model) if parent else None
+        self.start = perf_counter()
+
+    def tick(self, token: bool = False) -> None:
+        """Mark the arrival of a chunk; `token` marks it as a content token."""
+        now = perf_counter()
+
+        if self.last is None:
+            self.first_token = now - self.start
+            self._ttft.observe(self.first_token)
+        else:
+            self._inter_token.observe(now - self.last)
+
+        self.last = now
+        self.tokens += token
+
+    def close(self) -> None:
+        """Stop timing and record the round duration and token count."""
+        STAGE_SECONDS.labels("llm_round", self.model, _tool.get()).observe(
+            perf_counter() - self.start
+        )
+        LLM_TOKENS.labels(self.model).inc(self.tokens)
+        self._in_flight.dec()
+
+        if self.span is not None:
+            self.span.finish()
+            self.span.attributes["tokens"] = self.tokens
+            if self.first_token is not None:
+                self.span.attributes["ttft_ms"] = round(self.first_token * 1000, 3)
+
+
+def stream_timer(model: str) -> StreamTimer:
+    """Start a `StreamTimer` for an LLM stream of the given model."""
+    return StreamTimer(model)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count a lookup on the named cache as a hit or a miss."""
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def record_cascade(model: str, route: str, tokens: int) -> None:
+    """Count a round of a cascaded model by route and annotate the current span with it."""
+    CASCADE_ROUNDS.labels(model, route).inc()
+    CASCADE_TOKENS.labels(model, route).inc(tokens)
+
+    if (parent := current_span()) is not None:
+        parent.attributes["cascade"] = route
+
+
+def record_profile(outcome: str) -> None:
+    """Count a request selected for profiling by the outcome of its profile."""
+    PROFILES.labels(outcome).inc()
+
+
+def record_replica_request(replica: str, outcome: str) -> None:
+    """Count a query sent to a replica by its outcome."""
+    REPLICA_REQUESTS.labels(replica, outcome).inc()
+
+
+def record_shard_failure(shard: str, reason: str) -> None:
+    """Count a shard left out of a search and annotate the current span with it."""
+    SHARD_FAILURES.labels(shard, reason).inc()
+
+    if (parent := current_span()) is not None:
+        parent.attributes[f"shard_{shard}"] = reason
+
+
+def record_compaction(model: str, tokens: int, saved: int) -> None:
+    """Count the prompt tokens saved by compaction and annotate the current span with them."""
+    PROMPT_TOKENS_SAVED.labels(model).inc(saved)
+
+    if (parent := current_span()) is not None:
+        parent.attributes["prompt_tokens"] = tokens
+        parent.attributes["saved_tokens"] = saved
+
+
+def render_metrics(registry: CollectorRegistry = REGISTRY) -> bytes:
+    """Render all metrics of the registry in the Prometheus text format."""
+    return generate_latest(registry)
@@ -0,0 +1,72 @@
+"""`telemetry.otel` exports finished traces to an OpenTelemetry collector.
+
+OpenTelemetry is an optional dependency; Install the `otel` extra to use this exporter.
+Spans are recreated from the finished span tree with their original timestamps and
+handed to a batch processor, so exporting never blocks the request.
+"""
+
+from typing import TYPE_CHECKING
+
+from .tracing import Span, Trace
+
+if TYPE_CHECKING:
+    from opentelemetry.context import Context
+
+__all__ = ["OTelExporter"]
+
+
+class OTelExporter:
+    """Export traces to an OTLP/HTTP endpoint."""
+
+    def __init__(self, endpoint: str, service_name: str = "rag") -> None:
+        """Initialize an OTelExporter.
+
+        Args:
+            endpoint (str): The OTLP/HTTP traces endpoint of the collector, e.g. "http://localhost:4318/v1/traces".
+            service_name (str, optional): The service name reported to the collector. Defaults to "rag".
+
+        Raises:
+            ImportError: If the `otel` extra is not installed.
+
+        """
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import (  # noqa: PLC0415
+                OTLPSpanExporter,
+            )
+            from opentelemetry.sdk.resources import Resource  # noqa: PLC0415
+            from opentelemetry.sdk.trace import TracerProvider  # noqa: PLC0415
+            from opentelemetry.sdk.trace.export import (  # noqa: PLC0415
+                BatchSpanProcessor,
+            )
+            from opentelemetry.trace import set_span_in_context  # noqa: PLC0415
+        except ImportError as err:
+            raise ImportError(
+                "Exporting traces to OpenTelemetry requires the `otel` extra: `uv sync --extra otel`"
+            ) from err
+
+        self.provider = TracerProvider(
+            resource=Resource.create({"service.name": service_name})
+        )
+        self.provider.add_span_processor(
+            BatchSpanProcessor(OTLPSpanExporter(endpoint=endpoint))
+        )
+        self.tracer = self.provider.get_tracer("rag")
+        self.set_span_in_context = set_span_in_context
+
+    def export(self, trace: Trace) -> None:
+        """Recreate the span tree of the trace as OpenTelemetry spans."""
+        self._emit(trace, trace.root, None)
+
+    def _emit(self, trace: Trace, span: Span, context: "Context | None") -> None:
+        otel_span = self.tracer.start_span(
+            span.name,
+            context=context,
+            start_time=trace.epoch_ns(span.start),
+            attributes=span.attributes,
+        )
+        child_context = self.set_span_in_context(otel_span)
+
+        for child in span.children:
+            self._emit(trace, child, child_context)
+
+        otel_span.end(end_time=trace.epoch_ns(span.start + span.duration))
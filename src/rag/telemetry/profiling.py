@@ -0,0 +1,212 @@
+"""`telemetry.profiling` samples where the Python time of selected requests goes.
+
+A `Profile` is collected for the duration of a `profile` block. While any profile is active, a `SIGPROF`
+interval timer interrupts the main thread every `interval` seconds of CPU time. The signal handler walks
+the interrupted stack and, if the running task belongs to a profiled block, adds it to that profile under
+the innermost open span of its trace, i.e. the current `stage`. Other requests are interrupted too, but
+the handler returns at once, so profiling a sample of requests costs little more than their own samples.
+
+Finished profiles are written to a directory in one of two formats:
+    - "speedscope": A https://speedscope.app file with one profile for the whole block, rooted
+      at its stages, and one profile per stage.
+    - "folded": Collapsed stacks, rooted at their stage, for `flamegraph.pl` or `inferno`.
+
+Sampling relies on `SIGPROF`, so it is only available on Unix, in an event loop running in the main thread.
+CPU time spent in other threads (e.g. `asyncio.to_thread`) is attributed to the main thread's running task.
+"""
+
+import json
+import signal
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from types import FrameType
+from typing import Any, Literal
+from uuid import uuid4
+
+from .tracing import current_span
+
+__all__ = ["Profile", "ProfileFormat", "profile"]
+
+type ProfileFormat = Literal["speedscope", "folded"]
+
+type Frame = tuple[str, str, int]
+
+# Samples taken outside of any span of a trace
+OUTSIDE_STAGES = "request"
+
+
+class Profile:
+    """The stack samples of one profiled block, grouped by stage."""
+
+    def __init__(self, name: str) -> None:
+        """Start an empty profile with the given name."""
+        self.name = name
+        self.interval = 0.0
+        self.timestamp = time.time()
+        self.samples: Counter[tuple[str, tuple[Frame, ...]]] = Counter()
+
+    def sample(self, frame: FrameType | None) -> None:
+        """Add the stack of `frame`, outermost first, to the current stage."""
+        stack: list[Frame] = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append((code.co_qualname, code.co_filename, code.co_firstlineno))
+            frame = frame.f_back
+
+        stage = span.name if (span := current_span()) is not None else OUTSIDE_STAGES
+        self.samples[stage, tuple(reversed(stack))] += 1
+
+    def stages(self) -> dict[str, float]:
+        """Return the sampled CPU seconds of each stage, in decreasing order."""
+        counts: Counter[str] = Counter()
+        for (stage, _), count in self.samples.items():
+            counts[stage] += count
+        return {stage: count * self.interval for stage, count in counts.most_common()}
+
+    def to_folded(self) -> str:
+        """Serialize the samples as collapsed stacks, with the stage as root frame."""
+        return "".join(
+            ";".join(
+                [stage, *(f"{name} ({file}:{line})" for name, file, line in stack)]
+            )
+            + f" {count}\n"
+            for (stage, stack), count in self.samples.items()
+        )
+
+    def to_speedscope(self) -> dict[str, Any]:
+        """Serialize the samples in the speedscope file format, with weights in seconds."""
+        frames: dict[Frame, int] = {}
+
+        def index(frame: Frame) -> int:
+            return frames.setdefault(frame, len(frames))
+
+        def sampled(
+            name: str, stacks: list[list[int]], counts: list[int]
+        ) -> dict[str, Any]:
+            weights = [count * self.interval for count in counts]
+            return {
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": stacks,
+                "weights": weights,
+            }
+
+        profiles = [sampled(self.name, [], [])]
+        for stage in self.stages():
+            stacks, counts = [], []
+            for (sample_stage, stack), count in self.samples.items():
+                if sample_stage == stage:
+                    stacks.append([index(frame) for frame in stack])
+                    counts.append(count)
+
+            stage_frame = index((f"[{stage}]", "", 0))
+            profiles[0]["samples"].extend([stage_frame, *s] for s in stacks)
+            profiles[0]["weights"].extend(count * self.interval for count in counts)
+            profiles.append(sampled(f"{self.name} [{stage}]", stacks, counts))
+
+        profiles[0]["endValue"] = sum(profiles[0]["weights"])
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": self.name,
+            "exporter": "rag.telemetry",
+            "activeProfileIndex": 0,
+            "shared": {
+                "frames": [
+                    {"name": name, "file": file, "line": line}
+                    if file
+                    else {"name": name}
+                    for name, file, line in frames
+                ]
+            },
+            "profiles": profiles,
+        }
+
+    def write(self, directory: Path, format: ProfileFormat = "speedscope") -> Path:  # noqa: A002
+        """Write the profile to a new file in `directory` and return its path."""
+        directory.mkdir(parents=True, exist_ok=True)
+
+        slug = "".join(c if c.isalnum() else "-" for c in self.name).strip("-")
+        stem = f"{time.strftime('%Y%m%dT%H%M%S', time.localtime(self.timestamp))}-{slug}-{uuid4().hex[:8]}"
+
+        if format == "folded":
+            path = directory / f"{stem}.folded"
+            path.write_text(self.to_folded())
+        else:
+            path = directory / f"{stem}.speedscope.json"
+            path.write_text(json.dumps(self.to_speedscope()))
+
+        return path
+
+
+class _Sampler:
+    """The process-wide `SIGPROF` timer, running while at least one profile is active."""
+
+    def __init__(self) -> None:
+        self.active = 0
+        self.interval = 0.0
+        self.previous_handler: Any = None
+
+    def start(self, interval: float) -> float:
+        if threading.current_thread() is not threading.main_thread():
+            raise RuntimeError("Profiling requires an event loop in the main thread")
+        if not hasattr(signal, "SIGPROF"):
+            raise RuntimeError("Profiling requires SIGPROF, which this platform lacks")
+
+        if self.active == 0:
+            self.interval = interval
+            self.previous_handler = signal.signal(signal.SIGPROF, _sample)
+            signal.setitimer(signal.ITIMER_PROF, interval, interval)
+
+        self.active += 1
+        return self.interval
+
+    def stop(self) -> None:
+        self.active -= 1
+
+        if self.active == 0:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.signal(signal.SIGPROF, self.previous_handler)
+
+
+_profile: ContextVar[Profile | None] = ContextVar("rag_profile", default=None)
+
+_sampler = _Sampler()
+
+
+def _sample(signum: int, frame: FrameType | None) -> None:
+    if (profile := _profile.get()) is not None:
+        profile.sample(frame)
+
+
+@contextmanager
+def profile(name: str, interval: float = 0.005) -> Iterator[Profile]:
+    """Sample the block, including the tasks it starts, into a new `Profile`.
+
+    Args:
+        name (str): The name of the profile, e.g. the request's method and path.
+        interval (float, optional): Seconds of CPU time between samples; Ignored if another profile is already active. Defaults to 0.005.
+
+    Raises:
+        RuntimeError: If not called from the main thread, or on a platform without `SIGPROF`.
+
+    """
+    collected = Profile(name)
+    collected.interval = _sampler.start(interval)
+
+    previous = _profile.get()
+    _profile.set(collected)
+    try:
+        yield collected
+    finally:
+        # `set` instead of `reset`: streaming responses may close the block from another context
+        _profile.set(previous)
+        _sampler.stop()
@@ -0,0 +1,207 @@
+"""`telemetry.tracing` records a span tree for each request.
+
+A trace is started by an entrypoint with `start_trace`. Every `stage` recorded while the trace
+is active becomes a child span of the innermost open span, so the tree mirrors the call structure:
+LLM rounds, tool calls and, inside them, embedding, sparse encoding, Qdrant queries and template builds.
+When no trace is active, `span` does nothing, so components can be used without tracing.
+
+Finished traces are handed to the configured exporters (JSONL log, OpenTelemetry collector).
+"""
+
+import json
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Protocol
+from uuid import uuid4
+
+__all__ = [
+    "Exporter",
+    "JsonlExporter",
+    "Span",
+    "Trace",
+    "configure_tracing",
+    "current_span",
+    "span",
+    "start_trace",
+]
+
+type Attribute = str | int | float | bool
+
+
+@dataclass(slots=True)
+class Span:
+    """A timed operation with attributes and child spans."""
+
+    name: str
+    attributes: dict[str, Attribute] = field(default_factory=dict)
+    start: float = field(default_factory=perf_counter)
+    end: float | None = None
+    children: list["Span"] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        """Duration of the span in seconds; Open spans are measured up to now."""
+        return (self.end if self.end is not None else perf_counter()) - self.start
+
+    def child(self, name: str, **attributes: Attribute) -> "Span":
+        """Open a new span as a child of this one."""
+        child = Span(name, attributes)
+        self.children.append(child)
+        return child
+
+    def finish(self) -> None:
+        """Close the span."""
+        self.end = perf_counter()
+
+    def walk(self) -> Iterator["Span"]:
+        """Iterate over this span and all of its descendants, depth first."""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def to_dict(self, origin: float) -> dict[str, Any]:
+        """Serialize the span tree with times in milliseconds relative to `origin`."""
+        return {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3),
+            "attributes": self.attributes,
+            "children": [child.to_dict(origin) for child in self.children],
+        }
+
+
+class Trace:
+    """The span tree of a single request."""
+
+    def __init__(self, name: str, **attributes: Attribute) -> None:
+        """Start a trace with a root span of the given name."""
+        self.trace_id = uuid4().hex
+        self.timestamp = time.time_ns()
+        self.root = Span(name, attributes)
+
+    def epoch_ns(self, instant: float) -> int:
+        """Convert a `perf_counter` instant of this trace to nanoseconds since the epoch."""
+        return self.timestamp + int((instant - self.root.start) * 1e9)
+
+    def server_timing(self) -> str:
+        """Summarize the trace as a `Server-Timing` header value.
+
+        Spans with the same name are aggregated; Their count is reported in the description.
+        """
+        durations: defaultdict[str, float] = defaultdict(float)
+        counts: defaultdict[str, int] = defaultdict(int)
+
+        for node in self.root.walk():
+            if node is not self.root:
+                durations[node.name] += node.duration
+                counts[node.name] += 1
+
+        metrics = [
+            f'{name};dur={duration * 1000:.1f};desc="{counts[name]}x"'
+            for name, duration in durations.items()
+        ]
+        metrics.append(f"total;dur={self.root.duration * 1000:.1f}")
+
+        return ", ".join(metrics)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Serialize the trace and its span tree."""
+        return {
+            "trace_id": self.trace_id,
+            "timestamp": self.timestamp,
+            **self.root.to_dict(self.root.start),
+        }
+
+
+class Exporter(Protocol):
+    """Protocol for a destination of finished traces."""
+
+    def export(self, trace: Trace) -> None:
+        """Export a finished trace."""
+        ...
+
+
+class JsonlExporter:
+    """Append each finished trace as one JSON line to a log file."""
+
+    def __init__(self, path: Path) -> None:
+        """Initialize a JsonlExporter writing to `path`, creating parent directories as needed."""
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def export(self, trace: Trace) -> None:
+        """Append the trace to the log file."""
+        with self.path.open("a") as file:
+            file.write(json.dumps(trace.to_dict()) + "\n")
+
+
+_span: ContextVar[Span | None] = ContextVar("rag_span", default=None)
+
+_exporters: list[Exporter] = []
+
+
+def configure_tracing(
+    log_path: Path | None = None,
+    otel_endpoint: str | None = None,
+) -> None:
+    """Set the exporters that receive finished traces.
+
+    Args:
+        log_path (Path, optional): Append traces to this JSONL file. Defaults to None.
+        otel_endpoint (str, optional): Export traces to this OTLP/HTTP collector endpoint. Defaults to None.
+
+    """
+    _exporters.clear()
+
+    if log_path is not None:
+        _exporters.append(JsonlExporter(log_path))
+
+    if otel_endpoint is not None:
+        from .otel import OTelExporter  # noqa: PLC0415
+
+        _exporters.append(OTelExporter(otel_endpoint))
+
+
+def current_span() -> Span | None:
+    """Return the innermost open span of the active trace, if any."""
+    return _span.get()
+
+
+@contextmanager
+def start_trace(name: str, **attributes: Attribute) -> Iterator[Trace]:
+    """Start a trace for the duration of the block and export it when the block exits."""
+    trace = Trace(name, **attributes)
+
+    previous = _span.get()
+    _span.set(trace.root)
+    try:
+        yield trace
+    finally:
+        trace.root.finish()
+        # `set` instead of `reset`: streaming responses may close the block from another context
+        _span.set(previous)
+
+        for exporter in _exporters:
+            exporter.export(trace)
+
+
+@contextmanager
+def span(name: str, **attributes: Attribute) -> Iterator[Span | None]:
+    """Record the block as a child of the current span; Does nothing outside of a trace."""
+    if (parent := _span.get()) is None:
+        yield None
+        return
+
+    child = parent.child(name, **attributes)
+    _span.set(child)
+    try:
+        yield child
+    finally:
+        child.finish()
+        _span.set(parent)
@@ -1,7 +1,7 @@
 """`types.py` defines common types used to type hint application code."""
 
 from .agent import Agent
-from .chat import Chat, OptionalChat, Stream
+from .chat import Chat, OptionalChat, Stream, StreamPart
 from .embed import Embed, OptionalEmbed
 from .messages import (
     AssistantMessage,
@@ -11,7 +11,7 @@ from .messages import (
     ToolMessage,
     UserMessage,
 )
-from .search import OptionalSearch, Search, SearchResult
+from .search import OptionalSearch, Search, SearchRequest, SearchResult
 
 __all__ = [
     "Agent",
@@ -23,8 +23,10 @@ __all__ = [
     "OptionalEmbed",
     "OptionalSearch",
     "Search",
+    "SearchRequest",
     "SearchResult",
     "Stream",
+    "StreamPart",
     "SystemMessage",
     "Tool",
     "ToolMessage",
@@ -5,10 +5,12 @@ from typing import Any, Protocol, TypedDict
 
 from .messages import Messages, Tool
 
-__all__ = ["Chat", "OptionalChat", "Stream"]
+__all__ = ["Chat", "OptionalChat", "Stream", "StreamPart"]
 
 
 class StreamPart(TypedDict):
+    """A part of a chat stream: Either content or the completed tool calls."""
+
     content: str | None
     tools: list[Tool] | None
 
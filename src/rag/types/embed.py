@@ -21,5 +21,19 @@ class Embed(Protocol):
         """
         ...
 
+    async def generate_embeddings(
+        self, texts: list[str], **kwargs: Any
+    ) -> list[list[float]]:
+        """Generate embeddings from the given texts.
+
+        Args:
+            texts: The texts to generate embeddings from.
+            kwargs: Additional keyword arguments to pass to the model.
+
+        Returns:
+            The embeddings, in the order of the texts.
+        """
+        ...
+
 
 type OptionalEmbed = Embed | None
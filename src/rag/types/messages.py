@@ -25,8 +25,8 @@ class AssistantMessage(TypedDict):
     """A message with role "assistant" and optional tool_calls."""
 
     role: Literal["assistant"]
-    content: NotRequired[str]
-    tool_calls: NotRequired[list["Tool"]]
+    content: NotRequired[str | None]
+    tool_calls: NotRequired[list["Tool"] | None]
 
 
 class ToolMessage(TypedDict):
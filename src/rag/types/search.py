@@ -1,8 +1,8 @@
 """`types.search` defines the search protocol and required return types."""
 
-from typing import Any, Protocol, TypedDict
+from typing import Any, Literal, NotRequired, Protocol, TypedDict
 
-__all__ = ["OptionalSearch", "SearchResult", "SearchResult"]
+__all__ = ["OptionalSearch", "SearchRequest", "SearchResult"]
 
 
 class SearchResult(TypedDict):
@@ -12,6 +12,16 @@ class SearchResult(TypedDict):
     data: dict[str, Any]
 
 
+class SearchRequest(TypedDict):
+    """Type hinting for one search of a batch; `query` is required by hybrid and semantic searches, `keywords` by hybrid and keyword searches."""
+
+    mode: Literal["hybrid", "semantic", "keyword"]
+    query: NotRequired[list[float]]
+    keywords: NotRequired[list[str]]
+    limit: NotRequired[int]
+    score_threshold: NotRequired[float]
+
+
 class Search(Protocol):
     """Protocol for a search component."""
 
@@ -65,5 +75,18 @@ class Search(Protocol):
         """
         ...
 
+    async def batch_search(
+        self, searches: list[SearchRequest]
+    ) -> list[list[SearchResult]]:
+        """Perform many searches at once.
+
+        Args:
+            searches: The searches to perform.
+
+        Returns:
+            The search results of each search, in order.
+        """
+        ...
+
 
 type OptionalSearch = Search | None
@@ -0,0 +1,178 @@
+import asyncio
+import json
+
+import pytest
+from fakes import FakeAsyncOpenAI, FakeAsyncQdrantClient
+from openai.types.chat.chat_completion_chunk import (
+    ChatCompletionChunk,
+    Choice,
+    ChoiceDelta,
+    ChoiceDeltaToolCall,
+    ChoiceDeltaToolCallFunction,
+)
+from qdrant_client.http.models import QueryResponse, ScoredPoint
+from sizes import (
+    ANSWER_TOKENS,
+    CHUNK_CHARACTERS,
+    CONVERSATION_MESSAGES,
+    SEARCH_RESULTS,
+    TOOL_CALLS,
+)
+
+from rag.agent import Agent
+from rag.components.chat import OpenAIChat
+from rag.components.embed import OpenAIEmbed
+from rag.components.search import QdrantSearch
+
+
+def chunk(delta: ChoiceDelta) -> ChatCompletionChunk:
+    return ChatCompletionChunk(
+        id="0",
+        created=0,
+        model="bench",
+        object="chat.completion.chunk",
+        choices=[Choice(index=0, delta=delta)],
+    )
+
+
+def answer_chunks() -> list[ChatCompletionChunk]:
+    return [chunk(ChoiceDelta(content=f"token{i} ")) for i in range(ANSWER_TOKENS)]
+
+
+def tool_call_chunks() -> list[ChatCompletionChunk]:
+    chunks = []
+    for index in range(TOOL_CALLS):
+        arguments = json.dumps(
+            {"query": f"history of the city number {index}", "keywords": ["city", "history", "founding"]}
+        )
+        chunks.append(
+            chunk(
+                ChoiceDelta(
+                    tool_calls=[
+                        ChoiceDeltaToolCall(
+                            index=index,
+                            id=f"call_{index}",
+                            type="function",
+                            function=ChoiceDeltaToolCallFunction(name="hybrid_search", arguments=""),
+                        )
+                    ]
+                )
+            )
+        )
+        chunks.extend(
+            chunk(
+                ChoiceDelta(
+                    tool_calls=[
+                        ChoiceDeltaToolCall(
+                            index=index,
+                            function=ChoiceDeltaToolCallFunction(arguments=arguments[i : i + 4]),
+                        )
+                    ]
+                )
+            )
+            for i in range(0, len(arguments), 4)
+        )
+    return chunks
+
+
+class BenchAsyncOpenAI(FakeAsyncOpenAI):
+    """Replays pre-built chunks instead of spelling out "Hello, world!"."""
+
+    chunks: list[ChatCompletionChunk] = []
+
+    class Stream:
+        def __init__(self, chunks: list[ChatCompletionChunk]):
+            self.chunks = iter(chunks)
+
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            try:
+                return next(self.chunks)
+            except StopIteration:
+                raise StopAsyncIteration from None
+
+    async def create(self, *args, **kwargs):
+        return self.Stream(self.chunks)
+
+
+class AnswerAsyncOpenAI(BenchAsyncOpenAI):
+    chunks = answer_chunks()
+
+
+class ToolCallAsyncOpenAI(BenchAsyncOpenAI):
+    chunks = tool_call_chunks()
+
+
+@pytest.fixture(scope="session")
+def run():
+    """Run a coroutine to completion on a dedicated event loop; Usable inside `benchmark`."""
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def query_response() -> QueryResponse:
+    return QueryResponse(
+        points=[
+            ScoredPoint(
+                id=i,
+                version=0,
+                score=1 / (i + 1),
+                payload={"content": "x" * CHUNK_CHARACTERS, "title": f"Article {i}", "url": f"https://example.org/{i}"},
+            )
+            for i in range(SEARCH_RESULTS)
+        ]
+    )
+
+
+@pytest.fixture(scope="session")
+def conversation() -> list[dict]:
+    messages: list[dict] = [{"role": "system", "content": "You are a helpful assistant." * 20}]
+    for i in range(CONVERSATION_MESSAGES // 4):
+        messages.append({"role": "user", "content": f"Question number {i}?" * 5})
+        messages.append(
+            {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [
+                    {
+                        "id": f"call_{i}",
+                        "type": "function",
+                        "function": {"name": "hybrid_search", "arguments": '{"query": "q", "keywords": ["k"]}'},
+                    }
+                ],
+            }
+        )
+        messages.append(
+            {"role": "tool", "tool_call_id": f"call_{i}", "content": "<CONTENT>\n" + "x" * CHUNK_CHARACTERS + "\n</CONTENT>\n" * SEARCH_RESULTS}
+        )
+        messages.append({"role": "assistant", "content": "An answer. " * 50, "tool_calls": None})
+    return messages
+
+
+@pytest.fixture(scope="session")
+def qdrant_search():
+    return QdrantSearch(collection="bench", url="", _qdrant_client_class=FakeAsyncQdrantClient)  # type: ignore
+
+
+@pytest.fixture(scope="session")
+def openai_embed():
+    return OpenAIEmbed(model="bench", api_key="", _openai_client_class=FakeAsyncOpenAI)  # type: ignore
+
+
+@pytest.fixture(scope="session")
+def answer_chat():
+    return OpenAIChat(api_key="", _openai_client_class=AnswerAsyncOpenAI)  # type: ignore
+
+
+@pytest.fixture(scope="session")
+def tool_call_chat():
+    return OpenAIChat(api_key="", _openai_client_class=ToolCallAsyncOpenAI)  # type: ignore
+
+
+@pytest.fixture(scope="session")
+def agent(answer_chat, qdrant_search, openai_embed):
+    return Agent(model="bench", _chat=answer_chat, _search=qdrant_search, _embed=openai_embed)
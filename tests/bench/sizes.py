@@ -0,0 +1,10 @@
+"""Realistic sizes: a long answer, a turn with several tool calls, a full page of search results and a small corpus."""
+
+ANSWER_TOKENS = 1000
+TOOL_CALLS = 3
+SEARCH_RESULTS = 25
+CHUNK_CHARACTERS = 500
+CONVERSATION_MESSAGES = 40
+CORPUS_POINTS = 2000
+EMBEDDING_DIMENSIONS = 3072
+SMALL_DIMENSIONS = 256
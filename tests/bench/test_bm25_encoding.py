@@ -0,0 +1,58 @@
+"""The native BM25 query encoder against fastembed's "Qdrant/bm25" model.
+
+Startup runs in a fresh interpreter, so that it includes imports; Its peak RSS is saved in `extra_info`.
+fastembed is only a dev dependency, so the native startup hides it, as in a deployment where
+the Qdrant client does not load it either.
+"""
+
+import subprocess
+import sys
+
+import pytest
+from fastembed import SparseTextEmbedding
+
+from rag.components.search import Bm25
+
+QUERY = "roman empire founding history emperor"
+
+STARTUP = {
+    "native": "import sys; sys.modules['fastembed'] = None\nfrom rag.components.search import Bm25; Bm25()",
+    "fastembed": "from fastembed import SparseTextEmbedding; SparseTextEmbedding(model_name='Qdrant/bm25')\nimport rag.components.search",
+}
+
+@pytest.mark.parametrize("encoder", STARTUP)
+def test_bm25_startup(benchmark, encoder):
+    code = f"import resource\n{STARTUP[encoder]}\nprint(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+
+    result = benchmark.pedantic(
+        subprocess.run,
+        args=([sys.executable, "-c", code],),
+        kwargs={"capture_output": True, "text": True, "check": True},
+        rounds=3,
+    )
+
+    benchmark.extra_info["peak_rss_kib"] = int(result.stdout)
+
+
+def test_bm25_query_native(benchmark):
+    bm25 = Bm25(cache_size=0)
+
+    indices, _ = benchmark(bm25.encode, QUERY)
+
+    assert len(indices) == 5
+
+
+def test_bm25_query_native_memoized(benchmark):
+    bm25 = Bm25()
+
+    indices, _ = benchmark(bm25.encode, QUERY)
+
+    assert len(indices) == 5
+
+
+def test_bm25_query_fastembed(benchmark):
+    bm25 = SparseTextEmbedding(model_name="Qdrant/bm25")
+
+    embedding = benchmark(lambda: next(iter(bm25.query_embed(QUERY))))
+
+    assert len(embedding.indices) == 5
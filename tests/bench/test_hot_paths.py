@@ -0,0 +1,74 @@
+import json
+
+from sizes import ANSWER_TOKENS, SEARCH_RESULTS, TOOL_CALLS
+
+from rag.entrypoints.rest import Data
+from rag.entrypoints.rest.models import encode_sse, parse_chat_payload
+
+
+def test_generate_stream_tool_call_buffering(benchmark, run, tool_call_chat):
+    async def consume():
+        return [chunk async for chunk in tool_call_chat.generate_stream([], model="bench")]
+
+    chunks = benchmark(lambda: run(consume()))
+
+    assert sum(len(chunk["tools"]) for chunk in chunks if chunk["tools"]) == TOOL_CALLS
+
+
+def test_agent_generate_content(benchmark, run, agent):
+    async def consume():
+        messages = [{"role": "user", "content": "Tell me a long story."}]
+        return [token async for token in agent.generate(messages)]
+
+    tokens = benchmark(lambda: run(consume()))
+
+    assert len(tokens) == ANSWER_TOKENS
+
+
+def test_build_result(benchmark, qdrant_search, query_response):
+    results = benchmark(qdrant_search._build_result, query_response)
+
+    assert len(results) == SEARCH_RESULTS
+
+
+def test_build_template(benchmark, agent, qdrant_search, query_response):
+    results = qdrant_search._build_result(query_response)
+
+    template = benchmark(agent._build_template, results)
+
+    assert template.count("<CONTENT>") == SEARCH_RESULTS
+
+
+def test_bm25_query_encoding(benchmark, qdrant_search):
+    indices, _ = benchmark(qdrant_search.bm25.encode, "roman empire founding history emperor")
+
+    assert len(indices) == 5
+
+
+def test_messages_validation_and_dump(benchmark, conversation):
+    def parse():
+        return Data.model_validate({"model": "bench", "messages": conversation}).messages.model_dump()
+
+    messages = benchmark(parse)
+
+    assert len(messages) == len(conversation)
+
+
+def test_chat_payload_parsing(benchmark, conversation):
+    body = json.dumps({"model": "bench", "messages": conversation}).encode()
+
+    messages = benchmark(lambda: parse_chat_payload(body)["messages"])
+
+    assert len(messages) == len(conversation)
+
+
+def test_sse_encoding(benchmark):
+    tokens = [f"token{i} " for i in range(ANSWER_TOKENS)]
+
+    def encode():
+        return [encode_sse(token) for token in tokens]
+
+    events = benchmark(encode)
+
+    assert len(events) == ANSWER_TOKENS
+    assert events[0] == 'data: "token0 "\n\n'
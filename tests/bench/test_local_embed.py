@@ -0,0 +1,60 @@
+"""Query embedding latency of a local FastEmbed model against the remote OpenAI-compatible API.
+
+Both paths need real models, so each benchmark is skipped unless configured:
+    - `BENCH_LOCAL_EMBEDDING_PATH` (or `BENCH_LOCAL_EMBEDDING_MODEL`, downloaded on first use) for the local model.
+    - `BENCH_OPENAI_URL` (with `BENCH_OPENAI_API_KEY` and `BENCH_OPENAI_EMBEDDING_MODEL`) for the remote API.
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from rag.components.embed import FastEmbedEmbed, OpenAIEmbed
+
+QUERY = "When was the city of Rome founded?"
+QUERIES = [f"{QUERY} ({i})" for i in range(16)]
+
+
+@pytest.fixture(scope="module")
+def local_embed():
+    path = os.environ.get("BENCH_LOCAL_EMBEDDING_PATH")
+    model = os.environ.get("BENCH_LOCAL_EMBEDDING_MODEL")
+    if path is None and model is None:
+        pytest.skip("Set BENCH_LOCAL_EMBEDDING_PATH or BENCH_LOCAL_EMBEDDING_MODEL to benchmark local embeddings")
+    pytest.importorskip("fastembed")
+
+    return FastEmbedEmbed(model=model or "BAAI/bge-small-en-v1.5", model_path=Path(path) if path else None)
+
+
+@pytest.fixture(scope="module")
+def remote_embed():
+    url = os.environ.get("BENCH_OPENAI_URL")
+    if url is None:
+        pytest.skip("Set BENCH_OPENAI_URL to benchmark remote embeddings")
+
+    return OpenAIEmbed(
+        model=os.environ.get("BENCH_OPENAI_EMBEDDING_MODEL", "text-embedding-3-large"),
+        api_key=os.environ.get("BENCH_OPENAI_API_KEY", "None"),
+        base_url=url,
+    )
+
+
+@pytest.mark.parametrize("backend", ["local", "remote"])
+def test_query_embedding(benchmark, run, request, backend):
+    embed = request.getfixturevalue(f"{backend}_embed")
+    run(embed.generate_embedding(QUERY))
+
+    embedding = benchmark(lambda: run(embed.generate_embedding(QUERY)))
+
+    benchmark.extra_info["dimensions"] = len(embedding)
+
+
+@pytest.mark.parametrize("backend", ["local", "remote"])
+def test_batch_embedding(benchmark, run, request, backend):
+    embed = request.getfixturevalue(f"{backend}_embed")
+    run(embed.generate_embeddings(QUERIES))
+
+    embeddings = benchmark(lambda: run(embed.generate_embeddings(QUERIES)))
+
+    assert len(embeddings) == len(QUERIES)
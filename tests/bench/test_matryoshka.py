@@ -0,0 +1,107 @@
+"""Full-dimension search against small-vector prefetch with full-dimension rescoring.
+
+The corpus is synthetic: its variance decays along the dimensions, as in Matryoshka embeddings,
+where the leading dimensions carry most of the information. Recall@10 (against an exact
+full-dimension search) and the RAM taken by the searched vectors are reported in `extra_info`.
+
+Set `BENCH_QDRANT_URL` to run against a Qdrant server. Qdrant's local mode, used otherwise,
+brute-forces every stage of a query, so only a server shows the latency of HNSW prefetching.
+"""
+
+import os
+import random
+
+import pytest
+from qdrant_client import models
+from sizes import CORPUS_POINTS, EMBEDDING_DIMENSIONS, SMALL_DIMENSIONS
+
+from rag.components.search import QdrantSearch, truncate_embedding
+
+QUERIES = 20
+LIMIT = 10
+
+pytestmark = pytest.mark.filterwarnings("ignore:Local mode performs exact")
+
+
+def matryoshka_vector(rng: random.Random) -> list[float]:
+    return [rng.gauss(0, 1) / (1 + i / 32) for i in range(EMBEDDING_DIMENSIONS)]
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    rng = random.Random(0)
+    vectors = [matryoshka_vector(rng) for _ in range(CORPUS_POINTS)]
+    queries = [
+        [value + rng.gauss(0, 0.02) for value in vectors[rng.randrange(CORPUS_POINTS)]]
+        for _ in range(QUERIES)
+    ]
+    return vectors, queries
+
+
+@pytest.fixture(scope="module")
+def local_searches(run, corpus):
+    vectors, _ = corpus
+    url = os.environ.get("BENCH_QDRANT_URL", ":memory:")
+    full = QdrantSearch(collection="bench_full", url=url)
+    small = QdrantSearch(collection="bench_small", url=url, small_dimensions=SMALL_DIMENSIONS)
+
+    async def create():
+        for search in (full, small):
+            await search.qdrant.delete_collection(search.collection)
+            await search.create_collection(dimensions=EMBEDDING_DIMENSIONS)
+            search.qdrant.upload_points(
+                search.collection,
+                [
+                    models.PointStruct(
+                        id=i,
+                        vector={"dense": vector}
+                        | (
+                            {"dense_small": truncate_embedding(vector, SMALL_DIMENSIONS)}
+                            if search.small_dimensions
+                            else {}
+                        ),
+                        payload={"content": str(i)},
+                    )
+                    for i, vector in enumerate(vectors)
+                ],
+                wait=True,
+            )
+
+    run(create())
+    return full, small
+
+
+def search_all(run, search, queries):
+    async def search_queries():
+        return [await search.semantic_search(query=query, limit=LIMIT) for query in queries]
+
+    return run(search_queries())
+
+
+def ids(results):
+    return [{result["data"]["content"] for result in result_set} for result_set in results]
+
+
+def test_semantic_search_full(benchmark, run, corpus, local_searches):
+    _, queries = corpus
+    full, _ = local_searches
+
+    results = benchmark(search_all, run, full, queries)
+
+    benchmark.extra_info["searched_vector_bytes"] = CORPUS_POINTS * EMBEDDING_DIMENSIONS * 4
+    assert all(len(result) == LIMIT for result in results)
+
+
+def test_semantic_search_small_prefetch(benchmark, run, corpus, local_searches):
+    _, queries = corpus
+    full, small = local_searches
+
+    exact = ids(search_all(run, full, queries))
+    results = benchmark(search_all, run, small, queries)
+
+    recall = sum(len(a & b) for a, b in zip(exact, ids(results))) / (QUERIES * LIMIT)
+    benchmark.extra_info["recall_at_10"] = recall
+    # Only the small vectors must stay in RAM; The full ones are read for the rescored candidates
+    benchmark.extra_info["searched_vector_bytes"] = CORPUS_POINTS * SMALL_DIMENSIONS * 4
+
+    assert recall >= 0.9
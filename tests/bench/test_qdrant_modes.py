@@ -0,0 +1,65 @@
+"""Search latency of embedded Qdrant (in memory and on disk) against a Qdrant server.
+
+The server mode runs only when `BENCH_QDRANT_URL` is set. Embedded modes skip the network and
+serialization, but search by brute force, so they suit small single-node collections.
+"""
+
+import os
+import random
+
+import pytest
+from qdrant_client import models
+from sizes import CORPUS_POINTS, SEARCH_RESULTS, SMALL_DIMENSIONS
+
+from rag.components.search import QdrantSearch
+
+QUERIES = 20
+
+pytestmark = pytest.mark.filterwarnings("ignore:Local mode performs exact")
+
+
+@pytest.fixture(scope="module", params=["memory", "disk", "server"])
+def mode_search(request, run, tmp_path_factory):
+    match request.param:
+        case "memory":
+            search = QdrantSearch(collection="bench_modes", url=":memory:")
+        case "disk":
+            search = QdrantSearch(collection="bench_modes", path=str(tmp_path_factory.mktemp("qdrant")))
+        case "server":
+            if (url := os.environ.get("BENCH_QDRANT_URL")) is None:
+                pytest.skip("BENCH_QDRANT_URL is not set")
+            search = QdrantSearch(collection="bench_modes", url=url)
+
+    rng = random.Random(0)
+
+    async def create():
+        await search.qdrant.delete_collection(search.collection)
+        await search.create_collection(dimensions=SMALL_DIMENSIONS)
+        search.qdrant.upload_points(
+            search.collection,
+            [
+                models.PointStruct(
+                    id=i,
+                    vector={"dense": [rng.gauss(0, 1) for _ in range(SMALL_DIMENSIONS)]},
+                    payload={"content": f"Passage {i}"},
+                )
+                for i in range(CORPUS_POINTS)
+            ],
+            wait=True,
+        )
+
+    run(create())
+    yield search
+    run(search.qdrant.close())
+
+
+def test_semantic_search_mode(benchmark, run, mode_search):
+    rng = random.Random(1)
+    queries = [[rng.gauss(0, 1) for _ in range(SMALL_DIMENSIONS)] for _ in range(QUERIES)]
+
+    async def search_queries():
+        return [await mode_search.semantic_search(query=query, limit=SEARCH_RESULTS) for query in queries]
+
+    results = benchmark(lambda: run(search_queries()))
+
+    assert all(len(result) == SEARCH_RESULTS for result in results)
@@ -0,0 +1,57 @@
+"""Rendering a long streamed answer in the CLI, incrementally or by re-parsing the whole answer on every token."""
+
+import io
+
+from rich.console import Console
+from rich.live import Live
+from rich.markdown import Markdown
+from sizes import ANSWER_TOKENS
+
+from rag.entrypoints.cli.tui import MarkdownStream
+
+PARAGRAPH_TOKENS = 50
+
+
+def answer_tokens() -> list[str]:
+    tokens = []
+    for i in range(ANSWER_TOKENS):
+        if i % PARAGRAPH_TOKENS == 0:
+            tokens.append("\n\n## Section\n\n" if i % (4 * PARAGRAPH_TOKENS) == 0 else "\n\n- ")
+        tokens.append(f"**token{i}** " if i % 7 == 0 else f"token{i} ")
+    return tokens
+
+
+TOKENS = answer_tokens()
+
+
+def live() -> Live:
+    return Live(console=Console(file=io.StringIO(), width=100, force_terminal=True), auto_refresh=False)
+
+
+def test_incremental_rendering(benchmark):
+    def render():
+        with live() as display:
+            stream = MarkdownStream(display)
+            for token in TOKENS:
+                stream.feed(token)
+            stream.close()
+        return stream
+
+    stream = benchmark(render)
+
+    assert stream.buffer == "".join(TOKENS)
+
+
+def test_full_rendering(benchmark):
+    """The previous behavior, for reference: The whole answer is parsed again on every token."""
+
+    def render():
+        buffer = ""
+        with live() as display:
+            for token in TOKENS:
+                buffer += token
+                display.update(Markdown(buffer))
+            display.refresh()
+        return buffer
+
+    assert benchmark(render) == "".join(TOKENS)
@@ -1,3 +1,5 @@
+import json
+
 from fastapi.testclient import TestClient
 
 from rag.entrypoints.rest import app
@@ -9,6 +11,7 @@ def test_send_messages(compose):
     response = client.post("/chat", json={"model": "mock", "messages": [{"role": "user", "content": "Hello, world!"}]}, params={"stream": False})
     assert response.status_code == 200
     assert response.json() == {"response": "Hello, world!"}
+    assert "total;dur=" in response.headers["Server-Timing"]
 
 def test_send_messages_stream(compose):
     with client.stream("POST", "/chat", json={"model": "mock", "messages": [{"role": "user", "content": "Hello, world!"}]}, params={"stream": True}) as response:
@@ -16,6 +19,17 @@ def test_send_messages_stream(compose):
 
         buffer = ""
         for text in response.iter_lines():
+            if text == "event: timing":
+                break
             buffer += text[7:-1]
 
         assert buffer == "Hello, world!"
+
+def test_send_batch(compose):
+    conversations = [[{"role": "user", "content": "Hello, world!"}]] * 3
+    response = client.post("/chat/batch", json={"model": "mock", "conversations": conversations})
+    assert response.status_code == 200
+
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(result["index"] for result in results) == [0, 1, 2]
+    assert all(result["response"] == "Hello, world!" for result in results)
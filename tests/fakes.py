@@ -0,0 +1,93 @@
+"""Fake clients shared by the unit tests and the benchmarks."""
+
+from openai.types.chat.chat_completion_chunk import (
+    ChatCompletionChunk,
+    Choice,
+    ChoiceDelta,
+)
+from qdrant_client.http.models import QueryResponse, ScoredPoint
+
+
+class FakeAsyncOpenAI:
+    class Response:
+        def __init__(self, text: str):
+            self.text = list(text)
+
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            if len(self.text) > 0:
+                content = self.text.pop(0)
+                return ChatCompletionChunk(
+                    id="0",
+                    created=0,
+                    model="test",
+                    object="chat.completion.chunk",
+                    choices=[Choice(index=0, delta=ChoiceDelta(content=content))],
+                )
+            else:
+                raise StopAsyncIteration
+
+    def __init__(self, *args, **kwargs): ...
+
+    @property
+    def chat(self):
+        return self
+
+    @property
+    def completions(self):
+        return self
+
+    async def create(self, *args, **kwargs):
+        return self.Response("Hello, world!")
+
+    @property
+    def embeddings(self):
+        return self.Embeddings()
+
+    class Embeddings:
+        class Response:
+            def __init__(self, embedding: list[float], count: int = 1):
+                self.data = [FakeAsyncOpenAI.Embeddings.Data(i, embedding) for i in range(count)]
+                self.embedding = embedding
+
+        class Data:
+            def __init__(self, index: int, embedding: list[float]):
+                self.index = index
+                self.embedding = embedding
+
+        async def create(self, *args, input, **kwargs):
+            count = len(input) if isinstance(input, list) else 1
+            return self.Response([0.1, 0.2, 0.3], count)
+
+
+class FakeAsyncQdrantClient:
+    def __init__(self, *args, **kwargs): ...
+
+    async def query_points(self, *args, **kwargs):
+        return QueryResponse(
+            points=[
+                ScoredPoint(
+                    id=1,
+                    version=0,
+                    score=1,
+                    payload={"content": "Dogs are man's best friend"},
+                ),
+                ScoredPoint(
+                    id=2,
+                    version=0,
+                    score=0.5,
+                    payload={"content": "Cats are quite cute"},
+                ),
+                ScoredPoint(
+                    id=3,
+                    version=0,
+                    score=0,
+                    payload={"content": "Cars are a means of transportation"},
+                ),
+            ]
+        )
+
+    async def query_batch_points(self, collection_name, requests, **kwargs):
+        return [await self.query_points() for _ in requests]
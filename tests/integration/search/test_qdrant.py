@@ -41,3 +41,25 @@ async def test_keyword_search(docs: list[str], qdrant_search):
 
     for doc in docs:
         assert doc in datas
+
+
+async def test_batch_search(docs: list[str], qdrant_search):
+    results = await qdrant_search.batch_search(
+        [
+            {
+                "mode": "hybrid",
+                "query": [random.uniform(0.0, 1.0) for _ in range(1536)],
+                "keywords": ["dogs", "cats", "cars"],
+                "limit": 3,
+            },
+            {
+                "mode": "semantic",
+                "query": [random.uniform(0.0, 1.0) for _ in range(1536)],
+                "limit": 3,
+            },
+            {"mode": "keyword", "keywords": ["Dickens"], "limit": 1},
+        ]
+    )
+
+    assert len(results[0]) == len(results[1]) == len(docs)
+    assert results[2][0]["data"]["content"] == docs[2]
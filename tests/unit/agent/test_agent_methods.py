@@ -1,3 +1,8 @@
+import asyncio
+
+from rag.agent import Agent
+
+
 async def test_agent(agent):
     messages = [{"role": "user", "content": "Hello"}]
 
@@ -7,3 +12,72 @@ async def test_agent(agent):
         buffer += chunk
 
     assert buffer == "Hello, world!"
+
+
+async def test_multi_search(agent):
+    result = await agent.execute(
+        "multi_search",
+        searches=[
+            {"query": "pets", "keywords": ["dogs", "cats"]},
+            {"query": "animals", "keywords": ["dogs"]},
+        ],
+    )
+
+    assert result.count("<CONTENT>") == 3
+    assert result.index("Dogs are man's best friend") < result.index("Cars are a means")
+
+
+async def test_multi_search_without_searches():
+    class Unreachable:
+        def __getattr__(self, name):
+            raise AssertionError(f"{name} called")
+
+    agent = Agent(model="test", _chat=Unreachable(), _search=Unreachable(), _embed=Unreachable())  # type: ignore
+
+    assert await agent.execute("multi_search", searches=[]) == ""
+
+
+def test_multi_search_requires_searches(agent):
+    (tool,) = [tool for tool in agent.tools if tool["function"]["name"] == "multi_search"]
+
+    assert tool["function"]["parameters"]["properties"]["searches"]["minItems"] == 1
+
+
+async def test_tool_calls_run_while_streaming(qdrant_search, openai_embed):
+    events = []
+
+    class ToolCallChat:
+        async def generate_stream(self, messages, model, **kwargs):
+            if messages[-1]["role"] == "tool":
+                yield {"content": "Done", "tools": None}
+                return
+
+            for i in range(2):
+                tool = {"id": f"call_{i}", "type": "function", "function": {"name": "slow", "arguments": f'{{"i": {i}}}'}}
+                yield {"content": None, "tools": [tool]}
+                await asyncio.sleep(0.01)
+                events.append(f"streamed {i}")
+
+    agent = Agent(model="test", _chat=ToolCallChat(), _search=qdrant_search, _embed=openai_embed)
+
+    async def slow(i):
+        events.append(f"started {i}")
+        await asyncio.sleep(0.05)
+        return f"result {i}"
+
+    agent.tool_map["slow"] = slow
+
+    messages = [{"role": "user", "content": "Hello"}]
+    async for _ in agent.generate(messages):
+        pass
+
+    assert events == ["started 0", "streamed 0", "started 1", "streamed 1"]
+    assert messages[1]["tool_calls"][1]["id"] == "call_1"
+    assert [message["content"] for message in messages[2:]] == ["result 0", "result 1"]
+
+
+def test_search_limit(agent):
+    assert agent._limit(None) == agent.search_limit
+    assert agent._limit(3) == 3
+    assert agent._limit(agent.search_limit + 100) == agent.search_limit
+    assert agent._limit(0) == 1
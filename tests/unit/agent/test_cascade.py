@@ -0,0 +1,137 @@
+from prometheus_client import REGISTRY
+
+from rag.agent import Agent
+from rag.agent.cascade import Cascade
+
+
+class ScriptedChat:
+    """Answers according to the model: The fast model greets, escalates or searches."""
+
+    def __init__(self, fast_behaviour):
+        self.fast_behaviour = fast_behaviour
+        self.calls = []
+
+    async def generate_stream(self, messages, model, tools, **kwargs):
+        self.calls.append((model, [tool["function"]["name"] for tool in tools]))
+
+        if model == "large":
+            yield {"content": "Large answer", "tools": None}
+        elif self.fast_behaviour == "answer":
+            yield {"content": "Hi!", "tools": None}
+        elif self.fast_behaviour == "think_then_escalate":
+            yield {"content": "Let me think... ", "tools": None}
+            yield {"content": None, "tools": [{"id": "call_0", "type": "function", "function": {"name": "escalate", "arguments": "{}"}}]}
+        elif self.fast_behaviour == "search_then_escalate":
+            yield {"content": "Let me search... ", "tools": None}
+            yield {"content": None, "tools": [{"id": "call_0", "type": "function", "function": {"name": "keyword_search", "arguments": '{"keywords": ["dogs"]}'}}]}
+            yield {"content": None, "tools": [{"id": "call_1", "type": "function", "function": {"name": "escalate", "arguments": "{}"}}]}
+        elif self.fast_behaviour == "escalate":
+            yield {"content": None, "tools": [{"id": "call_0", "type": "function", "function": {"name": "escalate", "arguments": "{}"}}]}
+        elif self.fast_behaviour == "search" and messages[-1]["role"] == "user":
+            arguments = '{"keywords": ["dogs"]}'
+            yield {"content": None, "tools": [{"id": "call_0", "type": "function", "function": {"name": "keyword_search", "arguments": arguments}}]}
+        else:
+            yield {"content": "Fast answer from the results", "tools": None}
+
+
+async def converse(agent, messages):
+    buffer = ""
+    while True:
+        async for chunk in agent.generate(messages):
+            buffer += chunk
+        if messages[-1]["role"] != "tool":
+            return buffer
+
+
+def rounds(route):
+    return REGISTRY.get_sample_value("rag_cascade_rounds_total", {"model": "large", "route": route}) or 0
+
+
+def cascaded_agent(behaviour, qdrant_search, openai_embed, **cascade):
+    chat = ScriptedChat(behaviour)
+    agent = Agent(
+        model="large", _chat=chat, _search=qdrant_search, _embed=openai_embed, _cascade=Cascade(models={"large": "fast"}, **cascade)
+    )
+    return agent, chat
+
+
+async def test_fast_model_answers_simple_turns(qdrant_search, openai_embed):
+    agent, chat = cascaded_agent("answer", qdrant_search, openai_embed)
+    before = rounds("fast")
+    messages = [{"role": "user", "content": "Hello"}]
+
+    assert await converse(agent, messages) == "Hi!"
+    assert chat.calls == [("fast", [*[tool["function"]["name"] for tool in Agent.tools], "escalate"])]
+    assert messages[-1] == {"role": "assistant", "content": "Hi!"}
+    assert rounds("fast") == before + 1
+
+
+async def test_escalation_regenerates_with_the_large_model(qdrant_search, openai_embed):
+    agent, chat = cascaded_agent("escalate", qdrant_search, openai_embed)
+    before = rounds("escalated")
+    messages = [{"role": "user", "content": "Prove the Riemann hypothesis"}]
+
+    assert await converse(agent, messages) == "Large answer"
+    assert [model for model, _ in chat.calls] == ["fast", "large"]
+    assert "escalate" not in chat.calls[1][1]
+    assert messages[1:] == [{"role": "assistant", "content": "Large answer"}]
+    assert rounds("escalated") == before + 1
+
+
+async def test_large_model_answers_from_search_results(qdrant_search, openai_embed):
+    agent, chat = cascaded_agent("search", qdrant_search, openai_embed)
+    messages = [{"role": "user", "content": "Tell me about dogs"}]
+
+    assert await converse(agent, messages) == "Large answer"
+    assert [model for model, _ in chat.calls] == ["fast", "large"]
+    assert [message["role"] for message in messages] == ["user", "assistant", "tool", "assistant"]
+
+
+async def test_fast_model_answers_from_search_results(qdrant_search, openai_embed):
+    agent, chat = cascaded_agent("search", qdrant_search, openai_embed, escalate_on_tools=False)
+    messages = [{"role": "user", "content": "Tell me about dogs"}]
+
+    assert await converse(agent, messages) == "Fast answer from the results"
+    assert [model for model, _ in chat.calls] == ["fast", "fast"]
+
+
+async def test_long_prompts_go_to_the_large_model(qdrant_search, openai_embed):
+    agent, chat = cascaded_agent("answer", qdrant_search, openai_embed, max_prompt_tokens=10)
+    messages = [{"role": "user", "content": "A long question " * 20}]
+
+    assert await converse(agent, messages) == "Large answer"
+    assert [model for model, _ in chat.calls] == ["large"]
+
+
+async def test_other_models_are_not_cascaded(qdrant_search, openai_embed):
+    chat = ScriptedChat("answer")
+    agent = Agent(model="large", _chat=chat, _search=qdrant_search, _embed=openai_embed, _cascade=Cascade(models={"other": "fast"}))
+
+    assert await converse(agent, [{"role": "user", "content": "Hello"}]) == "Large answer"
+    assert [model for model, _ in chat.calls] == ["large"]
+
+
+async def test_fast_content_is_not_streamed_before_escalating(qdrant_search, openai_embed):
+    agent, chat = cascaded_agent("think_then_escalate", qdrant_search, openai_embed)
+    messages = [{"role": "user", "content": "Explain quantum field theory"}]
+
+    assert await converse(agent, messages) == "Large answer"
+    assert [model for model, _ in chat.calls] == ["fast", "large"]
+    assert messages[-1] == {"role": "assistant", "content": "Large answer"}
+
+
+async def test_fast_round_escalating_after_a_tool_call(qdrant_search, openai_embed):
+    class CountingSearch:
+        calls = 0
+
+        async def keyword_search(self, keywords, limit=25):
+            CountingSearch.calls += 1
+            return []
+
+    agent, chat = cascaded_agent("search_then_escalate", CountingSearch(), openai_embed)
+    messages = [{"role": "user", "content": "Explain quantum field theory"}]
+
+    assert await converse(agent, messages) == "Large answer"
+    assert [model for model, _ in chat.calls] == ["fast", "large"]
+    assert messages[1:] == [{"role": "assistant", "content": "Large answer"}]
+    assert CountingSearch.calls == 0
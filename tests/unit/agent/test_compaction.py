@@ -0,0 +1,116 @@
+import copy
+
+from prometheus_client import REGISTRY
+
+from rag.agent import Agent
+from rag.agent.compaction import Compaction, compact, estimate_tokens
+
+
+def turn(i: int, output: str = "x" * 2000) -> list[dict]:
+    return [
+        {"role": "user", "content": f"Question {i}?"},
+        {
+            "role": "assistant",
+            "content": "",
+            "tool_calls": [
+                {
+                    "id": f"call_{i}",
+                    "type": "function",
+                    "function": {"name": "semantic_search", "arguments": '{"query": "q"}'},
+                }
+            ],
+        },
+        {"role": "tool", "tool_call_id": f"call_{i}", "content": output},
+        {"role": "assistant", "content": f"Answer {i}."},
+    ]
+
+
+def conversation(turns: int) -> list[dict]:
+    messages = [{"role": "system", "content": "You are helpful."}]
+    for i in range(turns):
+        messages.extend(turn(i))
+    return messages
+
+
+def test_shrinks_old_tool_outputs():
+    messages = conversation(3)
+    original = copy.deepcopy(messages)
+
+    compacted, saved = compact(messages, Compaction(max_tool_age=1, tool_output_characters=100))
+
+    assert messages == original
+    tool_outputs = [message["content"] for message in compacted if message["role"] == "tool"]
+    assert tool_outputs[0].endswith("[1900 characters omitted]")
+    assert tool_outputs[1] == tool_outputs[2] == "x" * 2000
+    assert saved == estimate_tokens(messages) - estimate_tokens(compacted) > 0
+
+
+def test_token_budget_drops_oldest_turns():
+    messages = conversation(4) + [{"role": "user", "content": "Last question?"}]
+
+    compacted, _ = compact(messages, Compaction(max_tool_age=None, token_budget=1200))
+
+    assert compacted[0]["role"] == "system"
+    assert compacted[1]["role"] != "tool"
+    assert compacted[-1] == {"role": "user", "content": "Last question?"}
+    assert estimate_tokens(compacted) <= 1200
+    assert len(compacted) < len(messages)
+
+
+def test_token_budget_keeps_system_messages_in_place():
+    note = {"role": "system", "content": "Answer in French from now on."}
+    messages = conversation(2) + [note] + turn(2) + [{"role": "user", "content": "Last question?"}]
+
+    compacted, _ = compact(messages, Compaction(max_tool_age=None, token_budget=1200))
+
+    assert compacted[0] == messages[0]
+    assert note in compacted
+    assert compacted[compacted.index(note) + 1] == turn(2)[0]
+    assert estimate_tokens(compacted) <= 1200
+
+
+def test_token_budget_drops_the_same_turns_as_estimating_each_prefix():
+    messages = conversation(30) + [{"role": "user", "content": "Last question?"}]
+
+    compacted, _ = compact(messages, Compaction(max_tool_age=None, token_budget=3000))
+
+    start = 1
+    while estimate_tokens(messages[:1] + messages[start:]) > 3000:
+        start += 1
+        while messages[start]["role"] == "tool":
+            start += 1
+    assert compacted == messages[:1] + messages[start:]
+
+
+def test_token_budget_keeps_current_turn():
+    messages = conversation(1)
+
+    compacted, saved = compact(messages, Compaction(max_tool_age=None, token_budget=10))
+
+    assert compacted == messages
+    assert saved == 0
+
+
+async def test_agent_compacts_prompt(openai_chat, qdrant_search, openai_embed):
+    class PromptChat:
+        async def generate_stream(self, messages, model, **kwargs):
+            self.prompt = messages
+            async for part in openai_chat.generate_stream(messages, model, **kwargs):
+                yield part
+
+    chat = PromptChat()
+    agent = Agent(
+        model="compaction",
+        _chat=chat,
+        _search=qdrant_search,
+        _embed=openai_embed,
+        _compaction=Compaction(max_tool_age=0, tool_output_characters=10),
+    )
+    messages = conversation(2) + [{"role": "user", "content": "Hello"}]
+
+    async for _ in agent.generate(messages):
+        continue
+
+    assert messages[3]["content"] == "x" * 2000
+    assert chat.prompt[3]["content"].startswith("x" * 10 + "\n[")
+    assert REGISTRY.get_sample_value("rag_prompt_tokens_saved_total", {"model": "compaction"}) > 0
@@ -0,0 +1,156 @@
+import json
+
+import pytest
+
+from rag import config
+from rag.agent import Agent
+from rag.agent.recording import (
+    Recorder,
+    Recording,
+    ReplayChat,
+    ReplayEmbed,
+    ReplayMismatchError,
+    ReplaySearch,
+    encode_vector,
+    read_recordings,
+)
+from rag.entrypoints.cli.replay import Replay, run_replay
+
+
+class ToolCallChat:
+    async def generate_stream(self, messages, model, **kwargs):
+        arguments = {"query": messages[-1]["content"], "keywords": ["rome"]}
+        yield {
+            "content": None,
+            "tools": [
+                {
+                    "id": "call_0",
+                    "type": "function",
+                    "function": {
+                        "name": "hybrid_search",
+                        "arguments": json.dumps(arguments),
+                    },
+                }
+            ],
+        }
+
+
+async def test_record_and_replay(tmp_path, openai_chat, openai_embed, qdrant_search):
+    path = tmp_path / "recordings.jsonl.gz"
+    recorder = Recorder(path)
+
+    answer = Agent(
+        model="test",
+        _chat=openai_chat,
+        _search=qdrant_search,
+        _embed=openai_embed,
+        _recorder=recorder,
+    )
+    answered = [{"role": "user", "content": "Hello"}]
+    assert (
+        "".join([chunk async for chunk in answer.generate(answered)]) == "Hello, world!"
+    )
+
+    tool_call = Agent(
+        model="test",
+        _chat=ToolCallChat(),
+        _search=qdrant_search,
+        _embed=openai_embed,
+        _recorder=recorder,
+    )
+    searched = [{"role": "user", "content": "Who founded Rome?"}]
+    assert [chunk async for chunk in tool_call.generate(searched)] == []
+
+    first, second = read_recordings(path)
+
+    assert first.messages == [{"role": "user", "content": "Hello"}]
+    assert "".join(part["content"] for _, part in first.rounds[0]) == "Hello, world!"
+    assert first.embeddings == first.searches == []
+
+    assert second.messages == [{"role": "user", "content": "Who founded Rome?"}]
+    assert second.searches[0]["method"] == "hybrid_search"
+
+    replayed = [{"role": "user", "content": "Who founded Rome?"}]
+    replayer = Agent(
+        model=second.model,
+        _chat=ReplayChat(second, time_scale=0),
+        _search=ReplaySearch(second, time_scale=0),
+        _embed=ReplayEmbed(second, time_scale=0),
+    )
+    assert [chunk async for chunk in replayer.generate(replayed)] == []
+    assert replayed == searched
+
+    report = await run_replay(Replay(path=path, concurrency=2, time_scale=0, repeat=3))
+
+    assert report["requests"] == 6
+    assert report["errors"] == 0
+
+
+def semantic_search_call(id, query):
+    return {"id": id, "type": "function", "function": {"name": "semantic_search", "arguments": json.dumps({"query": query})}}
+
+
+def result(content):
+    return {"id": content, "score": 1.0, "data": {"content": content}}
+
+
+def replay_agent(recording):
+    return Agent(
+        model=recording.model,
+        _chat=ReplayChat(recording, time_scale=0),
+        _search=ReplaySearch(recording, time_scale=0),
+        _embed=ReplayEmbed(recording, time_scale=0),
+    )
+
+
+async def test_replay_concurrent_tool_calls_get_their_own_results():
+    # Concurrent tool calls are recorded in completion order: call_b finished first
+    recording = Recording(
+        model="test",
+        messages=[{"role": "user", "content": "Rome and Carthage"}],
+        rounds=[[(0.0, {"content": None, "tools": [semantic_search_call("call_a", "Rome"), semantic_search_call("call_b", "Carthage")]})]],
+        embeddings=[
+            {"method": "generate_embedding", "tool_call_id": call, "latency": latency, "vector": encode_vector([1.0])}
+            for call, latency in (("call_b", 0.0), ("call_a", 0.02))
+        ],
+        searches=[
+            {"method": "semantic_search", "tool_call_id": call, "latency": 0.0, "results": [result(content)]}
+            for call, content in (("call_b", "Carthage"), ("call_a", "Rome"))
+        ],
+    )
+    messages = list(recording.messages)
+
+    assert [chunk async for chunk in replay_agent(recording).generate(messages)] == []
+
+    tool_messages = {message["tool_call_id"]: message["content"] for message in messages if message["role"] == "tool"}
+    assert "Rome" in tool_messages["call_a"]
+    assert "Carthage" in tool_messages["call_b"]
+
+
+async def test_replay_raises_on_method_mismatch():
+    recording = Recording(
+        model="test",
+        messages=[{"role": "user", "content": "Rome"}],
+        rounds=[[(0.0, {"content": None, "tools": [semantic_search_call("call_a", "Rome")]})]],
+        embeddings=[{"method": "generate_embeddings", "tool_call_id": "call_a", "latency": 0.0, "vectors": [encode_vector([1.0])]}],
+    )
+
+    with pytest.raises(ReplayMismatchError, match="called generate_embedding, but the recording has generate_embeddings"):
+        async for _ in replay_agent(recording).generate(list(recording.messages)):
+            pass
+
+
+async def test_replay_ignores_recording_compaction_and_cascade_settings(monkeypatch, tmp_path, openai_chat, openai_embed, qdrant_search):
+    path = tmp_path / "recordings.jsonl.gz"
+    agent = Agent(model="test", _chat=openai_chat, _search=qdrant_search, _embed=openai_embed, _recorder=Recorder(path))
+    assert "".join([chunk async for chunk in agent.generate([{"role": "user", "content": "Hello"}])]) == "Hello, world!"
+    recorded = path.read_bytes()
+
+    monkeypatch.setattr(config.settings, "record_path", path)
+    monkeypatch.setattr(config.settings, "compaction_token_budget", 1)
+    monkeypatch.setattr(config.settings, "cascade_models", {"test": "fast"})
+
+    report = await run_replay(Replay(path=path, time_scale=0))
+
+    assert report["errors"] == 0
+    assert path.read_bytes() == recorded
@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+from rag.components.chat import OpenAIChat
+from rag.entrypoints.cli.standins import Upstream
+
+MESSAGES = [{"role": "user", "content": "Hello"}]
+
+
+class Unreachable(httpx.AsyncBaseTransport):
+    async def handle_async_request(self, request):
+        raise httpx.ConnectError("Connection refused", request=request)
+
+
+def standin(ttft: float) -> Upstream:
+    return Upstream(ttft=ttft, token_rate=10_000, answer_tokens=5, tool_call_rate=0)
+
+
+async def answer(chat: OpenAIChat, model: str = "test") -> str:
+    return "".join([chunk["content"] async for chunk in chat.generate_stream(messages=MESSAGES, model=model)])
+
+
+def served(url, outcome="ok"):
+    return REGISTRY.get_sample_value("rag_replica_requests_total", {"replica": url, "outcome": outcome}) or 0
+
+
+async def test_routes_by_time_to_first_token(standin_chat):
+    chat = standin_chat({"http://fast": standin(0.001), "http://slow": standin(0.05)}, base_url=["http://fast", "http://slow"])
+    # Warm both clients up, so that their first request does not skew the estimates
+    for endpoint in chat._endpoints("test").replicas:
+        async for _ in await endpoint.client.chat.completions.create(model="test", messages=MESSAGES, stream=True):
+            pass
+    before = served("http://fast"), served("http://slow")
+
+    for _ in range(10):
+        assert await answer(chat)
+
+    assert served("http://fast") - before[0] > served("http://slow") - before[1]
+    fast, slow = chat.endpoints["test"].replicas
+    assert fast.latency < slow.latency
+
+
+async def test_hedges_slow_first_tokens(standin_chat):
+    chat = standin_chat({"http://slow-hedge": standin(1), "http://fast-hedge": standin(0.001)}, base_url=["http://slow-hedge", "http://fast-hedge"], hedge_after=0.05)
+    slow, fast = chat._endpoints("test").replicas
+    # Route the first completion to the slow endpoint
+    fast.latency = 10.0
+    fast.observed = time.monotonic()
+
+    start = time.perf_counter()
+    assert len((await answer(chat)).split()) == 5
+    assert time.perf_counter() - start < 0.5
+
+    # The losing completion is cancelled in the background
+    await asyncio.sleep(0.05)
+    assert served("http://slow-hedge", "cancelled") == 1
+
+
+async def test_fails_over_from_unreachable_endpoints(standin_chat):
+    chat = standin_chat({"http://down": Unreachable(), "http://up": standin(0.001)}, base_url=["http://down", "http://up"])
+    down, up = chat._endpoints("test").replicas
+    up.latency = 10.0
+    up.observed = time.monotonic()
+
+    assert await answer(chat)
+    assert down.down_until > time.monotonic()
+
+
+async def test_request_errors_do_not_fail_over(standin_chat):
+    def bad_request(request):
+        return httpx.Response(400, json={"error": {"message": "Bad request"}})
+
+    transport = httpx.MockTransport(bad_request)
+    chat = standin_chat({"http://a": transport, "http://b": transport}, base_url=["http://a", "http://b"])
+
+    with pytest.raises(Exception, match="Bad request"):
+        await answer(chat)
+
+    assert all(endpoint.down_until == 0 for endpoint in chat.endpoints["test"].replicas)
+
+
+async def test_model_urls(standin_chat):
+    chat = standin_chat(
+        {"http://default": Unreachable(), "http://small": standin(0.001)},
+        base_url="http://default",
+        model_urls={"small": ["http://small"]},
+    )
+
+    assert await answer(chat, model="small")
+    assert [endpoint.name for endpoint in chat.endpoints["small"].replicas] == ["http://small"]
@@ -1,3 +1,15 @@
+from fakes import FakeAsyncOpenAI
+from openai.types.chat.chat_completion_chunk import (
+    ChatCompletionChunk,
+    Choice,
+    ChoiceDelta,
+    ChoiceDeltaToolCall,
+    ChoiceDeltaToolCallFunction,
+)
+
+from rag.components.chat import OpenAIChat
+
+
 async def test_generate_stream(openai_chat):
     buffer = ""
 
@@ -13,3 +25,62 @@ async def test_generate_stream(openai_chat):
         buffer += chunk["content"]
 
     assert buffer == "Hello, world!"
+
+
+class ToolCallAsyncOpenAI(FakeAsyncOpenAI):
+    """Streams two tool calls, each with its arguments split across chunks."""
+
+    class Stream:
+        def __init__(self, deltas: list[ChoiceDelta]):
+            self.deltas = iter(deltas)
+
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            try:
+                delta = next(self.deltas)
+            except StopIteration:
+                raise StopAsyncIteration from None
+            return ChatCompletionChunk(
+                id="0", created=0, model="test", object="chat.completion.chunk", choices=[Choice(index=0, delta=delta)]
+            )
+
+    @staticmethod
+    def call(index: int, arguments: str, name: str | None = None) -> ChoiceDelta:
+        return ChoiceDelta(
+            tool_calls=[
+                ChoiceDeltaToolCall(
+                    index=index,
+                    id=f"call_{index}" if name else None,
+                    function=ChoiceDeltaToolCallFunction(name=name, arguments=arguments),
+                )
+            ]
+        )
+
+    async def create(self, *args, **kwargs):
+        return self.Stream(
+            [
+                self.call(0, "", name="semantic_search"),
+                self.call(0, '{"query": '),
+                self.call(0, '"dogs"}'),
+                self.call(1, "", name="keyword_search"),
+                self.call(1, '{"keywords": ["ca'),
+                ChoiceDelta(content="Searching"),
+            ]
+        )
+
+
+async def test_generate_stream_dispatches_complete_tool_calls():
+    openai_chat = OpenAIChat(api_key="", _openai_client_class=ToolCallAsyncOpenAI)  # type: ignore
+
+    parts = [part async for part in openai_chat.generate_stream(messages=[], model="test")]
+
+    # The first call is yielded as soon as its arguments are valid JSON, before the second one starts;
+    # The incomplete second call is only yielded when the stream ends
+    assert [part["tools"] and [tool["id"] for tool in part["tools"]] for part in parts] == [
+        ["call_0"],
+        None,
+        ["call_1"],
+    ]
+    assert parts[0]["tools"][0]["function"] == {"name": "semantic_search", "arguments": '{"query": "dogs"}'}
@@ -0,0 +1,125 @@
+import asyncio
+import io
+import json
+
+from rag.agent import Agent
+from rag.entrypoints.cli.batch import Ask, read_prompts, run_ask
+from rag.entrypoints.cli.standins import Upstream
+
+
+def test_read_prompts():
+    lines = [
+        '{"id": "a", "prompt": "Who founded Rome?"}',
+        "",
+        '"Who founded Carthage?"',
+        "Who founded Athens?",
+        json.dumps({"messages": [{"role": "system", "content": "Be brief."}, {"role": "user", "content": "Hi"}]}),
+    ]
+
+    items = list(read_prompts(lines))
+
+    assert [item["id"] for item in items] == ["a", 3, 4, 5]
+    assert items[0]["messages"] == [
+        {"role": "system", "content": Agent.system},
+        {"role": "user", "content": "Who founded Rome?"},
+    ]
+    assert items[1]["messages"][-1]["content"] == "Who founded Carthage?"
+    assert items[2]["messages"][-1]["content"] == "Who founded Athens?"
+    assert items[3]["messages"][0]["content"] == "Be brief."
+
+
+def test_read_prompts_without_prompt():
+    lines = ['{"id": "a"}', "[1, 2]", "{}", '{"messages": "hi"}', '{"messages": null}', '{"id": "b", "messages": [{"content": "x"}]}']
+
+    items = list(read_prompts(lines))
+
+    assert items[0] == {"id": "a", "error": "Line 1 has neither a prompt nor messages"}
+    assert items[1]["messages"][-1]["content"] == "[1, 2]"
+    assert items[2] == {"id": 3, "error": "Line 3 has neither a prompt nor messages"}
+    assert items[3]["id"] == 4
+    assert items[3]["error"].startswith("Line 4 has invalid messages")
+    assert items[4]["error"].startswith("Line 5 has invalid messages")
+    assert items[5]["id"] == "b"
+    assert items[5]["error"].startswith("Line 6 has invalid messages")
+
+
+async def test_run_ask_reports_malformed_prompts(agent):
+    output = io.StringIO()
+
+    summary = await run_ask(agent, read_prompts(["Hi", "{}", "Hello", '{"messages": null}']), output, Ask())
+
+    results = {result["id"]: result for result in map(json.loads, output.getvalue().splitlines())}
+    assert summary["prompts"] == 4
+    assert summary["errors"] == 2
+    assert results[2]["error"] == "Line 2 has neither a prompt nor messages"
+    assert results[2]["rounds"] == 0
+    assert results[4]["error"].startswith("Line 4 has invalid messages")
+    assert results[1]["answer"] == results[3]["answer"] == "Hello, world!"
+
+
+async def test_run_ask_completes_tool_calls(standin_chat, qdrant_search, openai_embed):
+    chat = standin_chat(Upstream(ttft=0, token_rate=10_000, answer_tokens=5, tool_call_rate=1))
+    agent = Agent(model="test", _chat=chat, _search=qdrant_search, _embed=openai_embed)
+    output = io.StringIO()
+
+    summary = await run_ask(agent, read_prompts([f"Question {i}" for i in range(5)]), output, Ask(concurrency=2))
+
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert summary["prompts"] == 5
+    assert summary["errors"] == 0
+    assert sorted(result["id"] for result in results) == [1, 2, 3, 4, 5]
+    for result in results:
+        assert result["error"] is None
+        assert result["rounds"] == 2
+        assert result["tool_calls"] == 1
+        assert result["answer"]
+        assert 0 < result["ttft"] <= result["latency"]
+
+
+async def test_run_ask_is_concurrent_and_reports_errors():
+    class SlowAgent(Agent):
+        in_flight = 0
+        peak = 0
+
+        def __init__(self):
+            pass
+
+        async def generate(self, messages):
+            if messages[-1]["content"] == "fail":
+                raise RuntimeError("boom")
+            SlowAgent.in_flight += 1
+            SlowAgent.peak = max(SlowAgent.peak, SlowAgent.in_flight)
+            await asyncio.sleep(0.01)
+            SlowAgent.in_flight -= 1
+            messages.append({"role": "assistant", "content": "ok"})
+            yield "ok"
+
+    output = io.StringIO()
+    summary = await run_ask(SlowAgent(), read_prompts(["fail", *["q"] * 6]), output, Ask(concurrency=3))  # type: ignore
+
+    results = {result["id"]: result for result in map(json.loads, output.getvalue().splitlines())}
+    assert summary == {"prompts": 7, "errors": 1, "duration": summary["duration"]}
+    assert results[1]["error"] == "RuntimeError: boom"
+    assert results[2]["answer"] == "ok"
+    assert SlowAgent.peak == 3
+
+
+async def test_run_ask_gives_up_after_max_rounds():
+    class LoopingAgent(Agent):
+        def __init__(self):
+            pass
+
+        async def generate(self, messages):
+            messages.append({"role": "assistant", "content": "", "tool_calls": [{"id": "0"}]})
+            messages.append({"role": "tool", "tool_call_id": "0", "content": ""})
+            return
+            yield
+
+    output = io.StringIO()
+    await run_ask(LoopingAgent(), read_prompts(["q"]), output, Ask(max_rounds=3))  # type: ignore
+
+    (result,) = map(json.loads, output.getvalue().splitlines())
+    assert result["error"] == "MaxRoundsError: No answer after 3 rounds"
+    assert result["rounds"] == 3
+    assert result["tool_calls"] == 3
+    assert result["ttft"] is None
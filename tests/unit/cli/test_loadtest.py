@@ -0,0 +1,100 @@
+import json
+import socket
+
+import pytest
+
+import httpx
+from fastapi.testclient import TestClient
+
+from rag import config
+from rag.entrypoints.cli.loadtest import LoadTest, _conversation, _serve, _worker_env, percentile
+from rag.entrypoints.cli.standins import Upstream, create_qdrant_standin
+from rag.entrypoints.rest import app
+
+
+def test_percentile():
+    values = [float(i) for i in range(1, 101)]
+
+    assert percentile(values, 50) == 50.5
+    assert percentile(values, 99) == 99.01
+    assert percentile([3.0], 95) == 3.0
+
+
+async def test_openai_standin_answer(standin_chat):
+    upstream = Upstream(ttft=0, token_rate=10_000, answer_tokens=5, tool_call_rate=0)
+
+    chunks = [
+        chunk
+        async for chunk in standin_chat(upstream).generate_stream(
+            messages=[{"role": "user", "content": "Hello"}], model="test"
+        )
+    ]
+
+    assert len(chunks) == 5
+    assert all(chunk["content"] for chunk in chunks)
+
+
+async def test_openai_standin_tool_call(standin_chat):
+    upstream = Upstream(ttft=0, token_rate=10_000, tool_call_rate=1)
+
+    chunks = [
+        chunk
+        async for chunk in standin_chat(upstream).generate_stream(
+            messages=[{"role": "user", "content": "Who founded Rome"}], model="test", tools=[{}]
+        )
+    ]
+
+    (tool,) = chunks[-1]["tools"]
+    assert tool["function"]["name"] == "hybrid_search"
+    assert json.loads(tool["function"]["arguments"])["query"] == "Who founded Rome"
+
+
+def test_qdrant_standin():
+    client = TestClient(create_qdrant_standin(Upstream(search_latency=0)))
+
+    response = client.post("/collections/test/points/query", json={"limit": 3})
+
+    assert [point["id"] for point in response.json()["result"]["points"]] == [0, 1, 2]
+
+
+async def test_conversation_completes_tool_calls(monkeypatch, tool_calling_chat, openai_embed, qdrant_search):
+    monkeypatch.setattr(config, "get_openai_chat", lambda: tool_calling_chat)
+    monkeypatch.setattr(config, "get_openai_embed", lambda: openai_embed)
+    monkeypatch.setattr(config, "get_qdrant", lambda: qdrant_search)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app)) as client:
+        streamed = await _conversation(client, "http://api", LoadTest(stream=True), "Who founded Rome?")
+        posted = await _conversation(client, "http://api", LoadTest(stream=False), "Who founded Rome?")
+        exhausted = await _conversation(client, "http://api", LoadTest(max_rounds=1), "Who founded Rome?")
+
+    assert streamed.ok
+    assert 0 < streamed.ttft <= streamed.latency  # type: ignore
+    assert posted.ok
+    assert not exhausted.ok
+    assert exhausted.ttft is None
+
+
+def test_worker_env_only_points_at_the_standins(monkeypatch):
+    monkeypatch.setenv("QDRANT_REPLICA_URLS", '["http://replica:6333"]')
+    monkeypatch.setenv("record_path", "/tmp/recordings.jsonl.gz")
+    monkeypatch.setenv("OPENAI_URL", "http://real:4000")
+    monkeypatch.setenv("QDRANT_HNSW_EF", "64")
+
+    env = _worker_env(1, 2)
+
+    assert "QDRANT_REPLICA_URLS" not in env
+    assert "record_path" not in env
+    assert env["OPENAI_URL"] == "http://127.0.0.1:1"
+    assert env["QDRANT_URL"] == "http://127.0.0.1:2"
+    assert env["QDRANT_HNSW_EF"] == "64"
+
+
+async def test_serve_fails_if_the_standin_cannot_start():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        sock.listen()
+        port = sock.getsockname()[1]
+
+        with pytest.raises(RuntimeError, match="stopped while starting"):
+            async with _serve(create_qdrant_standin(Upstream()), port):
+                pass
@@ -0,0 +1,48 @@
+import io
+
+from rich.console import Console
+from rich.live import Live
+
+from rag.entrypoints.cli.tui import MarkdownStream
+
+
+def make_stream(max_fps: float = 10.0) -> tuple[MarkdownStream, io.StringIO]:
+    output = io.StringIO()
+    live = Live(console=Console(file=output, width=80), auto_refresh=False)
+    return MarkdownStream(live, max_fps=max_fps), output
+
+
+def test_finished_blocks_are_frozen():
+    stream, output = make_stream()
+
+    for token in ["First ", "paragraph.\n", "\n", "Second ", "para", "graph."]:
+        stream.feed(token)
+
+    assert stream.buffer[stream.frozen :] == "Second paragraph."
+    assert "First paragraph." in output.getvalue()
+    assert "Second" not in output.getvalue()
+
+
+def test_blank_lines_inside_code_fences_do_not_finish_blocks():
+    stream, output = make_stream()
+
+    stream.feed("```python\nx = 1\n\ny = 2\n")
+    assert stream.frozen == 0
+
+    stream.feed("```\n\nAfter.")
+    assert stream.buffer[stream.frozen :] == "After."
+    assert "y = 2" in output.getvalue()
+
+
+def test_trailing_block_rendering_is_throttled(monkeypatch):
+    stream, _ = make_stream(max_fps=1)
+    renders = []
+    monkeypatch.setattr(stream.live, "update", lambda renderable, refresh=False: renders.append(renderable))
+
+    for token in ["a ", "b ", "c "]:
+        stream.feed(token)
+    assert len(renders) == 1
+
+    stream.close()
+    assert len(renders) == 2
+    assert renders[-1].markup == "a b c "
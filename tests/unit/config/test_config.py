@@ -1,3 +1,6 @@
+import pytest
+from pydantic import ValidationError
+
 from rag import config
 from rag.components import chat, search, embed
 
@@ -41,3 +44,73 @@ def test_get_openai_embed():
     second_openai = config.get_openai_embed()
 
     assert openai is second_openai
+
+
+def test_get_qdrant_embedded(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "settings", config.Settings(qdrant_path=tmp_path))
+    config.get_qdrant.cache_clear()
+
+    try:
+        qdrant = config.get_qdrant()
+        assert qdrant.qdrant.init_options["path"] == str(tmp_path)
+    finally:
+        config.get_qdrant.cache_clear()
+
+
+def test_get_sharded_search(monkeypatch):
+    shards = '[{"collection": "a"}, {"collection": "b", "url": "http://other:6333"}]'
+    monkeypatch.setenv("QDRANT_SHARDS", shards)
+    monkeypatch.setattr(config, "settings", config.Settings())
+    config.get_sharded_search.cache_clear()
+
+    try:
+        sharded = config.get_search()
+        assert isinstance(sharded, search.ShardedSearch)
+        assert [shard.collection for shard in sharded.shards] == ["a", "b"]
+        assert sharded.shards[1].qdrant.init_options["location"] == "http://other:6333/"
+    finally:
+        config.get_sharded_search.cache_clear()
+
+
+def test_qdrant_path_rejects_shards_and_replicas(tmp_path):
+    with pytest.raises(ValidationError, match="QDRANT_PATH"):
+        config.Settings(qdrant_path=tmp_path, qdrant_shards=[{"collection": "a"}, {"collection": "b"}])
+
+    with pytest.raises(ValidationError, match="QDRANT_PATH"):
+        config.Settings(qdrant_path=tmp_path, qdrant_replica_urls=["http://replica:6333"])
+
+
+def test_qdrant_in_memory_rejects_shards_and_replicas():
+    with pytest.raises(ValidationError, match="QDRANT_IN_MEMORY"):
+        config.Settings(qdrant_in_memory=True, qdrant_shards=[{"collection": "a"}, {"collection": "b"}])
+
+    with pytest.raises(ValidationError, match="QDRANT_IN_MEMORY"):
+        config.Settings(qdrant_in_memory=True, qdrant_replica_urls=["http://replica:6333"])
+
+
+def test_get_qdrant_replicas(monkeypatch):
+    monkeypatch.setenv("QDRANT_REPLICA_URLS", '["http://replica-1:6333", "http://replica-2:6333"]')
+    monkeypatch.setattr(config, "settings", config.Settings(qdrant_hedge_after=0.2))
+    config.get_qdrant.cache_clear()
+
+    try:
+        qdrant = config.get_qdrant()
+        assert [replica.name for replica in qdrant.replicas.replicas] == ["http://replica-1:6333/", "http://replica-2:6333/"]
+        assert qdrant.replicas.hedge_after == 0.2
+    finally:
+        config.get_qdrant.cache_clear()
+
+
+def test_get_openai_chat_endpoints(monkeypatch):
+    monkeypatch.setenv("OPENAI_CHAT_URLS", '["http://litellm-1:4000", "http://litellm-2:4000"]')
+    monkeypatch.setenv("OPENAI_MODEL_URLS", '{"small": ["http://small:4000"]}')
+    monkeypatch.setattr(config, "settings", config.Settings(openai_hedge_after=0.5))
+    config.get_openai_chat.cache_clear()
+
+    try:
+        openai = config.get_openai_chat()
+        assert openai.base_urls == ["http://litellm-1:4000/", "http://litellm-2:4000/"]
+        assert openai.model_urls == {"small": ["http://small:4000/"]}
+        assert openai.hedge_after == 0.5
+    finally:
+        config.get_openai_chat.cache_clear()
@@ -1,15 +1,13 @@
+import httpx
 import pytest
-from openai.types.chat.chat_completion_chunk import (
-    ChatCompletionChunk,
-    Choice,
-    ChoiceDelta,
-)
-from qdrant_client.http.models import QueryResponse, ScoredPoint
+from fakes import FakeAsyncOpenAI, FakeAsyncQdrantClient
+from openai import AsyncOpenAI
 
 from rag.agent import Agent
 from rag.components.chat import OpenAIChat
 from rag.components.search import QdrantSearch
 from rag.components.embed import OpenAIEmbed
+from rag.entrypoints.cli.standins import Upstream, create_openai_standin
 
 
 @pytest.fixture(scope="module")
@@ -17,6 +15,36 @@ def openai_chat():
     return OpenAIChat(api_key="", _openai_client_class=FakeAsyncOpenAI)  # type: ignore
 
 
+@pytest.fixture
+def standin_chat():
+    """Create chat models answering from OpenAI stand-ins.
+
+    Takes the `Upstream` of a single stand-in, or an `Upstream` or transport per base URL, and `OpenAIChat` arguments.
+    """
+
+    def create(upstreams: Upstream | dict[str, Upstream | httpx.AsyncBaseTransport], **kwargs) -> OpenAIChat:
+        if isinstance(upstreams, Upstream):
+            upstreams = {"http://standin": upstreams}
+        transports = {
+            url: httpx.ASGITransport(create_openai_standin(upstream)) if isinstance(upstream, Upstream) else upstream
+            for url, upstream in upstreams.items()
+        }
+
+        def client_class(api_key, base_url):
+            return AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0, http_client=httpx.AsyncClient(transport=transports[base_url]))
+
+        kwargs.setdefault("base_url", list(transports))
+        return OpenAIChat(api_key="standin", _openai_client_class=client_class, **kwargs)  # type: ignore
+
+    return create
+
+
+@pytest.fixture
+def tool_calling_chat(standin_chat):
+    """A chat model calling a tool on each user message, and answering after the tool results."""
+    return standin_chat(Upstream(ttft=0, token_rate=10_000, answer_tokens=3, tool_call_rate=1))
+
+
 @pytest.fixture(scope="module")
 def openai_embed():
     return OpenAIEmbed(model="mock-ada", api_key="", _openai_client_class=FakeAsyncOpenAI)  # type: ignore
@@ -39,79 +67,3 @@ def agent(openai_chat: OpenAIChat, qdrant_search: QdrantSearch, openai_embed: Op
     agent.search = qdrant_search
     agent.embed = openai_embed
     return agent
-
-
-class FakeAsyncOpenAI:
-    class Response:
-        def __init__(self, text: str):
-            self.text = list(text)
-
-        def __aiter__(self):
-            return self
-
-        async def __anext__(self):
-            if len(self.text) > 0:
-                content = self.text.pop(0)
-                return ChatCompletionChunk(
-                    id="0",
-                    created=0,
-                    model="test",
-                    object="chat.completion.chunk",
-                    choices=[Choice(index=0, delta=ChoiceDelta(content=content))],
-                )
-            else:
-                raise StopAsyncIteration
-
-    def __init__(self, *args, **kwargs): ...
-
-    @property
-    def chat(self):
-        return self
-
-    @property
-    def completions(self):
-        return self
-
-    async def create(self, *args, **kwargs):
-        return self.Response("Hello, world!")
-
-    @property
-    def embeddings(self):
-        return self.Embeddings()
-
-    class Embeddings:
-        class Response:
-            def __init__(self, embedding: list[float]):
-                self.data = [self]
-                self.embedding = embedding
-
-        async def create(self, *args, **kwargs):
-            return self.Response([0.1, 0.2, 0.3])
-
-
-class FakeAsyncQdrantClient:
-    def __init__(self, *args, **kwargs): ...
-
-    async def query_points(self, *args, **kwargs):
-        return QueryResponse(
-            points=[
-                ScoredPoint(
-                    id=1,
-                    version=0,
-                    score=1,
-                    payload={"content": "Dogs are man's best friend"},
-                ),
-                ScoredPoint(
-                    id=2,
-                    version=0,
-                    score=0.5,
-                    payload={"content": "Cats are quite cute"},
-                ),
-                ScoredPoint(
-                    id=3,
-                    version=0,
-                    score=0,
-                    payload={"content": "Cars are a means of transportation"},
-                ),
-            ]
-        )
@@ -0,0 +1,47 @@
+import asyncio
+
+from rag.components.embed import BatchingEmbed
+
+
+class CountingEmbed:
+    def __init__(self):
+        self.batches = []
+
+    async def generate_embedding(self, text, **kwargs):
+        return (await self.generate_embeddings([text], **kwargs))[0]
+
+    async def generate_embeddings(self, texts, **kwargs):
+        self.batches.append(texts)
+        return [[float(len(text))] for text in texts]
+
+
+async def test_generate_embeddings(openai_embed):
+    response = await openai_embed.generate_embeddings(texts=["Hello", "world"])
+
+    assert len(response) == 2
+    assert isinstance(response[0][0], float)
+
+
+async def test_concurrent_requests_share_a_batch():
+    embed = CountingEmbed()
+    batching = BatchingEmbed(embed, max_batch_size=3)
+
+    texts = ["a", "bb", "ccc", "dddd", "eeeee"]
+    embeddings = await asyncio.gather(*(batching.generate_embedding(text) for text in texts))
+
+    assert embeddings == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+    assert embed.batches == [["a", "bb", "ccc"], ["dddd", "eeeee"]]
+
+
+async def test_batch_errors_reach_every_caller():
+    class FailingEmbed(CountingEmbed):
+        async def generate_embeddings(self, texts, **kwargs):
+            raise RuntimeError("upstream down")
+
+    batching = BatchingEmbed(FailingEmbed())
+
+    results = await asyncio.gather(
+        batching.generate_embedding("a"), batching.generate_embedding("b"), return_exceptions=True
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from rag import config
+from rag.components.embed import FastEmbedEmbed
+
+
+class FakeTextEmbedding:
+    def __init__(self, model_name, **kwargs):
+        self.model_name = model_name
+        self.options = kwargs
+        self.calls = []
+
+    def _embed(self, kind, texts, batch_size):
+        self.calls.append((kind, list(texts), batch_size, threading.current_thread().name))
+        time.sleep(0.05)
+        return (np.array([float(len(text)), 1.0], dtype=np.float32) for text in texts)
+
+    def query_embed(self, query, batch_size=256):
+        return self._embed("query", query, batch_size)
+
+    def passage_embed(self, texts, batch_size=256):
+        return self._embed("passage", texts, batch_size)
+
+
+@pytest.fixture
+def fastembed_embed(tmp_path):
+    return FastEmbedEmbed(model="fake", model_path=tmp_path, threads=2, batch_size=4, _text_embedding_class=FakeTextEmbedding)  # type: ignore
+
+
+def test_model_options(fastembed_embed, tmp_path):
+    assert fastembed_embed.text_embedding.model_name == "fake"
+    assert fastembed_embed.text_embedding.options == {"threads": 2, "specific_model_path": str(tmp_path)}
+
+
+async def test_generate_embedding(fastembed_embed):
+    response = await fastembed_embed.generate_embedding("Hello")
+
+    assert response == [5.0, 1.0]
+    assert all(isinstance(value, float) for value in response)
+
+
+async def test_generate_embeddings_in_executor(fastembed_embed):
+    response = await fastembed_embed.generate_embeddings(["a", "bb", "ccc"])
+
+    assert response == [[1.0, 1.0], [2.0, 1.0], [3.0, 1.0]]
+    kind, texts, batch_size, thread = fastembed_embed.text_embedding.calls[-1]
+    assert (kind, texts, batch_size) == ("query", ["a", "bb", "ccc"], 4)
+    assert thread.startswith("fastembed")
+
+
+async def test_generate_passage_embeddings(fastembed_embed):
+    await fastembed_embed.generate_passage_embeddings(["a document"])
+
+    assert fastembed_embed.text_embedding.calls[-1][0] == "passage"
+
+
+async def test_inference_does_not_block_the_event_loop(fastembed_embed):
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.005)
+
+    ticker = asyncio.create_task(tick())
+    try:
+        await asyncio.gather(*(fastembed_embed.generate_embedding("Hello") for _ in range(2)))
+    finally:
+        ticker.cancel()
+
+    # Two inferences of 50 ms on a single worker take about 100 ms, during which the loop keeps running
+    assert ticks >= 5
+
+
+def test_get_embed_backend(monkeypatch):
+    monkeypatch.setattr(config, "settings", config.Settings(embed_backend="local"))
+    monkeypatch.setattr(config, "get_local_embed", lambda: "local")
+
+    assert config.get_embed() == "local"
+
+    monkeypatch.setattr(config, "settings", config.Settings(embed_backend="openai"))
+
+    assert config.get_embed() is config.get_openai_embed()
@@ -0,0 +1,59 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from rag import config
+from rag.entrypoints import rest
+from rag.entrypoints.rest import app
+
+
+def test_chat_batch(monkeypatch, openai_chat, openai_embed, qdrant_search):
+    monkeypatch.setattr(config, "get_openai_chat", lambda: openai_chat)
+    monkeypatch.setattr(config, "get_openai_embed", lambda: openai_embed)
+    monkeypatch.setattr(config, "get_qdrant", lambda: qdrant_search)
+
+    conversations = [[{"role": "user", "content": f"Question {i}"}] for i in range(5)]
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/chat/batch",
+            json={"model": "test", "conversations": conversations, "concurrency": 2},
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    results = [json.loads(line) for line in response.text.splitlines()]
+
+    assert sorted(result["index"] for result in results) == [0, 1, 2, 3, 4]
+    assert all(result["response"] == "Hello, world!" for result in results)
+
+
+def test_chat_batch_completes_tool_calls(monkeypatch, tool_calling_chat, openai_embed, qdrant_search):
+    monkeypatch.setattr(config, "get_openai_chat", lambda: tool_calling_chat)
+    monkeypatch.setattr(config, "get_openai_embed", lambda: openai_embed)
+    monkeypatch.setattr(config, "get_qdrant", lambda: qdrant_search)
+
+    conversations = [[{"role": "user", "content": f"Question {i}"}] for i in range(3)]
+
+    with TestClient(app) as client:
+        response = client.post("/chat/batch", json={"model": "test", "conversations": conversations})
+
+    results = [json.loads(line) for line in response.text.splitlines()]
+
+    assert sorted(result["index"] for result in results) == [0, 1, 2]
+    assert all(result["response"] for result in results)
+
+
+def test_chat_batch_reports_exhausted_rounds(monkeypatch, tool_calling_chat, openai_embed, qdrant_search):
+    monkeypatch.setattr(config, "get_openai_chat", lambda: tool_calling_chat)
+    monkeypatch.setattr(config, "get_openai_embed", lambda: openai_embed)
+    monkeypatch.setattr(config, "get_qdrant", lambda: qdrant_search)
+    monkeypatch.setattr(rest, "MAX_SESSION_ROUNDS", 1)
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/chat/batch", json={"model": "test", "conversations": [[{"role": "user", "content": "Question"}]]}
+        )
+
+    assert [json.loads(line) for line in response.text.splitlines()] == [{"index": 0, "error": "No answer after 1 rounds"}]
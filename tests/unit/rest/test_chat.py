@@ -0,0 +1,144 @@
+import json
+
+import pytest
+from fastapi.exceptions import RequestValidationError
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from rag import config
+from rag.entrypoints.rest import Data, app
+from rag.entrypoints.rest.models import encode_sse, parse_chat_payload
+
+
+def test_chat(monkeypatch, openai_chat, openai_embed, qdrant_search):
+    monkeypatch.setattr(config, "get_openai_chat", lambda: openai_chat)
+    monkeypatch.setattr(config, "get_openai_embed", lambda: openai_embed)
+    monkeypatch.setattr(config, "get_qdrant", lambda: qdrant_search)
+
+    with TestClient(app) as client:
+        response = client.post("/chat", json={"model": "test", "messages": [{"role": "user", "content": "Hi"}]})
+
+    assert response.status_code == 200
+    assert response.json() == {"response": "Hello, world!"}
+
+
+def test_chat_rejects_invalid_messages():
+    with TestClient(app) as client:
+        response = client.post("/chat", json={"model": "test", "messages": [{"role": "user"}]})
+
+    assert response.status_code == 422
+    assert ["body", "messages", 0, "UserMessage", "content"] in [error["loc"] for error in response.json()["detail"]]
+
+
+def test_chat_rejects_invalid_json():
+    with TestClient(app) as client:
+        response = client.post("/chat", content=b"{", headers={"Content-Type": "application/json"})
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "json_invalid"
+
+
+def test_parse_chat_payload_returns_dicts():
+    messages = [
+        {"role": "system", "content": "Be nice"},
+        {"role": "user", "content": "Hi"},
+        {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [{"id": "call", "type": "function", "function": {"name": "f", "arguments": "{}"}}],
+        },
+        {"role": "tool", "tool_call_id": "call", "content": "Results"},
+    ]
+
+    payload = parse_chat_payload(json.dumps({"model": "test", "messages": messages}).encode())
+
+    assert payload == {"model": "test", "messages": messages}
+
+
+def test_chat_openapi_schema():
+    schema = app.openapi()["paths"]["/chat"]["post"]["requestBody"]["content"]["application/json"]["schema"]
+
+    assert schema["required"] == ["model", "messages"]
+    assert "UserMessage" in schema["$defs"]
+
+
+def test_chat_returns_tool_round_messages(monkeypatch, tool_calling_chat, openai_embed, qdrant_search):
+    monkeypatch.setattr(config, "get_openai_chat", lambda: tool_calling_chat)
+    monkeypatch.setattr(config, "get_openai_embed", lambda: openai_embed)
+    monkeypatch.setattr(config, "get_qdrant", lambda: qdrant_search)
+
+    messages = [{"role": "user", "content": "Who founded Rome?"}]
+
+    with TestClient(app) as client:
+        first = client.post("/chat", json={"model": "test", "messages": messages}).json()
+        messages += first["messages"]
+        second = client.post("/chat", json={"model": "test", "messages": messages}).json()
+
+    assert first["response"] == ""
+    assert [message["role"] for message in first["messages"]] == ["assistant", "tool"]
+    assert second["response"]
+    assert "messages" not in second
+
+
+def test_chat_streams_tool_round_messages(monkeypatch, tool_calling_chat, openai_embed, qdrant_search):
+    monkeypatch.setattr(config, "get_openai_chat", lambda: tool_calling_chat)
+    monkeypatch.setattr(config, "get_openai_embed", lambda: openai_embed)
+    monkeypatch.setattr(config, "get_qdrant", lambda: qdrant_search)
+
+    with TestClient(app) as client:
+        response = client.post("/chat", params={"stream": True}, json={"model": "test", "messages": [{"role": "user", "content": "Hi"}]})
+
+    lines = response.text.splitlines()
+    messages = json.loads(lines[lines.index("event: messages") + 1].removeprefix("data: "))
+
+    assert [message["role"] for message in messages] == ["assistant", "tool"]
+    assert lines.index("event: messages") < lines.index("event: timing")
+
+
+def test_encode_sse():
+    assert encode_sse("Hello") == 'data: "Hello"\n\n'
+    assert encode_sse({"name": "request"}, "timing") == 'event: timing\ndata: {"name": "request"}\n\n'
+
+
+TOOL_CALL = {"id": "call", "type": "function", "function": {"name": "f", "arguments": "{}"}}
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"messages": []},
+        {"model": "test", "messages": "Hi"},
+        {"model": "test", "messages": [{"role": "user"}]},
+        {"model": "test", "messages": [{"role": "bot", "content": "Hi"}]},
+        {"model": "test", "messages": [{"content": "Hi"}]},
+        {"model": "test", "messages": [{"role": "assistant", "content": "Hi"}]},
+        {"model": "test", "messages": [{"role": "assistant", "tool_calls": [TOOL_CALL]}]},
+        {"model": "test", "messages": [{"role": "assistant", "content": None, "tool_calls": [{**TOOL_CALL, "type": "code"}]}]},
+        {"model": "test", "messages": [{"role": "tool", "content": "Results"}]},
+        {"model": 1, "messages": [{"role": "user", "content": ["Hi"]}]},
+    ],
+)
+def test_parse_chat_payload_rejects_what_data_rejects(payload):
+    body = json.dumps(payload).encode()
+
+    with pytest.raises(ValidationError) as expected:
+        Data.model_validate_json(body)
+    with pytest.raises(RequestValidationError) as raised:
+        parse_chat_payload(body)
+
+    assert [(error["loc"][1:], error["type"], error["msg"]) for error in raised.value.errors()] == [
+        (error["loc"], error["type"], error["msg"]) for error in expected.value.errors()
+    ]
+
+
+def test_parse_chat_payload_accepts_what_data_accepts():
+    messages = [
+        {"role": "system", "content": "Be nice"},
+        {"role": "user", "content": "Hi", "name": "ignored"},
+        {"role": "assistant", "content": None, "tool_calls": [TOOL_CALL]},
+        {"role": "tool", "tool_call_id": "call", "content": "Results"},
+        {"role": "assistant", "content": "Hello", "tool_calls": None},
+    ]
+    body = json.dumps({"model": "test", "messages": messages}).encode()
+
+    assert parse_chat_payload(body) == Data.model_validate_json(body).model_dump()
@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import time
+
+import httpx
+from prometheus_client import REGISTRY
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from rag import telemetry
+from rag.entrypoints.rest.profiling import ProfilingMiddleware
+
+
+async def work(request):
+    with telemetry.start_trace("chat"), telemetry.stage("embed"):
+        end = time.process_time() + 0.02
+        while time.process_time() < end:
+            pass
+    return PlainTextResponse("done")
+
+
+app = Starlette(routes=[Route("/chat", work, methods=["POST"])])
+
+
+async def post(middleware: ProfilingMiddleware, headers: dict[str, str] | None = None) -> httpx.Response:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(middleware), base_url="http://test") as client:
+        return await client.post("/chat", headers=headers)
+
+
+async def test_flagged_request_is_profiled(tmp_path):
+    middleware = ProfilingMiddleware(app, directory=tmp_path, token="secret", interval=0.001, format="folded")
+
+    response = await post(middleware, {"X-Profile": "secret"})
+
+    assert response.text == "done"
+    (path,) = tmp_path.iterdir()
+    assert "POST--chat" in path.name
+    assert all(line.startswith(("embed;", "request;", "chat;")) for line in path.read_text().splitlines())
+    assert "embed;" in path.read_text()
+
+
+async def test_unflagged_requests_are_sampled(tmp_path):
+    draws = iter([0.05, 0.5])
+    middleware = ProfilingMiddleware(app, directory=tmp_path, sample_rate=0.1, min_interval=0, _random=lambda: next(draws))
+
+    await post(middleware)
+    await post(middleware)
+
+    assert [path.suffixes[-2:] for path in tmp_path.iterdir()] == [[".speedscope", ".json"]]
+
+
+async def test_header_requires_the_token(tmp_path):
+    await post(ProfilingMiddleware(app, directory=tmp_path, min_interval=0), {"X-Profile": "1"})
+    await post(ProfilingMiddleware(app, directory=tmp_path, token="secret", min_interval=0), {"X-Profile": "guess"})
+
+    assert not tmp_path.exists() or not list(tmp_path.iterdir())
+
+
+async def test_profiles_are_rate_limited(tmp_path):
+    middleware = ProfilingMiddleware(app, directory=tmp_path, sample_rate=1, token="secret", min_interval=60)
+
+    for _ in range(3):
+        await post(middleware, {"X-Profile": "secret"})
+    await post(middleware)
+
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_request_is_served_when_profiling_cannot_start(tmp_path):
+    middleware = ProfilingMiddleware(app, directory=tmp_path, sample_rate=1, min_interval=0)
+    before = REGISTRY.get_sample_value("rag_profiles_total", {"outcome": "unavailable"}) or 0
+    responses = []
+
+    # Sampling requires the main thread, which a threaded server does not run requests in
+    thread = threading.Thread(target=lambda: responses.append(asyncio.run(post(middleware))))
+    thread.start()
+    thread.join()
+
+    (response,) = responses
+    assert response.status_code == 200
+    assert response.text == "done"
+    assert not tmp_path.exists() or not list(tmp_path.iterdir())
+    assert REGISTRY.get_sample_value("rag_profiles_total", {"outcome": "unavailable"}) == before + 1
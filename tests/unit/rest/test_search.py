@@ -0,0 +1,43 @@
+from fastapi.testclient import TestClient
+
+from rag import config
+from rag.entrypoints.rest import app
+
+
+def test_search(monkeypatch, openai_embed, qdrant_search):
+    monkeypatch.setattr(config, "get_openai_embed", lambda: openai_embed)
+    monkeypatch.setattr(config, "get_qdrant", lambda: qdrant_search)
+
+    queries = [
+        {"mode": "hybrid", "query": "pets", "keywords": ["dogs"], "limit": 3},
+        {"mode": "semantic", "query": "pets"},
+        {"mode": "keyword", "keywords": ["cars"]},
+    ]
+
+    with TestClient(app) as client:
+        response = client.post("/search", json={"queries": queries})
+
+    assert response.status_code == 200
+    assert "qdrant_query" in response.headers["Server-Timing"]
+
+    results = response.json()["results"]
+
+    assert len(results) == 3
+    assert results[0][0] == {"score": 1, "data": {"content": "Dogs are man's best friend"}}
+
+
+def test_search_rejects_incomplete_queries():
+    with TestClient(app) as client:
+        response = client.post("/search", json={"queries": [{"mode": "hybrid", "query": "pets"}]})
+
+    assert response.status_code == 422
+
+
+def test_search_rejects_limits_above_search_limit():
+    queries = [{"mode": "keyword", "keywords": ["cars"], "limit": config.settings.search_limit + 1}]
+
+    with TestClient(app) as client:
+        response = client.post("/search", json={"queries": queries})
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "less_than_equal"
@@ -0,0 +1,92 @@
+import os
+import time
+
+from fastapi.testclient import TestClient
+
+from rag import config
+from rag.entrypoints.rest import app
+from rag.entrypoints.rest.sessions import SessionStore
+
+
+def test_chat_session(monkeypatch, openai_chat, openai_embed, qdrant_search):
+    monkeypatch.setattr(config, "get_openai_chat", lambda: openai_chat)
+    monkeypatch.setattr(config, "get_openai_embed", lambda: openai_embed)
+    monkeypatch.setattr(config, "get_qdrant", lambda: qdrant_search)
+
+    with TestClient(app) as client:
+        first = client.post(
+            "/chat/session",
+            json={"model": "test", "message": {"role": "user", "content": "Hi"}},
+        )
+        session_id = first.json()["session_id"]
+
+        second = client.post(
+            "/chat/session",
+            json={
+                "model": "test",
+                "session_id": session_id,
+                "message": {"role": "user", "content": "Again"},
+            },
+        )
+
+    assert first.status_code == 200
+    assert first.headers["x-session-id"] == session_id
+    assert second.json() == {"session_id": session_id, "response": "Hello, world!"}
+
+
+def test_chat_session_not_found():
+    with TestClient(app) as client:
+        response = client.post(
+            "/chat/session",
+            json={
+                "model": "test",
+                "session_id": "missing",
+                "message": {"role": "user", "content": "Hi"},
+            },
+        )
+
+    assert response.status_code == 404
+
+
+async def test_session_store_evicts_least_recently_used():
+    store = SessionStore(max_sessions=2)
+
+    await store.put("a", [{"role": "user", "content": "a"}])
+    await store.put("b", [{"role": "user", "content": "b"}])
+    await store.get("a")
+    await store.put("c", [{"role": "user", "content": "c"}])
+
+    assert await store.get("a") is not None
+    assert await store.get("b") is None
+    assert await store.get("c") is not None
+
+
+async def test_session_store_expires():
+    store = SessionStore(ttl=0)
+
+    await store.put("a", [{"role": "user", "content": "a"}])
+    time.sleep(0.01)
+
+    assert await store.get("a") is None
+
+
+async def test_session_store_persists(tmp_path):
+    messages = [{"role": "user", "content": "a"}]
+    await SessionStore(path=tmp_path).put("a", messages)
+
+    assert await SessionStore(path=tmp_path).get("a") == messages
+
+    # Expired files are removed when they are read
+    expired = tmp_path / "a.json"
+    os.utime(expired, (0, 0))
+    assert await SessionStore(path=tmp_path).get("a") is None
+    assert not expired.exists()
+
+
+async def test_session_store_rejects_unsafe_file_names(tmp_path):
+    store = SessionStore(max_sessions=0, path=tmp_path)
+
+    await store.put("../a", [{"role": "user", "content": "a"}])
+
+    assert list(tmp_path.iterdir()) == []
+    assert await store.get("../a") is None
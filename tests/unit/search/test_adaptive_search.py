@@ -0,0 +1,82 @@
+import pytest
+from qdrant_client import models
+
+from rag.components.search import QdrantSearch
+
+# Six similar documents about dogs, and one clear best match for "cars"
+VECTORS = [[1.0, 0.01 * i, 0.0, 0.0] for i in range(6)] + [[0.0, 0.0, 1.0, 0.0], [0.0, 1.0, 0.2, 0.0]]
+DOGS = [1.0, 0.0, 0.0, 0.0]
+CARS = [0.0, 0.0, 1.0, 0.0]
+
+
+@pytest.fixture
+async def adaptive_search():
+    search = QdrantSearch(collection="adaptive", url=":memory:", adaptive_limit=2)
+    await search.create_collection(dimensions=4)
+
+    await search.qdrant.upsert(
+        "adaptive",
+        points=[
+            models.PointStruct(id=i, vector={"dense": vector}, payload={"content": f"Document {i}"})
+            for i, vector in enumerate(VECTORS)
+        ],
+    )
+    return search
+
+
+async def test_adaptive_search_goes_deeper_on_flat_scores(adaptive_search):
+    results = await adaptive_search.semantic_search(query=DOGS, limit=6)
+
+    assert len(results) == 6
+
+
+async def test_adaptive_search_stays_shallow_on_clear_winners(adaptive_search):
+    results = await adaptive_search.semantic_search(query=CARS, limit=6)
+
+    assert [result["data"]["content"] for result in results] == ["Document 6", "Document 7"]
+
+
+async def test_adaptive_batch_search(adaptive_search):
+    dogs, cars = await adaptive_search.batch_search(
+        [{"mode": "semantic", "query": DOGS, "limit": 6}, {"mode": "semantic", "query": CARS, "limit": 6}]
+    )
+
+    assert len(dogs) == 6
+    assert len(cars) == 2
+
+
+async def test_score_threshold(adaptive_search):
+    results = await adaptive_search.semantic_search(query=CARS, limit=6, score_threshold=0.5)
+    [batch] = await adaptive_search.batch_search(
+        [{"mode": "semantic", "query": CARS, "limit": 6, "score_threshold": 0.5}]
+    )
+
+    assert [result["data"]["content"] for result in results] == ["Document 6"]
+    assert batch == results
+
+
+async def test_hybrid_search_thresholds_dense_candidates_only(adaptive_search):
+    results = await adaptive_search.hybrid_search(query=CARS, keywords=["cars"], limit=6, score_threshold=0.5)
+    [batch] = await adaptive_search.batch_search(
+        [{"mode": "hybrid", "query": CARS, "keywords": ["cars"], "limit": 6, "score_threshold": 0.5}]
+    )
+
+    assert [result["data"]["content"] for result in results] == ["Document 6"]
+    assert batch == results
+
+
+async def test_hybrid_search_is_not_adaptive(adaptive_search, monkeypatch):
+    limits = []
+    query = adaptive_search._query
+
+    async def counting_query(request, limit):
+        limits.append(limit)
+        return await query(request, limit)
+
+    monkeypatch.setattr(adaptive_search, "_query", counting_query)
+
+    results = await adaptive_search.hybrid_search(query=CARS, keywords=["cars"], limit=6)
+    [batch] = await adaptive_search.batch_search([{"mode": "hybrid", "query": CARS, "keywords": ["cars"], "limit": 6}])
+
+    assert limits == [6]
+    assert len(results) == len(batch) == 6
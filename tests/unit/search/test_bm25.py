@@ -0,0 +1,56 @@
+import pytest
+from fastembed import SparseTextEmbedding
+from prometheus_client import REGISTRY
+
+from rag.components.search import Bm25
+
+TEXTS = [
+    "dogs cats cars",
+    "The history of the Roman Empire, and its emperors!",
+    "running runner runs ran",
+    "don't won't shouldn't it's",
+    "snake_case _ __ under_score",
+    "Café naïve façade Straße",
+    "42 3.14 2025-01-01",
+    "x" * 41 + " short",
+    "dog dog DOG Dogs",
+    "",
+    "!!! ???",
+]
+
+
+@pytest.fixture(scope="module")
+def fastembed_bm25():
+    return SparseTextEmbedding(model_name="Qdrant/bm25")
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_bm25_matches_fastembed(fastembed_bm25, text):
+    expected = next(iter(fastembed_bm25.query_embed(text)))
+
+    indices, values = Bm25().encode(text)
+
+    assert list(indices) == sorted(expected.indices.tolist())
+    assert list(values) == [1.0] * len(expected.indices)
+
+
+def test_bm25_memoizes_encodings():
+    bm25 = Bm25(cache_size=2)
+
+    assert bm25.encode("dogs cats") is bm25.encode("dogs cats")
+    assert bm25._encode.cache_info().hits == 1
+
+
+def test_bm25_memo_hits_are_counted():
+    def count(result):
+        return REGISTRY.get_sample_value("rag_cache_requests_total", {"cache": "bm25", "result": result}) or 0
+
+    hits, misses = count("hit"), count("miss")
+    bm25 = Bm25()
+
+    bm25.encode("dogs cats")
+    bm25.encode("dogs cats")
+    bm25.encode("cars")
+
+    assert count("hit") == hits + 1
+    assert count("miss") == misses + 2
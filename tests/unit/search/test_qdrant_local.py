@@ -0,0 +1,104 @@
+import pytest
+from qdrant_client import models
+
+from rag.components.search import QdrantSearch, truncate_embedding
+
+DOCS = ["Dogs are man's best friend", "Cats are quite cute", "Cars are a means of transportation"]
+VECTORS = [[1.0, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0], [0.0, 0.0, 1.0, 0.0]]
+
+
+@pytest.fixture
+async def local_search(request):
+    search = QdrantSearch(
+        collection="local",
+        url=":memory:",
+        search_params=models.SearchParams(hnsw_ef=64, exact=False),
+    )
+    await search.create_collection(dimensions=4, quantization=request.param, on_disk=True)
+
+    sparse = search._sparse_vectors([doc.split() for doc in DOCS])
+    await search.qdrant.upsert(
+        "local",
+        points=[
+            models.PointStruct(
+                id=i, vector={"dense": VECTORS[i], "sparse": sparse[i]}, payload={"content": doc}
+            )
+            for i, doc in enumerate(DOCS)
+        ],
+    )
+    return search
+
+
+@pytest.mark.parametrize("local_search", ["scalar", "binary", None], indirect=True)
+async def test_create_collection(local_search):
+    info = await local_search.qdrant.get_collection("local")
+    dense = info.config.params.vectors["dense"]
+
+    assert dense.size == 4
+    assert dense.on_disk is True
+
+
+@pytest.mark.filterwarnings("ignore:Local mode performs exact")
+@pytest.mark.parametrize("local_search", ["scalar"], indirect=True)
+async def test_search_params(local_search):
+    params = models.SearchParams(
+        exact=True, quantization=models.QuantizationSearchParams(rescore=True, oversampling=2.0)
+    )
+
+    semantic = await local_search.semantic_search(query=VECTORS[1], limit=1, params=params)
+    hybrid = await local_search.hybrid_search(query=VECTORS[0], keywords=["dogs"], limit=1)
+    batch = await local_search.batch_search(
+        [{"mode": "semantic", "query": VECTORS[2], "limit": 1}], params=params
+    )
+
+    assert semantic[0]["data"]["content"] == DOCS[1]
+    assert hybrid[0]["data"]["content"] == DOCS[0]
+    assert batch[0][0]["data"]["content"] == DOCS[2]
+
+
+async def test_small_vector_prefetch():
+    search = QdrantSearch(collection="small", url=":memory:", small_dimensions=2, small_oversampling=2)
+    await search.create_collection(dimensions=4)
+
+    vectors = [[0.9, 0.1, 0.4, 0.0], [0.1, 0.9, 0.0, 0.4], [0.7, 0.7, 0.0, 0.0]]
+    await search.qdrant.upsert(
+        "small",
+        points=[
+            models.PointStruct(
+                id=i,
+                vector={"dense": vector, "dense_small": truncate_embedding(vector, 2)},
+                payload={"content": DOCS[i]},
+            )
+            for i, vector in enumerate(vectors)
+        ],
+    )
+
+    info = await search.qdrant.get_collection("small")
+    assert info.config.params.vectors["dense_small"].size == 2
+
+    # Prefetched on the small vectors, ranked on the full ones
+    result = await search.semantic_search(query=[0.8, 0.2, 0.6, 0.0], limit=1)
+    assert result[0]["data"]["content"] == DOCS[0]
+
+
+def test_truncate_embedding():
+    assert truncate_embedding([3.0, 4.0, 12.0], 2) == [0.6, 0.8]
+
+
+async def test_embedded_on_disk(tmp_path):
+    search = QdrantSearch(collection="disk", path=str(tmp_path))
+    await search.create_collection(dimensions=4)
+    await search.qdrant.upsert(
+        "disk",
+        points=[
+            models.PointStruct(id=i, vector={"dense": VECTORS[i]}, payload={"content": doc})
+            for i, doc in enumerate(DOCS)
+        ],
+    )
+    await search.qdrant.close()
+
+    reopened = QdrantSearch(collection="disk", path=str(tmp_path))
+    result = await reopened.semantic_search(query=VECTORS[2], limit=1)
+    await reopened.qdrant.close()
+
+    assert result[0]["data"]["content"] == DOCS[2]
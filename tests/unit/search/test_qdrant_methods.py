@@ -32,3 +32,20 @@ async def test_hybrid_search(qdrant_search):
         {"score": 0.5, "data": {"content": "Cats are quite cute"}},
         {"score": 0, "data": {"content": "Cars are a means of transportation"}},
     ]
+
+
+async def test_batch_search(qdrant_search):
+    results = await qdrant_search.batch_search(
+        [
+            {"mode": "hybrid", "query": [0.1, 0.2, 0.3], "keywords": ["dogs"], "limit": 3},
+            {"mode": "semantic", "query": [0.1, 0.2, 0.3]},
+            {"mode": "keyword", "keywords": ["cars"], "limit": 3},
+        ]
+    )
+
+    assert len(results) == 3
+    assert all(result[0] == {"score": 1, "data": {"content": "Dogs are man's best friend"}} for result in results)
+
+
+async def test_batch_search_empty(qdrant_search):
+    assert await qdrant_search.batch_search([]) == []
@@ -0,0 +1,134 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+import uvicorn
+from prometheus_client import REGISTRY
+from qdrant_client.http.exceptions import UnexpectedResponse
+
+from rag.components.search import QdrantSearch
+from rag.components.replicas import ReplicaPool
+from rag.entrypoints.cli.standins import Upstream, create_qdrant_standin
+
+QUERY = [1.0, 0.0, 0.0, 0.0]
+
+
+@asynccontextmanager
+async def standin(latency):
+    server = uvicorn.Server(
+        uvicorn.Config(create_qdrant_standin(Upstream(search_latency=latency)), port=0, log_level="warning")
+    )
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    try:
+        yield f"http://127.0.0.1:{server.servers[0].sockets[0].getsockname()[1]}"
+    finally:
+        server.should_exit = True
+        await task
+
+
+def served(url, outcome="ok"):
+    return REGISTRY.get_sample_value("rag_replica_requests_total", {"replica": url, "outcome": outcome}) or 0
+
+
+async def test_routes_to_the_fastest_replica():
+    async with standin(0.001) as fast, standin(0.05) as slow:
+        search = QdrantSearch(collection="test", url=[fast, slow])
+        # Warm both clients up, so that their first request does not skew the estimates
+        for replica in search.replicas.replicas:
+            await replica.client.query_points("test", query=QUERY, limit=1)
+        before = served(fast), served(slow)
+
+        for _ in range(20):
+            assert len(await search.semantic_search(QUERY, limit=3)) == 3
+
+        assert served(fast) - before[0] > served(slow) - before[1]
+        fast_replica, slow_replica = search.replicas.replicas
+        assert fast_replica.latency < slow_replica.latency
+
+
+async def test_unhealthy_replica_is_taken_out_of_rotation():
+    async with standin(0.001) as up:
+        down = "http://127.0.0.1:9"
+        with pytest.warns(UserWarning, match="server version"):
+            search = QdrantSearch(collection="test", url=[down, up], replica_cooldown=60)
+        down_replica, up_replica = search.replicas.replicas
+        # Route the first query to the unreachable replica
+        up_replica.latency = 10.0
+        up_replica.observed = time.monotonic()
+
+        for _ in range(5):
+            assert len(await search.semantic_search(QUERY, limit=3)) == 3
+
+        assert down_replica.down_until > time.monotonic()
+        assert served(down, "error") == 1
+
+
+async def test_hedges_slow_queries():
+    async with standin(0.001) as fast, standin(1) as slow:
+        search = QdrantSearch(collection="test", url=[slow, fast], hedge_after=0.05)
+        slow_replica, fast_replica = search.replicas.replicas
+        # Route the first query to the slow replica
+        fast_replica.latency = 10.0
+        fast_replica.observed = time.monotonic()
+
+        start = time.perf_counter()
+        [results] = await search.batch_search([{"mode": "semantic", "query": QUERY, "limit": 3}])
+
+        assert len(results) == 3
+        assert time.perf_counter() - start < 0.5
+        # The losing query is cancelled in the background
+        await asyncio.sleep(0.05)
+        assert served(slow, "cancelled") == 1
+        assert slow_replica.latency >= 0.05
+
+
+class FakeClient:
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = 0
+
+    async def query(self):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return "answer"
+
+
+async def test_query_errors_do_not_fail_over():
+    bad_request = UnexpectedResponse(400, "Bad Request", b"", httpx.Headers())
+    clients = {"a": FakeClient(bad_request), "b": FakeClient(bad_request)}
+    pool = ReplicaPool(clients, is_failure=lambda error: not isinstance(error, UnexpectedResponse))
+
+    with pytest.raises(UnexpectedResponse):
+        await pool.run(lambda client: client.query())
+
+    assert sum(client.calls for client in clients.values()) == 1
+    assert all(replica.down_until == 0 for replica in pool.replicas)
+
+
+async def test_fails_over_until_every_replica_failed():
+    clients = {"a": FakeClient(ConnectionError()), "b": FakeClient(ConnectionError()), "c": FakeClient()}
+    pool = ReplicaPool(clients)
+
+    assert await pool.run(lambda client: client.query()) == "answer"
+
+    failing = ReplicaPool({"a": FakeClient(ConnectionError()), "b": FakeClient(ConnectionError())})
+    with pytest.raises(ConnectionError):
+        await failing.run(lambda client: client.query())
+    assert all(replica.down_until > time.monotonic() for replica in failing.replicas)
+
+
+def test_latency_estimates_fade_while_unused():
+    pool = ReplicaPool({"a": FakeClient(), "b": FakeClient()}, half_life=10)
+    a, b = pool.replicas
+    now = time.monotonic()
+    a.latency, a.observed = 1.0, now - 20
+    b.latency, b.observed = 0.5, now
+
+    assert a.cost(now, pool.half_life) == pytest.approx(0.25)
+    assert pool._pick([]) is a
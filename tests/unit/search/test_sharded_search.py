@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+from qdrant_client import models
+
+from rag.components.search import QdrantSearch, ShardedSearch, fuse_results
+
+# The corpus is split over three local Qdrant instances; Document i has vector i in the dense space
+VECTORS = [[1.0, 0.1 * i, 0.0, 0.0] for i in range(9)]
+QUERY = [1.0, 0.0, 0.0, 0.0]
+
+
+class SlowSearch:
+    def __init__(self, search, delay):
+        self.search = search
+        self.delay = delay
+
+    async def semantic_search(self, query, limit=25, **kwargs):
+        await asyncio.sleep(self.delay)
+        return await self.search.semantic_search(query, limit, **kwargs)
+
+    async def batch_search(self, searches):
+        await asyncio.sleep(self.delay)
+        return await self.search.batch_search(searches)
+
+
+class FailingSearch:
+    async def semantic_search(self, query, limit=25, **kwargs):
+        raise ConnectionError("Shard is down")
+
+
+@pytest.fixture
+async def shards():
+    shards = []
+    for shard in range(3):
+        search = QdrantSearch(collection=f"shard{shard}", url=":memory:")
+        await search.create_collection(dimensions=4)
+        await search.qdrant.upsert(
+            f"shard{shard}",
+            points=[
+                models.PointStruct(
+                    id=i,
+                    vector={"dense": VECTORS[i], "sparse": models.SparseVector(indices=list(search.bm25.encode("dogs")[0]), values=[1.0])},
+                    payload={"content": f"Document {i}"},
+                )
+                for i in range(shard, len(VECTORS), 3)
+            ],
+        )
+        shards.append(search)
+    return shards
+
+
+async def test_score_fusion_merges_shards(shards):
+    sharded = ShardedSearch(shards)
+
+    results = await sharded.semantic_search(query=QUERY, limit=4)
+
+    assert [result["data"]["content"] for result in results] == [f"Document {i}" for i in range(4)]
+    assert results == sorted(results, key=lambda result: -result["score"])
+
+
+async def test_rrf_fusion_sums_duplicates(shards):
+    # The first shard answers twice, so its documents are found by two shards
+    sharded = ShardedSearch([shards[0], shards[0], shards[1]], fusion="rrf")
+
+    results = await sharded.semantic_search(query=QUERY, limit=3)
+
+    assert [result["data"]["content"] for result in results] == ["Document 0", "Document 3", "Document 6"]
+    assert results[0]["score"] == pytest.approx(2 / 61)
+
+
+async def test_keyword_and_hybrid_search(shards):
+    sharded = ShardedSearch(shards)
+
+    keyword = await sharded.keyword_search(keywords=["dogs"], limit=5)
+    hybrid = await sharded.hybrid_search(query=QUERY, keywords=["dogs"], limit=5)
+
+    assert len(keyword) == 5
+    assert len(hybrid) == 5
+
+
+async def test_slow_shard_returns_partial_results(shards):
+    sharded = ShardedSearch([shards[0], SlowSearch(shards[1], delay=1), shards[2]], timeout=0.1)
+
+    results = await sharded.semantic_search(query=QUERY, limit=9)
+    [batch] = await sharded.batch_search([{"mode": "semantic", "query": QUERY, "limit": 9}])
+
+    contents = {result["data"]["content"] for result in results}
+    assert contents == {f"Document {i}" for i in range(9) if i % 3 != 1}
+    assert batch == results
+
+
+async def test_failing_shard_returns_partial_results(shards):
+    sharded = ShardedSearch([FailingSearch(), shards[0]])
+
+    results = await sharded.semantic_search(query=QUERY, limit=9)
+
+    assert len(results) == 3
+
+
+async def test_fails_if_no_shard_answers():
+    sharded = ShardedSearch([FailingSearch(), FailingSearch()])
+
+    with pytest.raises(ConnectionError):
+        await sharded.semantic_search(query=QUERY)
+
+
+async def test_batch_search(shards):
+    sharded = ShardedSearch(shards)
+
+    semantic, keyword = await sharded.batch_search(
+        [{"mode": "semantic", "query": QUERY, "limit": 2}, {"mode": "keyword", "keywords": ["dogs"], "limit": 6}]
+    )
+
+    assert [result["data"]["content"] for result in semantic] == ["Document 0", "Document 1"]
+    assert len(keyword) == 6
+    assert await sharded.batch_search([]) == []
+
+
+def test_requires_shards():
+    with pytest.raises(ValueError):
+        ShardedSearch([])
+
+
+def test_fuse_results():
+    dog = {"content": "dog"}
+    cat = {"content": "cat"}
+    car = {"content": "car"}
+
+    fused = fuse_results(
+        [
+            [{"score": 0.9, "data": cat}, {"score": 0.8, "data": dog}],
+            [{"score": 0.7, "data": dog}, {"score": 0.6, "data": car}],
+        ],
+        limit=2,
+    )
+
+    assert [search["data"] for search in fused] == [dog, cat]
+    assert fuse_results([[], []], limit=2) == []
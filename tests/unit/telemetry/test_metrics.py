@@ -0,0 +1,47 @@
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from rag import telemetry
+from rag.entrypoints.rest import app
+
+
+def sample(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_stage():
+    before = sample("rag_stage_duration_seconds_count", stage="unit", model="m", tool="t")
+
+    with telemetry.tool_context("m", "t"), telemetry.stage("unit"):
+        assert sample("rag_stage_in_flight", stage="unit") == 1
+
+    assert sample("rag_stage_in_flight", stage="unit") == 0
+    assert sample("rag_stage_duration_seconds_count", stage="unit", model="m", tool="t") == before + 1
+
+
+async def test_generate_stream_metrics(openai_chat):
+    tokens = sample("rag_llm_tokens_total", model="metrics")
+
+    async for _ in openai_chat.generate_stream(
+        messages=[{"role": "user", "content": "Hello"}], model="metrics"
+    ):
+        continue
+
+    assert sample("rag_llm_tokens_total", model="metrics") == tokens + len("Hello, world!")
+    assert sample("rag_llm_time_to_first_token_seconds_count", model="metrics") >= 1
+    assert sample("rag_llm_inter_token_seconds_count", model="metrics") >= len("Hello, world!") - 1
+
+
+def test_record_cache():
+    telemetry.record_cache("unit", hit=True)
+    telemetry.record_cache("unit", hit=False)
+
+    assert sample("rag_cache_requests_total", cache="unit", result="hit") >= 1
+    assert sample("rag_cache_requests_total", cache="unit", result="miss") >= 1
+
+
+def test_metrics_endpoint():
+    response = TestClient(app).get("/metrics")
+
+    assert response.status_code == 200
+    assert "rag_stage_duration_seconds" in response.text
@@ -0,0 +1,108 @@
+import asyncio
+import json
+import signal
+import threading
+import time
+
+import pytest
+
+from rag import telemetry
+
+
+def busy(seconds: float) -> None:
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        pass
+
+
+def unprofiled_busy(seconds: float) -> None:
+    busy(seconds)
+
+
+def test_samples_are_grouped_by_stage():
+    with telemetry.start_trace("chat"), telemetry.profile("chat", interval=0.001) as profile:
+        with telemetry.stage("embed"):
+            busy(0.05)
+        busy(0.05)
+
+    stages = profile.stages()
+    assert set(stages) == {"embed", "chat"}
+    assert all(seconds > 0 for seconds in stages.values())
+    assert any(frame[0] == "busy" for _, stack in profile.samples for frame in stack)
+
+
+def test_samples_outside_a_trace():
+    with telemetry.profile("script", interval=0.001) as profile:
+        busy(0.02)
+
+    assert list(profile.stages()) == ["request"]
+
+
+def test_timer_stops_with_the_last_profile():
+    handler = signal.getsignal(signal.SIGPROF)
+
+    with telemetry.profile("outer", interval=0.001), telemetry.profile("inner", interval=0.1) as inner:
+        assert inner.interval == 0.001
+        assert signal.getitimer(signal.ITIMER_PROF)[1] == pytest.approx(0.001)
+
+    assert signal.getitimer(signal.ITIMER_PROF) == (0.0, 0.0)
+    assert signal.getsignal(signal.SIGPROF) is handler
+
+
+async def test_only_profiled_tasks_are_sampled():
+    async def profiled():
+        with telemetry.profile("profiled", interval=0.001) as profile:
+            for _ in range(10):
+                busy(0.005)
+                await asyncio.sleep(0)
+        return profile
+
+    async def unprofiled():
+        for _ in range(10):
+            unprofiled_busy(0.005)
+            await asyncio.sleep(0)
+
+    profile, _ = await asyncio.gather(profiled(), unprofiled())
+
+    assert profile.samples
+    assert "unprofiled_busy" not in profile.to_folded()
+
+
+def test_profiling_requires_the_main_thread():
+    errors = []
+
+    def run():
+        try:
+            with telemetry.profile("thread"):
+                pass
+        except RuntimeError as err:
+            errors.append(err)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+
+    assert len(errors) == 1
+
+
+def test_write_formats(tmp_path):
+    with telemetry.start_trace("chat"), telemetry.profile("POST /chat", interval=0.001) as profile:
+        with telemetry.stage("embed"):
+            busy(0.02)
+        with telemetry.stage("qdrant_query"):
+            busy(0.02)
+
+    folded = profile.write(tmp_path, "folded")
+    assert "-POST--chat-" in folded.name
+    lines = folded.read_text().splitlines()
+    assert {line.split(";")[0] for line in lines} == {"embed", "qdrant_query"}
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == sum(profile.samples.values())
+
+    speedscope = json.loads(profile.write(tmp_path, "speedscope").read_text())
+    frames = speedscope["shared"]["frames"]
+    total, *stages = speedscope["profiles"]
+    assert [stage["name"] for stage in stages] == [f"POST /chat [{name}]" for name in profile.stages()]
+    assert total["endValue"] == pytest.approx(sum(stage["endValue"] for stage in stages))
+    assert {frames[sample[0]]["name"] for sample in total["samples"]} == {"[embed]", "[qdrant_query]"}
+    assert all(0 <= index < len(frames) for stage in stages for sample in stage["samples"] for index in sample)
+    assert len(list(tmp_path.iterdir())) == 2
@@ -0,0 +1,71 @@
+import json
+
+from rag import telemetry
+from rag.telemetry.tracing import JsonlExporter
+
+
+def test_span_outside_trace():
+    with telemetry.span("orphan") as span:
+        assert span is None
+
+
+def test_span_tree():
+    with telemetry.start_trace("request", model="m") as trace:
+        with telemetry.tool_context("m", "keyword_search"), telemetry.stage("tool_call"):
+            with telemetry.stage("sparse_encode"):
+                pass
+            with telemetry.stage("qdrant_query"):
+                pass
+
+    assert telemetry.current_span() is None
+
+    (tool_call,) = trace.root.children
+    assert tool_call.name == "tool_call"
+    assert tool_call.attributes == {"tool": "keyword_search"}
+    assert [child.name for child in tool_call.children] == ["sparse_encode", "qdrant_query"]
+    assert all(span.end is not None for span in trace.root.walk())
+
+
+def test_server_timing():
+    with telemetry.start_trace("request") as trace:
+        for _ in range(2):
+            with telemetry.stage("embed"):
+                pass
+
+    header = trace.server_timing()
+
+    assert header.startswith('embed;dur=')
+    assert 'desc="2x"' in header
+    assert header.split(", ")[-1].startswith("total;dur=")
+
+
+async def test_generate_stream_span(openai_chat):
+    with telemetry.start_trace("request") as trace:
+        async for _ in openai_chat.generate_stream(
+            messages=[{"role": "user", "content": "Hello"}], model="test"
+        ):
+            continue
+
+    (llm_round,) = trace.root.children
+    assert llm_round.name == "llm_round"
+    assert llm_round.attributes["tokens"] == len("Hello, world!")
+    assert "ttft_ms" in llm_round.attributes
+
+
+def test_jsonl_exporter(tmp_path):
+    path = tmp_path / "traces" / "log.jsonl"
+    exporter = JsonlExporter(path)
+
+    with telemetry.start_trace("request") as trace:
+        with telemetry.stage("template_build"):
+            pass
+
+    exporter.export(trace)
+    exporter.export(trace)
+
+    lines = path.read_text().splitlines()
+    assert len(lines) == 2
+
+    record = json.loads(lines[0])
+    assert record["trace_id"] == trace.trace_id
+    assert record["children"][0]["name"] == "template_build"